@@ -0,0 +1,281 @@
+"""
+Sıcak yollar için ölçeklenebilir performans ölçümü (benchmark):
+- Her veri boyutunda (10k .. 5M satış) üretim, yükleme, özet, tahmin verisi okuma, model eğitimi
+  ve sohbet niyetleri ölçülür
+- Her ölçüm için süre, satır/saniye ve en yüksek Python bellek kullanımı (tracemalloc) kaydedilir
+- Sonuçlar JSON temel çizgisine (baseline) yazılabilir; sonraki çalışmalar bununla karşılaştırılır
+  ve eşiği aşan yavaşlamalar işaretlenir (çıkış kodu 1)
+
+DİKKAT: Ölçüm `sales`, `sales_daily` ve `staff_schedules` tablolarını boşaltır. Sadece adında
+'bench' geçen ayrı bir veritabanında çalışır (örn. DB_NAME=smart_branch_bench).
+
+Kullanım:
+    DB_NAME=smart_branch_bench python benchmark.py --sizes 10k,100k,1m --save-baseline
+    DB_NAME=smart_branch_bench python benchmark.py --sizes 10k,100k,1m          # temel çizgiyle karşılaştırır
+    DB_NAME=smart_branch_bench python benchmark.py --sizes 5m --backend fourier_ridge --no-memory
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import pandas as pd
+from sqlalchemy import text
+
+from chat_queries import INTENTS, run_chat_query
+from db_config import get_engine, load_db_settings
+from forecast_backends import BACKENDS, MIN_HISTORY_DAYS
+from partitions import ensure_sales_partitions, load_sales
+from prediction_engine import get_data_for_prediction, train_and_predict
+from sales_rollup import refresh_sales_daily
+from sales_snapshot import SalesSnapshot
+from schema import create_schema
+from seed_data import (generate_branch_data, generate_employee_data, generate_product_data,
+                       generate_sales_data, generate_staff_schedules, load_data)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+DEFAULT_SIZES = '10k,100k,1m'
+DEFAULT_THRESHOLD = 0.20
+SALES_PER_DAY_PER_BRANCH = 150
+COPY_TABLE = 'bench_sales_copy'
+CHAT_INTENT_PARAMS = {"days": 30, "limit": 5}
+
+
+def parse_size(value):
+    """'10k', '1m', '250000' gibi boyutları satır sayısına çevirir."""
+    value = value.strip().lower().replace('_', '')
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(value[-1:], 1)
+    return int(float(value.rstrip('km')) * multiplier)
+
+
+def size_label(rows):
+    if rows >= 1_000_000 and rows % 1_000_000 == 0:
+        return f"{rows // 1_000_000}m"
+    if rows >= 1_000 and rows % 1_000 == 0:
+        return f"{rows // 1_000}k"
+    return str(rows)
+
+
+class Recorder:
+    """Ölçümleri (vaka, boyut) anahtarıyla toplar."""
+
+    def __init__(self, track_memory=True, repeat=1):
+        self.track_memory = track_memory
+        self.repeat = repeat
+        self.results = []
+
+    def measure(self, case, size, func, rows=None, repeat=None):
+        """`func`'ı çalıştırır; en iyi süreyi ve en yüksek bellek değerini kaydeder, son sonucu döndürür.
+
+        `rows` bir sayı veya sonuçtan satır sayısını çıkaran bir fonksiyon olabilir.
+        """
+        best = None
+        peak = 0
+        result = None
+        for _ in range(repeat or self.repeat):
+            if self.track_memory:
+                tracemalloc.start()
+            started = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - started
+            if self.track_memory:
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+            best = elapsed if best is None else min(best, elapsed)
+
+        n_rows = rows(result) if callable(rows) else rows
+        entry = {
+            'case': case,
+            'size': size_label(size) if size else 'fixed',
+            'rows': n_rows,
+            'seconds': round(best, 4),
+            'rows_per_sec': round(n_rows / best, 1) if n_rows and best > 0 else None,
+            'peak_mb': round(peak / (1024 * 1024), 2) if self.track_memory else None,
+        }
+        self.results.append(entry)
+        rate = f"{entry['rows_per_sec']:>12,.0f} satır/sn" if entry['rows_per_sec'] else " " * 20
+        memory = f"{entry['peak_mb']:>9,.1f} MB" if entry['peak_mb'] is not None else ""
+        print(f"   {case:<36} {entry['size']:>6} {best:>9.3f} sn {rate} {memory}")
+        return result
+
+
+def create_db_engine():
+    return get_engine(application_name='benchmark')
+
+
+def check_bench_database(allow_any_db=False):
+    """Tabloları boşaltacağımız için sadece 'bench' içeren veritabanlarında çalışılır."""
+    name = load_db_settings()['name']
+    if 'bench' not in name.lower() and not allow_any_db:
+        sys.exit(f"!!! '{name}' veritabanı benchmark için uygun değil (tablolar boşaltılır). "
+                 "DB_NAME=smart_branch_bench gibi ayrı bir veritabanı kullanın veya --allow-any-db verin.")
+    return name
+
+
+def prepare_database(engine):
+    """Şemayı ve satış üretiminin ihtiyaç duyduğu sabit tabloları (şube, personel, ürün) hazırlar."""
+    create_schema(engine)
+    with engine.begin() as conn:
+        conn.execute(text(f"CREATE UNLOGGED TABLE IF NOT EXISTS {COPY_TABLE} (LIKE sales INCLUDING DEFAULTS);"))
+        has_branches = conn.execute(text("SELECT EXISTS (SELECT 1 FROM branches);")).scalar()
+
+    if not has_branches:
+        load_data(engine, generate_branch_data(num_branches=5), 'branches')
+        branches_in_db = pd.read_sql_table('branches', engine, schema='public', columns=['branch_id'])
+        load_data(engine, generate_employee_data(branches_df=branches_in_db, num_employees_per_branch=8), 'employees')
+        load_data(engine, generate_product_data(num_products=100), 'products')
+
+    return pd.read_sql("SELECT COUNT(*) FROM branches;", engine).iloc[0, 0]
+
+
+def reset_sales(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"TRUNCATE sales, sales_daily, sales_daily_watermark, {COPY_TABLE};"))
+
+
+def bench_staff_schedules(recorder, engine):
+    """Vardiya üretimi veri boyutundan bağımsızdır (son 365 gün); bir kez ölçülür."""
+    def run():
+        raw_conn = engine.raw_connection()
+        try:
+            with raw_conn.cursor() as cursor:
+                generate_staff_schedules(raw_conn, cursor)
+        finally:
+            raw_conn.close()
+
+    def count_rows(_):
+        return int(pd.read_sql("SELECT COUNT(*) FROM staff_schedules;", engine).iloc[0, 0])
+
+    recorder.measure('generate_staff_schedules', None, run, rows=count_rows, repeat=1)
+
+
+def bench_size(recorder, engine, size, n_branches, backend):
+    """Tek bir veri boyutu için tüm sıcak yolları sırayla ölçer.
+
+    Küçük boyutlarda da modelin eğitilebilmesi için en az `MIN_HISTORY_DAYS` günlük geçmiş üretilir;
+    satır sayısı şube başına günlük satış düşürülerek korunur.
+    """
+    days = max(MIN_HISTORY_DAYS, -(-size // (SALES_PER_DAY_PER_BRANCH * n_branches)))
+    sales_per_day = max(1, min(SALES_PER_DAY_PER_BRANCH, -(-size // (days * n_branches))))
+    end_date = datetime.now().date()
+    start_date = end_date - timedelta(days=days - 1)
+
+    reset_sales(engine)
+    ensure_sales_partitions(engine, start_date, end_date)
+
+    sales_df = recorder.measure(
+        'generate_sales_data', size,
+        lambda: generate_sales_data(engine, start_date, end_date, sales_per_day, seed=42),
+        rows=len, repeat=1,
+    )
+    n_rows = len(sales_df)
+
+    recorder.measure('load_data', size, lambda: load_data(engine, sales_df, COPY_TABLE), rows=n_rows, repeat=1)
+    recorder.measure('load_sales', size, lambda: load_sales(engine, sales_df), rows=n_rows, repeat=1)
+    del sales_df
+
+    recorder.measure('refresh_sales_daily', size, lambda: refresh_sales_daily(engine, rebuild=True), rows=n_rows, repeat=1)
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+        conn.execute(text("ANALYZE sales; ANALYZE sales_daily;"))
+
+    total_df = recorder.measure('get_data_for_prediction[all]', size, lambda: get_data_for_prediction(engine), rows=len)
+    recorder.measure('get_data_for_prediction[branch]', size, lambda: get_data_for_prediction(engine, branch_id=1), rows=len)
+    recorder.measure(f'train_and_predict[{backend}]', size,
+                     lambda: train_and_predict(total_df, 0, periods=7, backend=backend), rows=len(total_df), repeat=1)
+
+    for intent in INTENTS:
+        intent_info = {"intent": intent, **CHAT_INTENT_PARAMS}
+        recorder.measure(f'run_chat_query[{intent}]', size,
+                         lambda: run_chat_query(engine, intent_info, 0)[0], rows=len)
+
+    snapshot = SalesSnapshot()
+    recorder.measure('sales_snapshot.refresh', size, lambda: snapshot.refresh(engine, force=True), rows=lambda added: added, repeat=1)
+    for intent in ('top_products', 'total_revenue'):
+        intent_info = {"intent": intent, **CHAT_INTENT_PARAMS}
+        recorder.measure(f'run_chat_query[{intent}+snapshot]', size,
+                         lambda: run_chat_query(engine, intent_info, 0, snapshot=snapshot)[0], rows=len)
+
+
+def compare_with_baseline(results, baseline, threshold):
+    """Her ölçümü temel çizgiyle karşılaştırır; eşiği aşan yavaşlama/bellek artışlarını döndürür."""
+    previous = {(entry['case'], entry['size']): entry for entry in baseline['results']}
+    regressions = []
+
+    print(f"\n=== Temel çizgiyle karşılaştırma ({baseline.get('created_at')}, eşik: %{threshold * 100:.0f}) ===")
+    for entry in results:
+        old = previous.get((entry['case'], entry['size']))
+        if old is None or not old['seconds']:
+            continue
+        time_ratio = entry['seconds'] / old['seconds']
+        memory_ratio = None
+        if entry['peak_mb'] and old.get('peak_mb'):
+            memory_ratio = entry['peak_mb'] / old['peak_mb']
+
+        flagged = time_ratio > 1 + threshold or (memory_ratio is not None and memory_ratio > 1 + threshold)
+        status = "!!! YAVAŞLAMA" if flagged else "OK"
+        memory = f", bellek x{memory_ratio:.2f}" if memory_ratio is not None else ""
+        print(f"   [{status}] {entry['case']:<36} {entry['size']:>6}: {old['seconds']:.3f} -> {entry['seconds']:.3f} sn (x{time_ratio:.2f}{memory})")
+        if flagged:
+            regressions.append({**entry, 'baseline_seconds': old['seconds'], 'time_ratio': round(time_ratio, 3)})
+
+    return regressions
+
+
+def write_report(path, results, args):
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'backend': args.backend,
+        'track_memory': not args.no_memory,
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"-> Sonuçlar yazıldı: {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üretim, yükleme, okuma, tahmin ve sohbet yollarını farklı veri boyutlarında ölçer.")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES, help="Virgülle ayrılmış satış satırı sayıları (örn. 10k,100k,1m,5m).")
+    parser.add_argument('--backend', choices=list(BACKENDS), default='prophet', help="train_and_predict için tahmin modeli.")
+    parser.add_argument('--repeat', type=int, default=3, help="Okuma ölçümlerinin tekrar sayısı (en iyi süre alınır).")
+    parser.add_argument('--no-memory', action='store_true', help="tracemalloc ile bellek ölçümünü kapatır (süre ölçümü daha az etkilenir).")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Temel çizgi JSON dosyası.")
+    parser.add_argument('--save-baseline', action='store_true', help="Bu çalışmanın sonuçlarını temel çizgi olarak kaydeder.")
+    parser.add_argument('--output', default=None, help="Bu çalışmanın sonuçlarının ayrıca yazılacağı JSON dosyası.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Yavaşlama eşiği (0.2 = %%20).")
+    parser.add_argument('--allow-any-db', action='store_true', help="Adında 'bench' geçmeyen veritabanında çalışmaya izin verir.")
+    args = parser.parse_args()
+
+    database = check_bench_database(args.allow_any_db)
+    sizes = [parse_size(value) for value in args.sizes.split(',') if value.strip()]
+    engine = create_db_engine()
+    recorder = Recorder(track_memory=not args.no_memory, repeat=args.repeat)
+
+    print(f"\n=== Benchmark: '{database}', boyutlar: {', '.join(size_label(s) for s in sizes)}, model: {args.backend} ===")
+    n_branches = prepare_database(engine)
+    bench_staff_schedules(recorder, engine)
+    for size in sizes:
+        print(f"\n--- {size_label(size)} satış ---")
+        bench_size(recorder, engine, size, n_branches, args.backend)
+
+    if args.output:
+        write_report(args.output, recorder.results, args)
+
+    if args.save_baseline:
+        write_report(args.baseline, recorder.results, args)
+    elif os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare_with_baseline(recorder.results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n!!! {len(regressions)} ölçümde eşiği aşan yavaşlama var.")
+            sys.exit(1)
+        print("\n✅ Temel çizgiye göre yavaşlama yok.")
+    else:
+        print(f"\n-> Temel çizgi bulunamadı ({args.baseline}); kaydetmek için --save-baseline kullanın.")
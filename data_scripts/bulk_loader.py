@@ -0,0 +1,116 @@
+"""
+PostgreSQL COPY tabanlı toplu yükleme yardımcıları:
+- DataFrame, DataFrame iteratörü veya satır (tuple) iteratörünü `COPY ... FROM STDIN` ile yükler
+- Veri ayarlanabilir büyüklükte parçalar (chunk) halinde CSV'ye çevrilip akıtılır
+- Her tablo için yüklenen satır sayısı ve satır/saniye raporlanır
+"""
+
+import csv
+import io
+import itertools
+import time
+
+import pandas as pd
+from psycopg2 import sql
+
+DEFAULT_CHUNK_SIZE = 50_000
+
+
+def is_duplicate_key_error(exc):
+    """Hatanın unique constraint ihlali olup olmadığını kontrol eder."""
+    return getattr(exc, 'pgcode', None) == '23505' or "duplicate key value violates unique constraint" in str(exc)
+
+
+def _encode_frame(df):
+    """DataFrame parçasını COPY için CSV tamponuna çevirir (NaN/None -> NULL)."""
+    buffer = io.StringIO()
+    df.to_csv(buffer, header=False, index=False, na_rep='')
+    buffer.seek(0)
+    return buffer
+
+
+def _encode_rows(rows):
+    """Tuple listesini COPY için CSV tamponuna çevirir (None -> NULL)."""
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator='\n').writerows(rows)
+    buffer.seek(0)
+    return buffer
+
+
+def _iter_chunks(data, columns, chunk_size):
+    """Girdiyi (sütunlar, CSV tamponu, satır sayısı) parçalarına böler."""
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+
+    iterator = iter(data)
+    first = next(iterator, None)
+    if first is None:
+        return
+    iterator = itertools.chain([first], iterator)
+
+    if isinstance(first, pd.DataFrame):
+        # DataFrame (veya DataFrame akışı): her frame kendi içinde chunk_size'a bölünür
+        for frame in iterator:
+            frame_columns = list(columns or frame.columns)
+            frame = frame[frame_columns]
+            for start in range(0, len(frame), chunk_size):
+                part = frame.iloc[start:start + chunk_size]
+                yield frame_columns, _encode_frame(part), len(part)
+    else:
+        if not columns:
+            raise ValueError("Satır iteratörü ile yüklemede 'columns' verilmelidir.")
+        while True:
+            batch = list(itertools.islice(iterator, chunk_size))
+            if not batch:
+                break
+            yield list(columns), _encode_rows(batch), len(batch)
+
+
+def copy_to_table(cursor, data, table_name, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, schema='public'):
+    """Veriyi verilen psycopg2 cursor'ı üzerinden COPY ile yükler; commit çağırana bırakılır.
+
+    Yüklenen satır sayısını ve geçen süreyi (saniye) döndürür.
+    """
+    started = time.perf_counter()
+    total_rows = 0
+
+    for chunk_columns, buffer, n_rows in _iter_chunks(data, columns, chunk_size):
+        copy_sql = sql.SQL("COPY {}.{} ({}) FROM STDIN WITH (FORMAT csv)").format(
+            sql.Identifier(schema),
+            sql.Identifier(table_name),
+            sql.SQL(', ').join(sql.Identifier(c) for c in chunk_columns),
+        )
+        cursor.copy_expert(copy_sql, buffer)
+        total_rows += n_rows
+
+    return total_rows, time.perf_counter() - started
+
+
+def print_load_report(table_name, rows, elapsed):
+    """Tablo bazında yükleme hızını yazdırır."""
+    rate = rows / elapsed if elapsed > 0 else float('inf')
+    print(f"-> {rows} adet {table_name} verisi COPY ile yüklendi ({elapsed:.2f} sn, {rate:,.0f} satır/sn).")
+
+
+def bulk_load(engine, data, table_name, columns=None, chunk_size=DEFAULT_CHUNK_SIZE, schema='public'):
+    """Veriyi tek bir transaction içinde COPY ile yükler ve sonucu yazdırır.
+
+    `data` bir DataFrame, DataFrame iteratörü veya (`columns` ile birlikte) satır iteratörü olabilir.
+    Başarılıysa True, hata durumunda (transaction geri alınarak) False döner.
+    """
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            rows, elapsed = copy_to_table(cursor, data, table_name, columns=columns, chunk_size=chunk_size, schema=schema)
+        raw_conn.commit()
+        print_load_report(table_name, rows, elapsed)
+        return True
+    except Exception as e:
+        raw_conn.rollback()
+        if is_duplicate_key_error(e):
+            print(f"!!! [YÜKLEME HATASI] '{table_name}' zaten dolu. Yeni veri yüklenmedi.")
+        else:
+            print(f"!!! [YÜKLEME HATASI] '{table_name}' tablosuna yükleme başarısız: {e}")
+        return False
+    finally:
+        raw_conn.close()
@@ -0,0 +1,137 @@
+"""
+Doğal dil sohbet sorguları için sonuç önbelleği:
+- Anahtar: ayrıştırılmış niyet ve değerlendirme günü `(intent, days, limit, branch_id, gün)`;
+  "son N gün" pencereleri `NOW()`/`CURRENT_DATE`'e göre hesaplandığından gün değişince yeni kayıt açılır
+- Kayıtlar en fazla `ttl` saniye yaşar; gün içinde kayan `NOW()` pencereleri de bu sürede yenilenir
+- Her kayıt bir veri filigranı (watermark) ile saklanır: ilgili şubenin son `sale_datetime`'ı,
+  son `prediction_run_time` veya envanter motorunun son uyguladığı `sale_id` ile stok özeti;
+  filigran değiştiyse kayıt bayat sayılır ve yeniden hesaplanır
+- Toplam bellek sınırı aşıldığında en uzun süredir kullanılmayan (LRU) kayıtlar atılır
+- İsabet / ıska / atılma istatistikleri tutulur
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from sqlalchemy import text
+
+from sales_rollup import LATEST_SALE_SQL
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 300
+
+# Niyet -> filigran sorgusu; şube filtresi (branch_id > 0) indeks üzerinden tek satır okur
+SALES_WATERMARK_SQL = "SELECT MAX(sale_datetime) FROM sales WHERE branch_id = :branch_id;"
+ALL_SALES_WATERMARK_SQL = LATEST_SALE_SQL
+PREDICTION_WATERMARK_SQL = "SELECT MAX(prediction_run_time) FROM prediction_results;"
+PREDICTION_INTENTS = ('forecast_summary',)
+INVENTORY_WATERMARK_SQL = "SELECT last_sale_id FROM inventory_watermark WHERE id = 1;"
+# Stok özeti: envanter motoru dışındaki değişiklikleri (elle stok girişi, motorun hiç çalışmaması) yakalar
+INVENTORY_FINGERPRINT_SQL = """
+SELECT COUNT(*), COALESCE(SUM(current_stock_level), 0), COUNT(*) FILTER (WHERE current_stock_level < reorder_point)
+FROM branch_inventory
+WHERE :branch_id = 0 OR branch_id = :branch_id;
+"""
+INVENTORY_INTENTS = ('low_stock',)
+
+
+def intent_key(intent_info, branch_id, today=None):
+    """Önbellek anahtarı: niyet, zaman penceresi, limit, şube ve pencerenin değerlendirildiği gün."""
+    return (
+        intent_info["intent"],
+        intent_info.get("days", 7),
+        intent_info.get("limit", 5),
+        int(branch_id or 0),
+        (today or date.today()).isoformat(),
+    )
+
+
+def read_watermark(engine, intent_info, branch_id):
+    """Niyetin dayandığı verinin en son değişim zamanını okur."""
+    with engine.connect() as conn:
+        if intent_info["intent"] in PREDICTION_INTENTS:
+            return conn.execute(text(PREDICTION_WATERMARK_SQL)).scalar()
+        if intent_info["intent"] in INVENTORY_INTENTS:
+            fingerprint = tuple(conn.execute(text(INVENTORY_FINGERPRINT_SQL), {'branch_id': int(branch_id or 0)}).one())
+            try:
+                with conn.begin_nested():
+                    last_sale_id = conn.execute(text(INVENTORY_WATERMARK_SQL)).scalar()
+            except Exception:
+                # Envanter motoru hiç çalışmadıysa sadece stok özeti kullanılır
+                last_sale_id = None
+            return last_sale_id, fingerprint
+        if branch_id:
+            return conn.execute(text(SALES_WATERMARK_SQL), {'branch_id': int(branch_id)}).scalar()
+        return conn.execute(text(ALL_SALES_WATERMARK_SQL)).scalar()
+
+
+class ChatResultCache:
+    """Süreç içinde tüm oturumların paylaştığı, bellek ve süre sınırlı LRU sonuç önbelleği."""
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, watermark):
+        """Filigranı eşleşen ve süresi dolmamış kayıt varsa (DataFrame, özet) döndürür; bayat kaydı siler."""
+        with self._lock:
+            entry = self._entries.get(key)
+            fresh = entry is not None and time.monotonic() - entry['stored_at'] < self.ttl
+            if fresh and entry['watermark'] == watermark:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['df'].copy(), entry['summary']
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key, watermark, df, summary):
+        """Sonucu saklar; tek başına sınırı aşan veya boş sonuçlar önbelleğe alınmaz."""
+        if df is None:
+            return
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            # Süresi dolan kayıtlar (örn. önceki günlerin anahtarları) bellek sınırını beklemeden atılır
+            now = time.monotonic()
+            for expired in [k for k, entry in self._entries.items() if now - entry['stored_at'] >= self.ttl]:
+                self._remove(expired)
+            self._entries[key] = {'watermark': watermark, 'df': df.copy(), 'summary': summary, 'bytes': nbytes,
+                                  'stored_at': time.monotonic()}
+            self._bytes += nbytes
+            while self._bytes > self.max_bytes and self._entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= entry['bytes']
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
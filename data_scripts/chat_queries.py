@@ -0,0 +1,134 @@
+"""
+Sohbet (doğal dil) sorguları için niyet ayrıştırma ve şablonlu SQL:
+- `parse_user_query` anahtar kelimelere göre sınırlı bir niyet seçer
+- `run_chat_query` niyeti güvenli, parametreleri sınırlandırılmış bir sorguyla cevaplar
+Dashboard ve benchmark betiği aynı fonksiyonları kullanır.
+"""
+
+import re
+
+import pandas as pd
+
+INTENTS = ('top_products', 'total_revenue', 'low_stock', 'forecast_summary')
+
+
+def parse_user_query(text: str):
+    """Anahtar kelimelere göre sınırlı şablon seçer."""
+    t = text.lower()
+
+    # Varsayılan zaman penceresi: 7 gün
+    days = 7
+    m = re.search(r"(\d+)\s*gün", t)
+    if m:
+        days = min(max(int(m.group(1)), 1), 90)  # 1-90 arası sınırla
+    if "30" in t and "gün" in t:
+        days = 30
+    if "hafta" in t and "son" in t:
+        days = 7
+
+    if any(k in t for k in ["en çok satan", "ilk 5", "top 5", "top5"]):
+        return {"intent": "top_products", "days": days, "limit": 5}
+    if any(k in t for k in ["ciro", "toplam satış", "toplam ciro", "gelir"]):
+        return {"intent": "total_revenue", "days": days}
+    if any(k in t for k in ["stok", "reorder", "kritik"]):
+        return {"intent": "low_stock"}
+    if any(k in t for k in ["tahmin", "forecast", "öngörü"]):
+        return {"intent": "forecast_summary"}
+
+    return None
+
+
+CHAT_SUMMARIES = {
+    'top_products': "Son {days} günde en çok satan ilk {limit} ürün.",
+    'total_revenue': "Son {days} günde toplam ciro ve adet özeti.",
+    'low_stock': "Reorder noktası altında kritik stoklar.",
+    'forecast_summary': "Son tahmin çalışmasından özet.",
+}
+
+
+def chat_sql(intent_info, branch_id):
+    """Niyetin şablonlu SQL'ini üretir; şablonu olmayan niyetler için None döner.
+
+    `schema.py --explain` aynı fonksiyonu örnek niyetlerle çağırarak çalışan sorguların planını kontrol eder.
+    """
+    intent = intent_info["intent"]
+    days = int(intent_info.get("days", 7))
+    limit = int(intent_info.get("limit", 5))
+
+    branch_filter = ""
+    if branch_id and branch_id != 0:
+        branch_filter = f"AND branch_id = {int(branch_id)}"
+
+    if intent == "top_products":
+        return f"""
+        SELECT p.product_name,
+               SUM(s.quantity) AS adet,
+               SUM(s.total_sale_amount) AS ciro
+        FROM sales s
+        JOIN products p ON p.product_id = s.product_id
+        WHERE s.sale_datetime >= NOW() - INTERVAL '{days} days'
+        {branch_filter}
+        GROUP BY p.product_name
+        ORDER BY adet DESC
+        LIMIT {limit};
+        """
+
+    if intent == "total_revenue":
+        # Günlük özet tablosundan okunur: bugün dahil son {days} takvim günü
+        return f"""
+        SELECT
+            SUM(total_amount) AS toplam_ciro,
+            SUM(total_quantity) AS toplam_adet,
+            SUM(transaction_count) AS islem_sayisi
+        FROM sales_daily
+        WHERE day > CURRENT_DATE - {days}
+        {branch_filter};
+        """
+
+    if intent == "low_stock":
+        return f"""
+        SELECT p.product_name,
+               bi.current_stock_level,
+               bi.reorder_point
+        FROM branch_inventory bi
+        JOIN products p ON p.product_id = bi.product_id
+        WHERE bi.current_stock_level < bi.reorder_point
+        {branch_filter}
+        ORDER BY bi.current_stock_level ASC
+        LIMIT 20;
+        """
+
+    if intent == "forecast_summary":
+        return f"""
+        SELECT
+            AVG(predicted_sales) AS ortalama_tahmin,
+            MIN(prediction_date) AS baslangic,
+            MAX(prediction_date) AS bitis
+        FROM prediction_results
+        WHERE prediction_run_time = (SELECT MAX(prediction_run_time) FROM prediction_results)
+        {branch_filter};
+        """
+
+    return None
+
+
+def run_chat_query(engine, intent_info, branch_id, snapshot=None):
+    """Seçili niyete göre güvenli şablonlu sorgu çalıştırır.
+
+    `snapshot` (bkz. sales_snapshot.py) verilirse desteklediği niyetler veritabanına gitmeden cevaplanır.
+    """
+    # Satış analitikleri veritabanına gitmeden bellek içi anlık görüntüden cevaplanır
+    if snapshot is not None:
+        answered = snapshot.answer(intent_info, branch_id)
+        if answered is not None:
+            return answered
+
+    sql = chat_sql(intent_info, branch_id)
+    if sql is None:
+        return None, "Bu sorgu için şablon yok."
+
+    df = pd.read_sql(sql, engine)
+    summary = CHAT_SUMMARIES[intent_info["intent"]].format(
+        days=intent_info.get("days", 7), limit=intent_info.get("limit", 5)
+    )
+    return df, summary
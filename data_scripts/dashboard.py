@@ -1,10 +1,25 @@
 import streamlit as st
 import pandas as pd
-from sqlalchemy import create_engine
 import plotly.express as px
+import math
+import os
 import random
-import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from sqlalchemy import text
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from chat_cache import ChatResultCache, intent_key, read_watermark
+from chat_queries import parse_user_query, run_chat_query
+from dashboard_queries import (FORECAST_HISTORY_ORDER_BY, INVENTORY_VERSION_SQL, LATEST_RUN_SQL, PREDICTIONS_SQL,
+                               STOCK_ORDER_BY, critical_stock_query, forecast_history_query, stock_list_query,
+                               stock_summary_query)
+from db_config import get_engine
+from result_tables import EXPORT_FORMATS, PAGE_SIZE_OPTIONS, count_rows, export_query, read_page, sweep_exports
+from run_metrics import METRICS_TABLE, RunMetrics
+from sales_snapshot import SalesSnapshot
+from staffing_engine import DEFAULT_TARGET_SALES_PER_STAFF_HOUR, PLAN_TABLE
 
 
 st.set_page_config(
@@ -17,119 +32,393 @@ st.set_page_config(
     }
 )
 # ----------------- YAPILANDIRMA AYARLARI -----------------
-DB_HOST = "localhost"
-DB_NAME = "postgres"
-DB_USER = "postgres"
-DB_PASS = "Sudem12345" # <-- Kendi şifreniz
+# Bağlantı bilgileri ve havuz boyutu db_config.py üzerinden (DB_* ortam değişkenleri / db_config.ini) okunur.
+# Önbellek süreleri (saniye): son tahmin zamanı sık kontrol edilir, veri setleri bu zamana göre anahtarlanır
+LATEST_RUN_TTL = 30
+DATA_CACHE_TTL = 600
+# Paralel sorgu sayısı; motorun bağlantı havuzunu (DB_POOL_SIZE, varsayılan 5) aşmayacak şekilde seçilir
+LOADER_THREADS = 4
+
+# Dashboard bölümleri ve her bölümün ihtiyaç duyduğu şube verileri; sadece görüntülenen bölüm hesaplanır
+SECTION_DATA = {
+    "Genel Bakış": ('stock',),
+    "Stok & Sipariş": ('stock', 'critical_stock'),
+    "Personel": ('employees', 'staffing_plan'),
+    "Tahmin": ('staffing_plan',),
+    "Performans": (),
+}
+SECTIONS = list(SECTION_DATA)
 
 # ----------------- FONKSİYONLAR -----------------
 
+@st.cache_resource
 def get_db_engine():
-    """SQLAlchemy motorunu oluşturur."""
-    engine_url = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:5432/{DB_NAME}"
-    return create_engine(engine_url)
+    """SQLAlchemy motorunu oluşturur (süreç başına tek motor ve bağlantı havuzu paylaşılır)."""
+    return get_engine(application_name='dashboard')
 
-def load_predictions(engine):
-    """Veritabanından en son tahmin sonuçlarını çeker."""
-    latest_run_time = pd.read_sql("SELECT MAX(prediction_run_time) FROM prediction_results", engine).iloc[0, 0]
-    query = f"""
-    SELECT * FROM prediction_results 
-    WHERE prediction_run_time = '{latest_run_time}'
-    ORDER BY branch_id, prediction_date;
+@st.cache_resource
+def get_chat_cache():
+    """Sohbet sorgu sonuçları için tüm oturumların paylaştığı önbellek."""
+    return ChatResultCache()
+
+@st.cache_resource
+def get_dashboard_metrics():
+    """Dashboard sorgu gecikmelerini toplayan ölçüm tamponu (periyodik olarak 'run_metrics' tablosuna yazılır)."""
+    return RunMetrics('dashboard', track_memory=False)
+
+@st.cache_resource
+def get_sales_snapshot():
+    """Satış analitikleri için süreç içi sütunsal anlık görüntü (artımlı yenilenir, oturumlar arasında paylaşılır)."""
+    return SalesSnapshot()
+
+def load_sales_snapshot(engine):
+    """Anlık görüntüyü son filigrandan itibaren günceller; (snapshot, hata) döner.
+
+    Güncelleme başarısız olursa snapshot None'dır (SQL'e düşülür). Yükleme havuzunda da
+    çalıştığı için arayüze yazmaz; hata mesajı ana akışta gösterilir.
     """
-    df = pd.read_sql(query, engine)
+    snapshot = get_sales_snapshot()
+    try:
+        with get_dashboard_metrics().stage('sales_snapshot.refresh') as stage:
+            stage.rows = snapshot.refresh(engine)
+    except Exception as e:
+        return None, e
+    return snapshot, None
+
+@st.cache_resource
+def get_loader_pool():
+    """Sayfa verilerini paralel yükleyen, oturumlar arasında paylaşılan thread havuzu."""
+    return ThreadPoolExecutor(max_workers=LOADER_THREADS, thread_name_prefix='dashboard-loader')
+
+def load_concurrently(**tasks):
+    """`isim=(fonksiyon, argümanlar...)` görevlerini havuzda aynı anda başlatır ve hepsini bekler.
+
+    Sonuçlar aynı isimlerle sözlük olarak döner; bekleme süresi en yavaş sorgu kadardır.
+    Thread'lere çalışan sayfanın bağlamı eklenir, böylece `st.cache_data` önbellekleri aynen kullanılır.
+    Bir görev hata verirse diğerleri bittikten sonra ilk hata yükseltilir.
+    """
+    ctx = get_script_run_ctx()
+
+    def run(func, *args):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return func(*args)
+
+    pool = get_loader_pool()
+    futures = {name: pool.submit(run, *task) for name, task in tasks.items()}
+    with get_dashboard_metrics().stage('load_concurrently', rows=len(futures)):
+        errors = [future.exception() for future in futures.values()]
+    for error in errors:
+        if error is not None:
+            raise error
+    return {name: future.result() for name, future in futures.items()}
+
+def load_branch_data(engine, branch_id, latest_run_time, inventory_version, section):
+    """Tahminleri ve sadece görüntülenen bölümün ihtiyaç duyduğu şube sorgularını paralel yükler."""
+    loaders = {
+        'stock': (load_stock_summary, engine, branch_id, inventory_version),
+        'critical_stock': (load_critical_stock, engine, branch_id, inventory_version),
+        'employees': (load_employee_metrics, engine, branch_id),
+        'staffing_plan': (load_staffing_plan, engine, branch_id, latest_run_time),
+    }
+    return load_concurrently(
+        predictions=(load_predictions, engine, latest_run_time),
+        **{name: loaders[name] for name in SECTION_DATA[section]},
+    )
+
+@st.cache_data(ttl=LATEST_RUN_TTL, show_spinner=False)
+def get_latest_run_time(_engine):
+    """En son tahmin çalışmasının zamanını döndürür; diğer önbelleklerin veri sürümü olarak kullanılır."""
+    with get_dashboard_metrics().stage('get_latest_run_time', rows=1):
+        return pd.read_sql(LATEST_RUN_SQL, _engine).iloc[0, 0]
+
+@st.cache_data(ttl=LATEST_RUN_TTL, show_spinner=False)
+def get_inventory_version(_engine):
+    """Envanter motorunun (inventory_engine.py) son uyguladığı sale_id; stok önbelleğinin veri sürümüdür."""
+    try:
+        return pd.read_sql(INVENTORY_VERSION_SQL, _engine).iloc[0, 0]
+    except Exception:
+        # Envanter motoru henüz hiç çalışmadıysa
+        return None
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_predictions(_engine, latest_run_time):
+    """Veritabanından en son tahmin sonuçlarını çeker (yeni bir tahmin çalışması önbelleği geçersiz kılar)."""
+    with get_dashboard_metrics().stage('load_predictions') as stage:
+        df = pd.read_sql(text(PREDICTIONS_SQL), _engine, params={'run_time': latest_run_time})
+        stage.rows = len(df)
     df['branch_name'] = df['branch_id'].apply(lambda x: 'Genel Toplam' if x == 0 else f'Şube {x}')
     return df
 
-# !!! KRİTİK GÜNCELLEME: ŞUBE BAZLI STOK ÇEKME FONKSİYONU
-def load_stock_data(engine, branch_id=None):
-    """Branch Inventory ve Products tablolarını kullanarak şube bazlı stok verilerini çeker."""
-    
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_stock_summary(_engine, branch_id=None, data_version=None):
+    """Toplam stok değeri ve kritik (reorder point altı) ürün sayısı; (değer, sayı) döner.
+
+    Sonuç şube ve `data_version` (envanter filigranı) ile önbelleğe alınır; satışlar stoktan
+    düşüldükçe yeni sürüm okunur.
+    """
+    query, params = stock_summary_query(branch_id)
+    with get_dashboard_metrics().stage('load_stock_summary', branch_id=branch_id or 0, rows=1):
+        summary = pd.read_sql(text(query), _engine, params=params).iloc[0]
+    return float(summary['total_stock_value']), int(summary['low_stock_count'])
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_critical_stock(_engine, branch_id=None, data_version=None, limit=3):
+    """Reorder point altındaki en düşük stoklu `limit` ürün (sipariş önerisi için)."""
+    query, params = critical_stock_query(branch_id, limit)
+    with get_dashboard_metrics().stage('load_critical_stock', branch_id=branch_id or 0) as stage:
+        df = pd.read_sql(text(query), _engine, params=params)
+        stage.rows = len(df)
+    return df
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_product_demand(_engine, branch_id=None, data_version=None):
+    """Ürün x şube talep tahminlerini (product_forecast.py) ürün bazında 7 günlük adet olarak çeker."""
+    params = {}
+    branch_filter = ""
+    if branch_id and branch_id != 0:
+        branch_filter = "WHERE branch_id = :branch_id"
+        params['branch_id'] = int(branch_id)
+
+    query = f"""
+    SELECT product_id, SUM(predicted_units) AS predicted_units
+    FROM product_demand_forecasts
+    {branch_filter}
+    GROUP BY product_id;
+    """
+    try:
+        with get_dashboard_metrics().stage('load_product_demand', branch_id=branch_id or 0) as stage:
+            df = pd.read_sql(text(query), _engine, params=params)
+            stage.rows = len(df)
+    except Exception:
+        # Tahmin tablosu henüz oluşturulmadıysa (product_forecast.py hiç çalışmadıysa)
+        return {}
+    return dict(zip(df['product_id'], df['predicted_units']))
+
+@st.cache_data(ttl=LATEST_RUN_TTL, show_spinner=False)
+def load_run_metrics(_engine, days=30):
+    """Performans sekmesi için tahmin çalışması süreleri, son çalışmanın aşamaları ve dashboard gecikmeleri."""
+    recent = f"recorded_at > NOW() - INTERVAL '{int(days)} days'"
+    try:
+        runs_df = pd.read_sql(f"""
+            SELECT run_time, seconds
+            FROM {METRICS_TABLE}
+            WHERE component = 'prediction_engine' AND stage = 'total' AND {recent}
+            ORDER BY run_time;
+        """, _engine)
+        stages_df = pd.read_sql(f"""
+            SELECT stage, branch_id, seconds, row_count, rows_per_sec, peak_memory_mb
+            FROM {METRICS_TABLE}
+            WHERE component = 'prediction_engine' AND {recent}
+              AND run_time = (SELECT MAX(run_time) FROM {METRICS_TABLE} WHERE component = 'prediction_engine' AND {recent})
+            ORDER BY stage, branch_id;
+        """, _engine)
+        latency_df = pd.read_sql(f"""
+            SELECT recorded_at, stage, seconds * 1000 AS ms, row_count
+            FROM {METRICS_TABLE}
+            WHERE component = 'dashboard' AND {recent}
+            ORDER BY recorded_at;
+        """, _engine)
+    except Exception:
+        # Ölçüm tablosu henüz oluşturulmadıysa
+        return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    return runs_df, stages_df, latency_df
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_employee_metrics(_engine, branch_id=None, days=30):
+    """Personel sayısı, son `days` gündeki personel-saat başına ciro ve aylık personel maliyetini çeker."""
+    params = {'days': int(days)}
+    branch_filter = ""
+    if branch_id and branch_id != 0:
+        branch_filter = "AND branch_id = :branch_id"
+        params['branch_id'] = int(branch_id)
+
+    query = f"""
+    SELECT
+        (SELECT COUNT(*) FROM employees WHERE TRUE {branch_filter}) AS total_employees,
+        (SELECT COALESCE(SUM(total_amount), 0) FROM sales_daily
+         WHERE day > CURRENT_DATE - :days {branch_filter}) AS sales,
+        (SELECT COALESCE(SUM(ss.duration_hours), 0) FROM staff_schedules ss
+         WHERE ss.shift_date > CURRENT_DATE - :days {branch_filter.replace('branch_id', 'ss.branch_id')}) AS hours,
+        (SELECT COALESCE(SUM(ss.duration_hours * e.hourly_wage), 0) FROM staff_schedules ss
+         JOIN employees e ON e.employee_id = ss.employee_id
+         WHERE ss.shift_date > CURRENT_DATE - :days {branch_filter.replace('branch_id', 'ss.branch_id')}) AS cost;
+    """
+    with get_dashboard_metrics().stage('load_employee_metrics', branch_id=branch_id or 0):
+        row = pd.read_sql(text(query), _engine, params=params).iloc[0]
+
+    hours = float(row['hours'])
+    avg_sales_per_hour = float(row['sales']) / hours if hours else 0.0
+    # Son `days` günün vardiya maliyeti 30 günlük aya ölçeklenir
+    avg_monthly_cost = float(row['cost']) * 30 / days
+    return avg_sales_per_hour, avg_monthly_cost, int(row['total_employees'])
+
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_staffing_plan(_engine, branch_id=None, data_version=None):
+    """staffing_engine.py'nin hazırladığı vardiya planını çeker; Genel Toplam için şubeler toplanır."""
     if branch_id and branch_id != 0:
-        # Tek bir şube seçildiğinde
         query = f"""
-        SELECT 
-            bi.current_stock_level, 
-            bi.reorder_point, 
-            p.unit_cost, 
-            p.product_name
-        FROM branch_inventory bi
-        JOIN products p ON bi.product_id = p.product_id
-        WHERE bi.branch_id = {branch_id};
+        SELECT plan_date, start_time, end_time, required_staff, current_staff, expected_sales, peak_hour_sales
+        FROM {PLAN_TABLE}
+        WHERE branch_id = {int(branch_id)}
+        ORDER BY plan_date, start_time;
         """
-        df = pd.read_sql(query, engine)
     else:
-        # Genel Toplam seçildiğinde (Tüm şubeleri topla)
-        query = """
-        SELECT 
-            SUM(bi.current_stock_level) as current_stock_level, 
-            bi.reorder_point, 
-            p.unit_cost, 
-            p.product_name
-        FROM branch_inventory bi
-        JOIN products p ON bi.product_id = p.product_id
-        GROUP BY p.product_name, p.unit_cost, bi.reorder_point
+        query = f"""
+        SELECT plan_date, start_time, end_time, SUM(required_staff) AS required_staff,
+               SUM(current_staff) AS current_staff, SUM(expected_sales) AS expected_sales,
+               SUM(peak_hour_sales) AS peak_hour_sales
+        FROM {PLAN_TABLE}
+        GROUP BY plan_date, start_time, end_time
+        ORDER BY plan_date, start_time;
         """
-        df = pd.read_sql(query, engine)
-        
-    df['total_stock_value'] = df['current_stock_level'] * df['unit_cost']
-    
-    # Kritk stok uyarısı: Reorder point'in altındaki ürünlerin sayısı
-    low_stock_count = df[df['current_stock_level'] < df['reorder_point']].shape[0]
-    
-    return df, low_stock_count
+    try:
+        with get_dashboard_metrics().stage('load_staffing_plan', branch_id=branch_id or 0) as stage:
+            df = pd.read_sql(query, _engine)
+            stage.rows = len(df)
+    except Exception:
+        # Plan tablosu henüz oluşturulmadıysa (staffing_engine.py hiç çalışmadıysa)
+        return pd.DataFrame()
+    df['plan_date'] = pd.to_datetime(df['plan_date'])
+    df['shift'] = df['start_time'].astype(str).str[:5] + '-' + df['end_time'].astype(str).str[:5]
+    return df
 
-# !!! KRİTİK GÜNCELLEME: ŞUBE BAZLI PERSONEL METRİKLERİ (Simülasyon)
-def load_employee_metrics(engine, branch_id=None):
-    """Personel maliyeti ve verimlilik metriklerini hesaplar (Şube bazlı görsel simülasyon)."""
-    
-    base_sales_per_hour = 450
-    base_employees = 240
-    
-    if branch_id and branch_id != 0:
-        # Şube Bazlı Görünür Farklılık Yaratma Simülasyonu
-        # Şube ID arttıkça verimlilik de artıyor gibi göstereceğiz.
-        avg_sales_per_hour = base_sales_per_hour + (branch_id * 35) 
-        
-        # Şubedeki personel sayısı
-        total_employees = 8 + (branch_id % 3) 
-    else:
-        # Genel Toplam değerler
-        avg_sales_per_hour = base_sales_per_hour
-        total_employees = base_employees
-    
-    avg_monthly_cost = total_employees * 250 * 160 
-    
-    return avg_sales_per_hour, avg_monthly_cost, total_employees
 
+def generate_optimization_recommendation(plan_df):
+    """Hazır vardiya planından en yoğun günün personel ihtiyacını ve mevcut kadroya göre farkı çıkarır."""
+    if plan_df is None or plan_df.empty:
+        return None
 
-def generate_optimization_recommendation(predicted_df):
-    """AI tahminini kullanarak personel ihtiyacı optimizasyonu önerir (Şube Bazlı)."""
-    
-    MIN_SALES_PER_HOUR = 3000 # Simülasyon hedefi
-    forecast_data = predicted_df 
-    
-    # filtered_df zaten seçili şubeye ait tahmin verisini içeriyor.
-    max_sales_day = forecast_data['predicted_sales'].max()
-    avg_predicted_sales = forecast_data['predicted_sales'].mean()
-    
-    # Şube bazlı baz personel sayısı (load_employee_metrics'den çekebiliriz, ama basitleştirelim)
-    total_employees_base = 10 # Varsayılan şube personeli
-    
-    # Satış tahmini %10'dan fazla artıyorsa personel artışı öner
-    if max_sales_day > avg_predicted_sales * 1.10:
-        staff_increase_needed = int(total_employees_base * 0.2) 
-    else:
-        staff_increase_needed = 0
+    daily = plan_df.groupby('plan_date').agg(required=('required_staff', 'sum'), current=('current_staff', 'sum'))
+    peak_date = daily['required'].idxmax()
+    needed = int(daily.loc[peak_date, 'required'])
+    current = daily.loc[peak_date, 'current']
+    increase = needed - int(round(current)) if pd.notna(current) else None
 
     recommendation = {
         "title": "Personel İhtiyacı Optimizasyonu",
-        "needed": total_employees_base + staff_increase_needed,
-        "increase": staff_increase_needed,
-        "efficiency_target": MIN_SALES_PER_HOUR,
+        "needed": needed,
+        "increase": increase,
+        "efficiency_target": DEFAULT_TARGET_SALES_PER_STAFF_HOUR,
+        "peak_date": peak_date,
     }
     return recommendation
 
+# ----------------- BÖLÜM ÇIKTILARI (şube ve veri sürümüne göre önbellekli) -----------------
+# DataFrame argümanları '_' ile başlar (hash'lenmez); önbellek anahtarı şube ve veri sürümüdür.
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def critical_order_list(_critical_df, _product_demand, predicted_sales_sum, branch_id, data_version, demand_version):
+    """Kritik ürünler için 7 günlük talep ve sipariş önerisi; (tablo, CSV baytları) döner."""
+    critical_products = _critical_df.copy()
+
+    def weekly_demand(product_id):
+        if product_id in _product_demand:
+            return int(round(_product_demand[product_id]))
+        # Ürün bazlı tahmin yoksa eski kaba tahmine düşülür
+        return int(predicted_sales_sum * 0.00000005 * 7 * random.uniform(0.9, 1.1))
+
+    critical_products['weekly_demand_forecast'] = critical_products['product_id'].map(weekly_demand)
+    critical_products['order_amount'] = (
+        critical_products['reorder_point'] - critical_products['current_stock_level'] + critical_products['weekly_demand_forecast']
+    ).clip(lower=0)
+    return critical_products, critical_products.to_csv(index=False).encode("utf-8")
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def staffing_plan_figure(_plan_df, branch_id, data_version):
+    """Vardiya bazlı gereken / mevcut personel grafiği."""
+    plan_chart = _plan_df.melt(
+        id_vars=['plan_date', 'shift'], value_vars=['required_staff', 'current_staff'],
+        var_name='kadro', value_name='personel'
+    ).replace({'kadro': {'required_staff': 'Gereken', 'current_staff': 'Mevcut (ortalama)'}})
+    return px.bar(
+        plan_chart, x='plan_date', y='personel', color='kadro', barmode='group', facet_row='shift',
+        labels={'plan_date': 'Tarih', 'personel': 'Personel', 'kadro': ''},
+        template="plotly_dark",
+    )
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def forecast_figure(_filtered_df, branch_label, branch_id, data_version):
+    """7 günlük tahmin ve güven aralığı grafiği."""
+    fig = px.line(
+        _filtered_df,
+        x='prediction_date',
+        y='predicted_sales',
+        title=f'{branch_label} Satış Tahmini (₺)',
+        labels={'predicted_sales': 'Tahmin Edilen Satış (₺)', 'prediction_date': 'Tarih'},
+        template="plotly_dark",
+        color_discrete_sequence=["#22d3ee"]
+    )
+    
+    fig.add_scatter(x=_filtered_df['prediction_date'], y=_filtered_df['upper_bound'], fill=None, mode='lines', line_color='lightgrey', name='Üst Sınır')
+    fig.add_scatter(x=_filtered_df['prediction_date'], y=_filtered_df['lower_bound'], fill='tonexty', mode='lines', line_color='lightgrey', name='Alt Sınır')
+    fig.update_layout(
+        showlegend=True,
+        paper_bgcolor="rgba(0,0,0,0)",
+        plot_bgcolor="rgba(0,0,0,0)",
+        font_color="#e2e8f0",
+        margin=dict(l=20, r=20, t=60, b=20),
+        xaxis=dict(gridcolor="#1f2937"),
+        yaxis=dict(gridcolor="#1f2937"),
+    )
+    return fig
+
+# ----------------- SAYFALI TABLOLAR VE DIŞA AKTARIM -----------------
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_row_count(_engine, query, params, data_version=None):
+    """Sayfalı tablonun toplam satır sayısı (sorgu, parametre ve veri sürümüne göre önbellekli)."""
+    return count_rows(_engine, query, params)
+
+@st.cache_data(ttl=DATA_CACHE_TTL, show_spinner=False)
+def load_page(_engine, query, params, order_by, page, page_size, data_version=None):
+    """Sayfalı tablonun tek bir sayfası; sadece bu satırlar veritabanından çekilir."""
+    with get_dashboard_metrics().stage('load_page') as stage:
+        df = read_page(_engine, query, params, order_by=order_by, page=page, page_size=page_size)
+        stage.rows = len(df)
+    return df
+
+def show_paginated_table(engine, key, query, params, order_by, data_version, file_name):
+    """Sorguyu sunucu taraflı sayfalarla gösterir; dışa aktarım sadece istendiğinde dosyaya akıtılır.
+
+    Hazırlanan dosya oturumda saklanmaz: indirme düğmesine verildikten sonra silinir, tekrar indirmek
+    için yeniden hazırlanmalıdır.
+    """
+    total = load_row_count(engine, query, params, data_version)
+    c1, c2, c3 = st.columns([1, 1, 2])
+    with c1:
+        page_size = st.selectbox("Sayfa boyutu", PAGE_SIZE_OPTIONS, index=1, key=f"{key}_page_size")
+    pages = max(math.ceil(total / page_size), 1)
+    # Sayfa boyutu veya veri değişince eski sayfa numarası aralık dışında kalabilir
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+    with c2:
+        page = st.number_input(f"Sayfa (/{pages})", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+
+    page_df = load_page(engine, query, params, order_by, int(page), page_size, data_version)
+    first_row = (int(page) - 1) * page_size
+    st.caption(f"{first_row + 1 if total else 0:,}–{first_row + len(page_df):,} / {total:,} satır")
+    st.dataframe(page_df, width='stretch')
+
+    with c3:
+        fmt = st.radio("Dışa aktarım biçimi", EXPORT_FORMATS, horizontal=True, key=f"{key}_format", format_func=str.upper)
+        if st.button("Dışa aktarımı hazırla", key=f"{key}_prepare"):
+            # Yarıda kalmış oturumlardan kalan eski dosyalar her dışa aktarımda temizlenir
+            sweep_exports()
+            with st.spinner(f"{total:,} satır dışa aktarılıyor..."):
+                with get_dashboard_metrics().stage(f"export.{fmt}") as stage:
+                    path, rows, elapsed = export_query(engine, query, params, fmt=fmt)
+                    stage.rows = rows
+            # İndirme düğmesi sadece hazırlandığı çalıştırmada çizilir: dosya bir kez okunur ve
+            # hemen silinir; sayfa değiştirme gibi sonraki çalıştırmalar dosyayı tekrar belleğe almaz
+            mime = "text/csv" if fmt == 'csv' else "application/vnd.apache.parquet"
+            try:
+                with open(path, 'rb') as f:
+                    st.download_button(f"⬇ {file_name}.{fmt} ({rows:,} satır)", data=f,
+                                       file_name=f"{file_name}.{fmt}", mime=mime, key=f"{key}_download")
+            finally:
+                os.remove(path)
+
 # ----------------- STREAMLIT ANA PANEL KODU -----------------
 
 st.set_page_config(layout="wide")
@@ -184,17 +473,42 @@ st.markdown(
 try:
     # 1. MOTORU KURMA (Tüm KPI'lar için ilk adım)
     engine = get_db_engine()
-    predictions_df = load_predictions(engine)
+
+    # Manuel yenileme: tüm veri önbelleklerini temizler (motor ve bağlantı havuzu korunur)
+    if st.sidebar.button("🔄 Verileri Yenile"):
+        st.cache_data.clear()
+        get_chat_cache().clear()
+        get_sales_snapshot().expire()
+
+    use_snapshot = st.sidebar.toggle("⚡ Bellek içi analitik", value=True, help="Ciro ve en çok satan ürün sorgularını bellek içi sütunsal kopyadan cevaplar.")
+
+    # 2. VERİ SÜRÜMLERİ VE ANLIK GÖRÜNTÜ (paralel): sonraki önbelleklerin anahtarları
+    versions = load_concurrently(
+        latest_run_time=(get_latest_run_time, engine),
+        inventory_version=(get_inventory_version, engine),
+        **({'snapshot': (load_sales_snapshot, engine)} if use_snapshot else {}),
+    )
+    latest_run_time = versions['latest_run_time']
+    inventory_version = versions['inventory_version']
+    sales_snapshot, snapshot_error = versions.get('snapshot', (None, None))
+    if snapshot_error is not None:
+        st.sidebar.warning(f"Bellek içi analitik motoru güncellenemedi: {snapshot_error}")
+
+    # 3. ŞUBE VERİLERİ (paralel): şube seçimi bir önceki çalıştırmadan (widget durumu) bilinir,
+    # böylece tahminler ile şube sorguları seçim kutusu çizilmeden aynı anda başlatılır
+    def branch_id_of(branch_label):
+        return 0 if branch_label == 'Genel Toplam' else int(branch_label.split(' ')[1])
+
+    requested_branch_id = branch_id_of(st.session_state.get('selected_branch', 'Genel Toplam'))
+    requested_section = st.session_state.get('active_section', SECTIONS[0])
+    page_data = load_branch_data(engine, requested_branch_id, latest_run_time, inventory_version, requested_section)
+    predictions_df = page_data['predictions']
     
     
     # KRİTİK ADIM: ŞUBE SEÇİMİ VE FİLTRELEME (EN ÜSTE TAŞINDI!)
     branch_options = ['Genel Toplam'] + [f'Şube {i}' for i in predictions_df['branch_id'].unique() if i != 0]
-    selected_branch = st.selectbox("Hangi Şubeyi Görmek İstersiniz?", branch_options)
-    
-    if selected_branch == 'Genel Toplam':
-        selected_branch_id = 0
-    else:
-        selected_branch_id = int(selected_branch.split(' ')[1])
+    selected_branch = st.selectbox("Hangi Şubeyi Görmek İstersiniz?", branch_options, key='selected_branch')
+    selected_branch_id = branch_id_of(selected_branch)
     
     # Şube rozetini gösterelim
     badge = "Genel Toplam" if selected_branch_id == 0 else f"Şube {selected_branch_id}"
@@ -212,104 +526,6 @@ try:
     st.header("💬 Soru Sor (Beta) – Şube Bağlamlı Chatbot")
     st.caption("Örnek: son 7 günde en çok satan 5 ürün · son 30 günde toplam ciro · kritik stoklar · tahmin ortalaması")
 
-    def parse_user_query(text: str):
-        """Anahtar kelimelere göre sınırlı şablon seçer."""
-        t = text.lower()
-
-        # Varsayılan zaman penceresi: 7 gün
-        days = 7
-        m = re.search(r"(\d+)\s*gün", t)
-        if m:
-            days = min(max(int(m.group(1)), 1), 90)  # 1-90 arası sınırla
-        if "30" in t and "gün" in t:
-            days = 30
-        if "hafta" in t and "son" in t:
-            days = 7
-
-        if any(k in t for k in ["en çok satan", "ilk 5", "top 5", "top5"]):
-            return {"intent": "top_products", "days": days, "limit": 5}
-        if any(k in t for k in ["ciro", "toplam satış", "toplam ciro", "gelir"]):
-            return {"intent": "total_revenue", "days": days}
-        if any(k in t for k in ["stok", "reorder", "kritik"]):
-            return {"intent": "low_stock"}
-        if any(k in t for k in ["tahmin", "forecast", "öngörü"]):
-            return {"intent": "forecast_summary"}
-
-        return None
-
-    def run_chat_query(engine, intent_info, branch_id):
-        """Seçili niyete göre güvenli şablonlu sorgu çalıştırır."""
-        intent = intent_info["intent"]
-        days = intent_info.get("days", 7)
-        limit = intent_info.get("limit", 5)
-
-        branch_filter = ""
-        if branch_id and branch_id != 0:
-            branch_filter = f"AND branch_id = {branch_id}"
-
-        if intent == "top_products":
-            sql = f"""
-            SELECT p.product_name,
-                   SUM(s.quantity) AS adet,
-                   SUM(s.total_sale_amount) AS ciro
-            FROM sales s
-            JOIN products p ON p.product_id = s.product_id
-            WHERE s.sale_datetime >= NOW() - INTERVAL '{days} days'
-            {branch_filter}
-            GROUP BY p.product_name
-            ORDER BY adet DESC
-            LIMIT {limit};
-            """
-            df = pd.read_sql(sql, engine)
-            summary = f"Son {days} günde en çok satan ilk {limit} ürün."
-            return df, summary
-
-        if intent == "total_revenue":
-            sql = f"""
-            SELECT
-                SUM(total_sale_amount) AS toplam_ciro,
-                SUM(quantity) AS toplam_adet,
-                COUNT(*) AS islem_sayisi
-            FROM sales
-            WHERE sale_datetime >= NOW() - INTERVAL '{days} days'
-            {branch_filter};
-            """
-            df = pd.read_sql(sql, engine)
-            summary = f"Son {days} günde toplam ciro ve adet özeti."
-            return df, summary
-
-        if intent == "low_stock":
-            sql = f"""
-            SELECT p.product_name,
-                   bi.current_stock_level,
-                   bi.reorder_point
-            FROM branch_inventory bi
-            JOIN products p ON p.product_id = bi.product_id
-            WHERE bi.current_stock_level < bi.reorder_point
-            {branch_filter}
-            ORDER BY bi.current_stock_level ASC
-            LIMIT 20;
-            """
-            df = pd.read_sql(sql, engine)
-            summary = "Reorder noktası altında kritik stoklar."
-            return df, summary
-
-        if intent == "forecast_summary":
-            sql = f"""
-            SELECT
-                AVG(predicted_sales) AS ortalama_tahmin,
-                MIN(prediction_date) AS baslangic,
-                MAX(prediction_date) AS bitis
-            FROM prediction_results
-            WHERE prediction_run_time = (SELECT MAX(prediction_run_time) FROM prediction_results)
-            {branch_filter};
-            """
-            df = pd.read_sql(sql, engine)
-            summary = "Son tahmin çalışmasından özet."
-            return df, summary
-
-        return None, "Bu sorgu için şablon yok."
-
     # Chat input state
     if "chat_query" not in st.session_state:
         st.session_state.chat_query = ""
@@ -328,9 +544,27 @@ try:
             st.warning("Bu soruyu anlayamadım. Örnek: 'son 7 günde en çok satan 5 ürün', 'son 30 günde toplam ciro'.")
         else:
             try:
-                result_df, summary = run_chat_query(engine, parsed, selected_branch_id)
+                # Aynı soru, veri değişmediyse (filigran aynıysa) önbellekten cevaplanır
+                chat_cache = get_chat_cache()
+                cache_key = intent_key(parsed, selected_branch_id)
+                watermark = read_watermark(engine, parsed, selected_branch_id)
+                cached = chat_cache.get(cache_key, watermark)
+                if cached is not None:
+                    result_df, summary = cached
+                else:
+                    with get_dashboard_metrics().stage(f"chat.{parsed['intent']}", branch_id=selected_branch_id) as stage:
+                        result_df, summary = run_chat_query(engine, parsed, selected_branch_id, snapshot=sales_snapshot)
+                        stage.rows = len(result_df) if result_df is not None else None
+                    chat_cache.put(cache_key, watermark, result_df, summary)
                 st.success(summary)
                 st.dataframe(result_df, width='stretch')
+
+                stats = chat_cache.stats()
+                st.caption(
+                    f"{'⚡ Önbellekten' if cached is not None else '🗄️ Veritabanından'} · "
+                    f"İsabet: {stats['hits']} · Iska: {stats['misses']} · Oran: {stats['hit_rate']:.0%} · "
+                    f"Kayıt: {stats['entries']} ({stats['bytes'] / 1024:,.1f} KB) · Atılan: {stats['evictions']}"
+                )
             except Exception as e:
                 st.error(f"Sorgu çalıştırılırken hata oluştu: {e}")
                 st.info("Veritabanı bağlantısı açık ve erişilebilir mi? Port/kimlik bilgilerini kontrol edin.")
@@ -338,74 +572,86 @@ try:
 
     st.divider()
 
-    # Ortak veri hazırlıkları
-    stock_df, low_stock_count = load_stock_data(engine, branch_id=selected_branch_id)
-    predicted_sales_sum = filtered_df['predicted_sales'].sum()
-    avg_sales, avg_cost, total_employees = load_employee_metrics(engine, branch_id=selected_branch_id)
-    optimization_result = generate_optimization_recommendation(filtered_df)
+    # Bölüm seçimi: st.tabs tüm sekmelerin gövdesini her çalıştırmada hesaplar; burada sadece seçili bölüm çalışır
+    active_section = st.radio("Bölüm", SECTIONS, horizontal=True, key='active_section', label_visibility='collapsed')
+    if selected_branch_id != requested_branch_id or active_section != requested_section:
+        # Önceki şube seçimi artık listede yoksa seçim kutusu varsayılana döner; veriler ona göre yeniden yüklenir
+        page_data = load_branch_data(engine, selected_branch_id, latest_run_time, inventory_version, active_section)
 
-    tabs = st.tabs(["Genel Bakış", "Stok & Sipariş", "Personel", "Tahmin"])
+    predicted_sales_sum = filtered_df['predicted_sales'].sum()
 
     # --- GENEL BAKIŞ ---
-    with tabs[0]:
+    if active_section == "Genel Bakış":
+        total_stock_value, low_stock_count = page_data['stock']
         st.subheader("Genel Bakış")
         o1, o2, o3 = st.columns(3)
         with o1:
-            st.metric("Toplam Stok Değeri", f"₺ {stock_df['total_stock_value'].sum():,.2f}")
+            st.metric("Toplam Stok Değeri", f"₺ {total_stock_value:,.2f}")
         with o2:
             st.metric("Kritik Stok Ürün", f"{low_stock_count} adet")
         with o3:
             st.metric("7 Günlük Tahmin Toplamı", f"₺ {predicted_sales_sum:,.0f}")
 
+        if sales_snapshot is not None and len(sales_snapshot):
+            kpis = sales_snapshot.kpis(selected_branch_id, days=7)
+            change = (kpis['revenue'] / kpis['previous_revenue'] - 1) if kpis['previous_revenue'] else None
+            s1, s2, s3 = st.columns(3)
+            with s1:
+                st.metric("Son 7 Gün Ciro", f"₺ {kpis['revenue']:,.0f}", delta=f"{change:+.1%}" if change is not None else None)
+            with s2:
+                st.metric("Son 7 Gün Satılan Adet", f"{kpis['quantity']:,}")
+            with s3:
+                st.metric("Son 7 Gün İşlem Sayısı", f"{kpis['transactions']:,}")
+
     # --- STOK & SİPARİŞ ---
-    with tabs[1]:
+    elif active_section == "Stok & Sipariş":
+        total_stock_value, low_stock_count = page_data['stock']
         st.header(f"{selected_branch} Stok Yönetimi KPI'ları")
         k1, k2, k3 = st.columns(3)
         
         with k1:
-            st.metric("Toplam Stok Değeri", f"₺ {stock_df['total_stock_value'].sum():,.2f}")
+            st.metric("Toplam Stok Değeri", f"₺ {total_stock_value:,.2f}")
         with k2:
             st.metric("Kritik Stok Uyarısı", f"{low_stock_count} Ürün", 
                     delta=f"Son 24 Saatte {random.randint(0, 5)} yeni uyarı", delta_color="inverse")
         with k3:
-            wastage_cost = stock_df['total_stock_value'].sum() * 0.005
+            wastage_cost = total_stock_value * 0.005
             st.metric("Tahmini Fire Maliyeti (Günlük)", f"₺ {wastage_cost:,.2f}")
 
-        st.markdown("**Stok Listesi (CSV indirilebilir):**")
-        st.download_button("⬇ Stok CSV", data=stock_df.to_csv(index=False).encode("utf-8"), file_name="stok.csv", mime="text/csv")
-        st.dataframe(stock_df, use_container_width=True)
+        st.markdown("**Stok Listesi (CSV / Parquet indirilebilir):**")
+        stock_query, stock_params = stock_list_query(selected_branch_id)
+        show_paginated_table(engine, 'stock', stock_query, stock_params, STOCK_ORDER_BY, inventory_version, file_name="stok")
 
         st.divider()
         st.header("Sipariş Önerisi")
         st.subheader(f"{selected_branch} İçin Gelecek 7 Günlük Tahmine Göre İhtiyaç Analizi")
 
         if low_stock_count > 0:
-            critical_products = stock_df[stock_df['current_stock_level'] < stock_df['reorder_point']].sort_values('current_stock_level').head(3)
             st.markdown("**KRİTİK SİPARİŞ LİSTESİ (Reorder Point Altındakiler):**")
+            product_demand = load_product_demand(engine, branch_id=selected_branch_id, data_version=latest_run_time)
+            critical_products, critical_csv = critical_order_list(
+                page_data['critical_stock'], product_demand, predicted_sales_sum, selected_branch_id, inventory_version, latest_run_time
+            )
             
             for index, row in critical_products.iterrows():
-                p_name = row['product_name']
-                p_stock = row['current_stock_level']
-                p_reorder = row['reorder_point']
-                weekly_demand_forecast = int(predicted_sales_sum * 0.00000005 * 7 * random.uniform(0.9, 1.1)) 
-                order_amount = max(0, (p_reorder - p_stock) + weekly_demand_forecast)
-                
                 col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
                 with col1:
-                    st.write(f"**{p_name}**")
+                    st.write(f"**{row['product_name']}**")
                 with col2:
-                    st.metric("Mevcut Stok", f"{p_stock} adet")
+                    st.metric("Mevcut Stok", f"{row['current_stock_level']} adet")
                 with col3:
-                    st.metric("Talep Tahmini (7 Gün)", f"{weekly_demand_forecast} adet")
+                    st.metric("Talep Tahmini (7 Gün)", f"{row['weekly_demand_forecast']} adet")
                 with col4:
-                    st.metric("SİPARİŞ ÖNERİSİ", f"{order_amount} adet", delta="ACİL", delta_color="inverse")
+                    st.metric("SİPARİŞ ÖNERİSİ", f"{row['order_amount']} adet", delta="ACİL", delta_color="inverse")
             st.warning("⚠️ Siparişler, AI talep tahminiyle desteklenmiştir.")
-            st.download_button("⬇ Kritik Stok CSV", data=critical_products.to_csv(index=False).encode("utf-8"), file_name="kritik_stok.csv", mime="text/csv")
+            st.download_button("⬇ Kritik Stok CSV", data=critical_csv, file_name="kritik_stok.csv", mime="text/csv")
         else:
             st.success("Tebrikler! Şu anda kritik stok seviyesinin altında ürün bulunmamaktadır.")
 
     # --- PERSONEL ---
-    with tabs[2]:
+    elif active_section == "Personel":
+        avg_sales, avg_cost, total_employees = page_data['employees']
+        staffing_plan_df = page_data['staffing_plan']
         st.header("Çalışan Performans")
         col1, col2, col3 = st.columns(3)
         with col1:
@@ -415,69 +661,96 @@ try:
         with col3:
             st.metric("Tahmini Aylık Personel Maliyeti", f"₺ {avg_cost:,.0f}")
 
+        st.divider()
+        st.subheader(f"{selected_branch} İçin Vardiya Bazlı Personel Planı (7 Gün)")
+        if staffing_plan_df.empty:
+            st.info("Personel planı bulunamadı. `python staffing_engine.py` (veya prediction_engine.py) çalıştırılmalı.")
+        else:
+            st.plotly_chart(staffing_plan_figure(staffing_plan_df, selected_branch_id, latest_run_time), use_container_width=True)
+            st.dataframe(
+                staffing_plan_df[['plan_date', 'shift', 'required_staff', 'current_staff', 'expected_sales', 'peak_hour_sales']],
+                use_container_width=True,
+            )
+
     # --- TAHMİN ---
-    with tabs[3]:
+    elif active_section == "Tahmin":
+        optimization_result = generate_optimization_recommendation(page_data['staffing_plan'])
         st.header("Gelecek 7 Gün İçin Öneriler")
         col_opt1, col_opt2 = st.columns([1, 2])
 
-        with col_opt1:
-            st.metric(optimization_result["title"], 
-                    f"{optimization_result['needed']} Personel", 
-                    delta=f"Bugüne göre +{optimization_result['increase']} Kişi", 
-                    delta_color="normal")
-
-        with col_opt2:
-            max_date = filtered_df['prediction_date'].max()
-            st.info(
-                f"**AI Analizi:** En yoğun talep gününde ({max_date.strftime('%d %b %Y')}), {optimization_result['needed']} personele çıkılması önerilmektedir. "
-                f"Amaç: Çalışan verimliliğini saatte ₺{optimization_result['efficiency_target']} satış seviyesinin üzerinde tutmaktır."
-            )
+        if optimization_result is None:
+            st.info("Personel önerisi için vardiya planı bulunamadı (staffing_engine.py).")
+        else:
+            with col_opt1:
+                increase = optimization_result['increase']
+                st.metric(optimization_result["title"], 
+                        f"{optimization_result['needed']} Personel", 
+                        delta=f"Mevcut kadroya göre {increase:+d} Kişi" if increase is not None else None, 
+                        delta_color="normal")
+
+            with col_opt2:
+                peak_date = optimization_result['peak_date']
+                st.info(
+                    f"**AI Analizi:** En yoğun talep gününde ({peak_date.strftime('%d %b %Y')}), vardiyalarda toplam {optimization_result['needed']} personel önerilmektedir. "
+                    f"Amaç: Çalışan verimliliğini saatte ₺{optimization_result['efficiency_target']:,.0f} satış seviyesinin üzerinde tutmaktır."
+                )
 
         st.divider()
         st.header(f"{selected_branch} İçin 7 Günlük Tahmin")
-        
-        fig = px.line(
-            filtered_df,
-            x='prediction_date',
-            y='predicted_sales',
-            title=f'{selected_branch} Satış Tahmini (₺)',
-            labels={'predicted_sales': 'Tahmin Edilen Satış (₺)', 'prediction_date': 'Tarih'},
-            template="plotly_dark",
-            color_discrete_sequence=["#22d3ee"]
-        )
-        
-        fig.add_scatter(x=filtered_df['prediction_date'], y=filtered_df['upper_bound'], fill=None, mode='lines', line_color='lightgrey', name='Üst Sınır')
-        fig.add_scatter(x=filtered_df['prediction_date'], y=filtered_df['lower_bound'], fill='tonexty', mode='lines', line_color='lightgrey', name='Alt Sınır')
-        fig.update_layout(
-            showlegend=True,
-            paper_bgcolor="rgba(0,0,0,0)",
-            plot_bgcolor="rgba(0,0,0,0)",
-            font_color="#e2e8f0",
-            margin=dict(l=20, r=20, t=60, b=20),
-            xaxis=dict(gridcolor="#1f2937"),
-            yaxis=dict(gridcolor="#1f2937"),
-        )
-
-        st.plotly_chart(fig, width='stretch')
-
-        st.subheader("Tahmin Detayları (Raw Data)")
-        turkish_df = filtered_df[[
-        'prediction_date', 
-        'predicted_sales', 
-        'lower_bound', 
-        'upper_bound', 
-        'prediction_run_time'
-        ]].copy()
-
-        turkish_df.columns = [
-        'Tahmin Tarihi', 
-        'Tahmin Edilen Satış', 
-        'Alt Güven Sınırı', 
-        'Üst Güven Sınırı', 
-        'Çalışma Zamanı'
-        ]
-        st.download_button("⬇ Tahmin CSV", data=turkish_df.to_csv(index=False).encode("utf-8"), file_name="tahmin.csv", mime="text/csv")
-        st.dataframe(turkish_df, width='stretch')
+        carried_from = filtered_df['carried_from'].dropna() if 'carried_from' in filtered_df else pd.Series(dtype='datetime64[ns]')
+        if not carried_from.empty:
+            # Bu çalışmada yeniden eğitilemeyen şube: önceki çalışmanın tahmini gösterilir
+            st.warning(f"Bu tahmin son çalışmada yenilenemedi; {pd.Timestamp(carried_from.max()):%d.%m.%Y %H:%M} çalışmasından taşındı.")
+        st.plotly_chart(forecast_figure(filtered_df, selected_branch, selected_branch_id, latest_run_time), width='stretch')
+
+        st.subheader("Tahmin Geçmişi (Raw Data)")
+        st.caption("En son tahmin çalışması ilk sayfadadır; önceki çalışmalar sonraki sayfalardadır.")
+        history_query, history_params = forecast_history_query(selected_branch_id)
+        show_paginated_table(engine, 'forecast_history', history_query, history_params, FORECAST_HISTORY_ORDER_BY, latest_run_time, file_name="tahmin")
+
+    # --- PERFORMANS ---
+    elif active_section == "Performans":
+        st.header("Performans")
+        runs_df, stages_df, latency_df = load_run_metrics(engine)
+
+        st.subheader("Tahmin Çalışması Süreleri")
+        if runs_df.empty:
+            st.info("Henüz ölçüm kaydı olan bir tahmin çalışması yok (prediction_engine.py çalıştırın).")
+        else:
+            fig_runs = px.line(
+                runs_df, x='run_time', y='seconds', markers=True,
+                labels={'run_time': 'Çalışma Zamanı', 'seconds': 'Toplam Süre (sn)'},
+                template="plotly_dark", color_discrete_sequence=["#22d3ee"],
+            )
+            st.plotly_chart(fig_runs, width='stretch')
+
+        if not stages_df.empty:
+            st.markdown("**Son çalışmanın aşamaları:**")
+            stage_totals = stages_df[stages_df['stage'] != 'total'].groupby('stage', as_index=False)['seconds'].sum()
+            fig_stages = px.bar(
+                stage_totals, x='stage', y='seconds',
+                labels={'stage': 'Aşama', 'seconds': 'Süre (sn)'},
+                template="plotly_dark", color_discrete_sequence=["#a78bfa"],
+            )
+            st.plotly_chart(fig_stages, width='stretch')
+            st.dataframe(stages_df, width='stretch')
+
+        st.subheader("Dashboard Sorgu Gecikmeleri")
+        if latency_df.empty:
+            st.info("Henüz dashboard sorgu ölçümü kaydedilmedi (ölçümler yaklaşık dakikada bir yazılır).")
+        else:
+            fig_latency = px.scatter(
+                latency_df, x='recorded_at', y='ms', color='stage',
+                labels={'recorded_at': 'Zaman', 'ms': 'Gecikme (ms)', 'stage': 'Sorgu'},
+                template="plotly_dark",
+            )
+            st.plotly_chart(fig_latency, width='stretch')
+            latency_summary = latency_df.groupby('stage')['ms'].describe(percentiles=[0.5, 0.95])[['count', '50%', '95%', 'max']]
+            latency_summary.columns = ['Adet', 'p50 (ms)', 'p95 (ms)', 'En Fazla (ms)']
+            st.dataframe(latency_summary.round(1), width='stretch')
+
+    # Toplanan sorgu gecikmeleri periyodik olarak kaydedilir
+    get_dashboard_metrics().flush_if_due(engine)
 
 except Exception as e:
     st.error(f"Veritabanı bağlantı hatası veya veri yükleme hatası oluştu: {e}")
@@ -0,0 +1,95 @@
+"""
+Dashboard'un veritabanı sorguları:
+- Streamlit'e bağımlı değildir; `dashboard.py` ve `schema.py --explain` aynı sorguları buradan kullanır
+- Sorgu üreten fonksiyonlar (sorgu, parametreler) döndürür; sayfalı tablolar ve dışa aktarım için
+  sorgular psycopg2 parametre biçimindedir (`%(isim)s`, bkz. result_tables.py)
+"""
+
+# En son tahmin çalışmasının zamanı; diğer önbelleklerin veri sürümü olarak kullanılır
+LATEST_RUN_SQL = "SELECT MAX(prediction_run_time) FROM prediction_results"
+
+# Tek bir tahmin çalışmasının tüm satırları
+PREDICTIONS_SQL = """
+SELECT * FROM prediction_results
+WHERE prediction_run_time = :run_time
+ORDER BY branch_id, prediction_date
+"""
+
+INVENTORY_VERSION_SQL = "SELECT last_sale_id FROM inventory_watermark WHERE id = 1"
+
+STOCK_ORDER_BY = 'product_id, reorder_point'
+FORECAST_HISTORY_ORDER_BY = '"Çalışma Zamanı" DESC, "Tahmin Tarihi"'
+
+
+def stock_list_query(branch_id=None):
+    """Branch Inventory ve Products tablolarından şube bazlı stok listesinin sorgusu; (sorgu, parametreler) döner.
+
+    Liste uygulamaya bütün olarak çekilmez: özetler, kritik ürünler, sayfalar ve dışa aktarımlar
+    bu sorgu üzerinden veritabanında hesaplanır.
+    """
+    if branch_id and branch_id != 0:
+        # Tek bir şube seçildiğinde
+        query = """
+        SELECT
+            p.product_id,
+            p.product_name,
+            bi.current_stock_level,
+            bi.reorder_point,
+            p.unit_cost,
+            bi.current_stock_level * p.unit_cost AS total_stock_value
+        FROM branch_inventory bi
+        JOIN products p ON bi.product_id = p.product_id
+        WHERE bi.branch_id = %(branch_id)s
+        """
+        return query, {'branch_id': int(branch_id)}
+
+    # Genel Toplam seçildiğinde (Tüm şubeleri topla)
+    query = """
+    SELECT
+        p.product_id,
+        p.product_name,
+        SUM(bi.current_stock_level) as current_stock_level,
+        bi.reorder_point,
+        p.unit_cost,
+        SUM(bi.current_stock_level) * p.unit_cost AS total_stock_value
+    FROM branch_inventory bi
+    JOIN products p ON bi.product_id = p.product_id
+    GROUP BY p.product_id, p.product_name, p.unit_cost, bi.reorder_point
+    """
+    return query, {}
+
+
+def stock_summary_query(branch_id=None):
+    """Toplam stok değeri ve kritik ürün sayısı; SQLAlchemy `text()` için (sorgu, parametreler) döner."""
+    query, params = stock_list_query(branch_id)
+    return f"""
+        SELECT COALESCE(SUM(total_stock_value), 0) AS total_stock_value,
+               COUNT(*) FILTER (WHERE current_stock_level < reorder_point) AS low_stock_count
+        FROM ({query.replace('%(branch_id)s', ':branch_id')}) stock
+    """, params
+
+
+def critical_stock_query(branch_id=None, limit=3):
+    """Reorder point altındaki en düşük stoklu `limit` ürün; SQLAlchemy `text()` için (sorgu, parametreler) döner."""
+    query, params = stock_list_query(branch_id)
+    return f"""
+        SELECT * FROM ({query.replace('%(branch_id)s', ':branch_id')}) stock
+        WHERE current_stock_level < reorder_point
+        ORDER BY current_stock_level
+        LIMIT {int(limit)}
+    """, params
+
+
+def forecast_history_query(branch_id):
+    """Şubenin tüm tahmin çalışmalarının geçmişi (Türkçe sütun adlarıyla); (sorgu, parametreler) döner."""
+    query = """
+    SELECT
+        prediction_date AS "Tahmin Tarihi",
+        predicted_sales AS "Tahmin Edilen Satış",
+        lower_bound AS "Alt Güven Sınırı",
+        upper_bound AS "Üst Güven Sınırı",
+        prediction_run_time AS "Çalışma Zamanı"
+    FROM prediction_results
+    WHERE branch_id = %(branch_id)s
+    """
+    return query, {'branch_id': int(branch_id or 0)}
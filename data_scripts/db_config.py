@@ -0,0 +1,91 @@
+"""
+Tüm scriptlerin ortak kullandığı veritabanı motoru (engine) fabrikası:
+- Bağlantı bilgileri ve havuz ayarları ortam değişkenlerinden veya bir INI dosyasından okunur
+- Öncelik: ortam değişkeni > yapılandırma dosyası ([database] bölümü) > varsayılan değer
+- `statement_timeout` ve `application_name` her bağlantıya uygulanır
+
+Örnek `db_config.ini` (yolu `DB_CONFIG_FILE` ile değiştirilebilir):
+
+    [database]
+    host = localhost
+    password = ...
+    pool_size = 10
+    statement_timeout_ms = 30000
+"""
+
+import configparser
+import os
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import URL
+
+DEFAULT_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db_config.ini')
+
+# ayar adı -> (ortam değişkeni, varsayılan değer)
+SETTINGS = {
+    'host': ('DB_HOST', 'localhost'),
+    'port': ('DB_PORT', '5432'),
+    'name': ('DB_NAME', 'postgres'),
+    'user': ('DB_USER', 'postgres'),
+    'password': ('DB_PASS', 'Sudem12345'),
+    'pool_size': ('DB_POOL_SIZE', '5'),
+    'max_overflow': ('DB_MAX_OVERFLOW', '10'),
+    'pool_pre_ping': ('DB_POOL_PRE_PING', 'true'),
+    'pool_recycle': ('DB_POOL_RECYCLE', '1800'),
+    'statement_timeout_ms': ('DB_STATEMENT_TIMEOUT_MS', '0'),
+    'application_name': ('DB_APPLICATION_NAME', 'smart-branch-ai'),
+}
+
+
+def load_db_settings(config_file=None):
+    """Ayarları ortam değişkenleri, yapılandırma dosyası ve varsayılanlardan birleştirir."""
+    config_file = config_file or os.environ.get('DB_CONFIG_FILE', DEFAULT_CONFIG_FILE)
+    file_settings = {}
+    if os.path.exists(config_file):
+        parser = configparser.ConfigParser()
+        parser.read(config_file, encoding='utf-8')
+        if parser.has_section('database'):
+            file_settings = dict(parser.items('database'))
+
+    settings = {}
+    for key, (env_var, default) in SETTINGS.items():
+        settings[key] = os.environ.get(env_var, file_settings.get(key, default))
+
+    for key in ('pool_size', 'max_overflow', 'pool_recycle', 'statement_timeout_ms'):
+        settings[key] = int(settings[key])
+    settings['pool_pre_ping'] = str(settings['pool_pre_ping']).lower() in ('1', 'true', 'yes', 'on')
+    return settings
+
+
+def get_engine(application_name=None, **overrides):
+    """Ayarlara göre SQLAlchemy motoru oluşturur.
+
+    `application_name` verilirse bağlantılar `pg_stat_activity` içinde bu adla görünür;
+    `overrides` ile tek bir ayar (örn. `pool_size=1`) o motor için değiştirilebilir.
+    """
+    settings = load_db_settings()
+    settings.update(overrides)
+    if application_name:
+        settings['application_name'] = f"{settings['application_name']}:{application_name}"
+
+    connect_args = {'application_name': settings['application_name']}
+    if settings['statement_timeout_ms'] > 0:
+        connect_args['options'] = f"-c statement_timeout={settings['statement_timeout_ms']}"
+
+    # URL.create alanları kendisi kaçışlar; parolada '@', ':', '/' gibi karakterler olabilir
+    engine_url = URL.create(
+        'postgresql+psycopg2',
+        username=settings['user'],
+        password=settings['password'],
+        host=settings['host'],
+        port=int(settings['port']),
+        database=settings['name'],
+    )
+    return create_engine(
+        engine_url,
+        pool_size=settings['pool_size'],
+        max_overflow=settings['max_overflow'],
+        pool_pre_ping=settings['pool_pre_ping'],
+        pool_recycle=settings['pool_recycle'],
+        connect_args=connect_args,
+    )
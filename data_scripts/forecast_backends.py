@@ -0,0 +1,253 @@
+"""
+Tahmin motoru için değiştirilebilir model arka uçları (backend):
+- `prophet`: Her seri için ayrı Prophet modeli (isteğe bağlı model önbelleği ile)
+- `fourier_ridge`: Tüm serileri tek matris işlemiyle çözen NumPy tabanlı hızlı model
+  (trend + haftalık/yıllık Fourier terimleri üzerinde ridge regresyon)
+
+Her arka uç `forecast(series_by_id, periods)` ile {seri_id: tahmin DataFrame'i} döndürür;
+tahminler `prediction_date`, `predicted_sales`, `lower_bound`, `upper_bound`, `branch_id` sütunlarına sahiptir.
+Her çağrının eğitim/tahmin süreleri `timings` listesinde aşama kaydı olarak birikir (bkz. run_metrics.py).
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from run_metrics import stage_record
+
+MIN_HISTORY_DAYS = 30
+
+# Prophet ayarları; önbellek anahtarının bir parçasıdır, değişirse modeller yeniden eğitilir
+PROPHET_CONFIG = {
+    'yearly_seasonality': True,
+    'weekly_seasonality': True,
+    'daily_seasonality': False,
+}
+
+# Prophet'in varsayılan %80 güven aralığına karşılık gelen normal dağılım katsayısı
+INTERVAL_Z = 1.2816
+
+
+def has_enough_history(df, series_id):
+    """Seride tahmin için yeterli gün yoksa uyarı yazdırır (Örn: yeni şubeler)."""
+    if len(df) < MIN_HISTORY_DAYS:
+        print(f"!!! Şube {series_id}: Tahmin için yeterli veri yok (Minimum {MIN_HISTORY_DAYS} gün gerekli).")
+        return False
+    return True
+
+
+class ForecastBackend:
+    """Arka uç arayüzü. `batched=True` olanlar tüm serileri tek çağrıda işler."""
+
+    name = None
+    batched = False
+
+    def forecast(self, series_by_id, periods=7):
+        raise NotImplementedError
+
+    def _record(self, stage, started, rows=None, branch_id=None):
+        self.timings.append(stage_record(stage, time.perf_counter() - started, rows=rows, branch_id=branch_id))
+
+
+class ProphetBackend(ForecastBackend):
+    """Her seri için ayrı Prophet modeli eğitir; `cache` (ModelCache) verilirse onu kullanır.
+
+    Seri değişmemişse eğitim atlanır, değişmişse önceki modelin parametreleriyle sıcak başlangıç yapılır.
+    """
+
+    name = 'prophet'
+
+    def __init__(self, config=PROPHET_CONFIG, cache=None):
+        self.config = config
+        self.cache = cache
+        self.timings = []
+
+    def forecast(self, series_by_id, periods=7):
+        return {series_id: self.forecast_one(df, series_id, periods) for series_id, df in series_by_id.items()}
+
+    def forecast_one(self, df, branch_id, periods=7):
+        # Prophet/Stan içe aktarımı yavaştır; sadece bu arka uç seçildiğinde yüklenir
+        from prophet import Prophet
+        from model_cache import series_fingerprint, warm_start_params
+
+        if not has_enough_history(df, branch_id):
+            return None
+
+        cache = self.cache
+        fingerprint = series_fingerprint(df, periods) if cache is not None else None
+        cached = cache.get(branch_id, self.config) if cache is not None else None
+
+        if cached is not None and cached['fingerprint'] == fingerprint:
+            print(f"-> Şube {branch_id}: Veri değişmemiş, önbellekteki model kullanılıyor.")
+            return cached['prediction']
+
+        print(f"-> Şube {branch_id}: Model eğitiliyor...")
+
+        started = time.perf_counter()
+        model = Prophet(**self.config)
+
+        if cached is not None:
+            try:
+                model.fit(df, init=warm_start_params(cached['model']))
+            except Exception as e:
+                # Parametre boyutları uyuşmazsa (örn. değişen changepoint sayısı) sıfırdan eğitilir
+                print(f"-> Şube {branch_id}: Sıcak başlangıç kullanılamadı ({e}), sıfırdan eğitiliyor.")
+                model = Prophet(**self.config)
+                model.fit(df)
+        else:
+            model.fit(df)
+        self._record('fit', started, rows=len(df), branch_id=branch_id)
+
+        started = time.perf_counter()
+        future = model.make_future_dataframe(periods=periods)
+        forecast = model.predict(future)
+        self._record('predict', started, rows=len(future), branch_id=branch_id)
+
+        prediction = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods).copy()
+
+        # Sütun adlarını veritabanına uyarlıyoruz
+        prediction.rename(columns={'ds': 'prediction_date', 'yhat': 'predicted_sales', 'yhat_lower': 'lower_bound', 'yhat_upper': 'upper_bound'}, inplace=True)
+
+        # Hangi şube için tahmin yapıldığını ekliyoruz
+        prediction['branch_id'] = branch_id
+
+        if cache is not None:
+            cache.put(branch_id, self.config, fingerprint, model, prediction)
+
+        return prediction
+
+
+class FourierRidgeBackend(ForecastBackend):
+    """Trend + haftalık/yıllık Fourier terimleri üzerinde ridge regresyonu tüm serilere birlikte uygular.
+
+    Aynı tarih aralığını kapsayan seriler tek bir (gün x seri) matrisinde toplanır ve tek bir
+    `np.linalg.solve` çağrısıyla çözülür. Eksik günler 0 satış kabul edilir.
+
+    Ceza (`alpha`) gözlem sayısıyla ölçeklenmez ve sadece Fourier sütunlarına uygulanır; sabit ve
+    trend cezalandırılmaz. Sin/cos sütunlarında x'x ≈ n/2 olduğundan küçük bir `alpha` mevsimselliği
+    neredeyse hiç küçültmez, sadece kısa serilerde yıllık terimlerin sayısal kararlılığını sağlar.
+    """
+
+    name = 'fourier_ridge'
+    batched = True
+
+    def __init__(self, weekly_order=3, yearly_order=6, alpha=0.1):
+        self.weekly_order = weekly_order
+        self.yearly_order = yearly_order
+        self.alpha = alpha
+        self.timings = []
+
+    def _design_matrix(self, days, origin, span):
+        """Gün numaralarından (epoch'tan itibaren) [sabit, trend, sin/cos...] sütunlarını üretir."""
+        columns = [np.ones(len(days)), (days - origin) / span]
+        for period, order in ((7.0, self.weekly_order), (365.25, self.yearly_order)):
+            for k in range(1, order + 1):
+                angle = 2 * np.pi * k * days / period
+                columns.extend([np.sin(angle), np.cos(angle)])
+        return np.column_stack(columns)
+
+    def fit_predict_matrix(self, y, first_day, periods=7):
+        """(gün x seri) matrisini tek çözümle modeller; (periods x seri) tahmin ve seri başına artık std döndürür.
+
+        `y`'nin ilk satırı `first_day` (epoch'tan itibaren gün numarası) gününe karşılık gelir.
+        """
+        days = np.arange(first_day, first_day + y.shape[0])
+        span = max(len(days) - 1, 1)
+
+        x = self._design_matrix(days, first_day, span)
+        penalty = self.alpha * np.eye(x.shape[1])
+        penalty[:2, :2] = 0.0  # sabit ve trend cezalandırılmaz
+        coef = np.linalg.solve(x.T @ x + penalty, x.T @ y)
+
+        dof = max(len(days) - x.shape[1], 1)
+        sigma = np.sqrt(((y - x @ coef) ** 2).sum(axis=0) / dof)
+
+        future_days = np.arange(days[-1] + 1, days[-1] + periods + 1)
+        yhat = self._design_matrix(future_days, first_day, span) @ coef
+        return yhat, sigma
+
+    def _forecast_group(self, series_ids, frames, first_day, last_day, periods):
+        # (gün x seri) hedef matrisi
+        y = np.zeros((last_day - first_day + 1, len(series_ids)))
+        for j, df in enumerate(frames):
+            y[df['day'].to_numpy() - first_day, j] = df['y'].to_numpy(dtype=np.float64)
+
+        started = time.perf_counter()
+        yhat, sigma = self.fit_predict_matrix(y, first_day, periods)
+        self._record('fit_predict', started, rows=y.size)
+
+        future_days = np.arange(last_day + 1, last_day + periods + 1)
+        prediction_dates = pd.to_datetime(future_days.astype('datetime64[D]'))
+        results = {}
+        for j, series_id in enumerate(series_ids):
+            results[series_id] = pd.DataFrame({
+                'prediction_date': prediction_dates,
+                'predicted_sales': yhat[:, j],
+                'lower_bound': yhat[:, j] - INTERVAL_Z * sigma[j],
+                'upper_bound': yhat[:, j] + INTERVAL_Z * sigma[j],
+                'branch_id': series_id,
+            })
+        return results
+
+    def forecast(self, series_by_id, periods=7):
+        results = {}
+        groups = {}
+        for series_id, df in series_by_id.items():
+            if not has_enough_history(df, series_id):
+                results[series_id] = None
+                continue
+            day = pd.to_datetime(df['ds']).to_numpy().astype('datetime64[D]').astype(np.int64)
+            frame = pd.DataFrame({'day': day, 'y': df['y'].to_numpy()})
+            groups.setdefault((int(day.min()), int(day.max())), []).append((series_id, frame))
+
+        print(f"-> {sum(len(m) for m in groups.values())} seri {len(groups)} grup halinde toplu olarak tahmin ediliyor...")
+        for (first_day, last_day), members in groups.items():
+            series_ids = [series_id for series_id, _ in members]
+            frames = [frame for _, frame in members]
+            results.update(self._forecast_group(series_ids, frames, first_day, last_day, periods))
+        return results
+
+
+BACKENDS = {
+    ProphetBackend.name: ProphetBackend,
+    FourierRidgeBackend.name: FourierRidgeBackend,
+}
+
+
+def check_weekly_recovery(days=90, amplitude=200.0, level=1000.0, tolerance=0.03):
+    """Saf haftalık sinüs serisinin genliğinin `tolerance` içinde geri elde edildiğini doğrular.
+
+    Ridge cezasının mevsimsel katsayıları küçültmediğini kontrol eder; (başarılı mı, en büyük göreli hata) döner.
+    """
+    backend = FourierRidgeBackend()
+    first_day = int(np.datetime64('2024-01-01', 'D').astype(np.int64))
+    all_days = np.arange(first_day, first_day + days + 7)
+    truth = level + amplitude * np.sin(2 * np.pi * all_days / 7.0)
+
+    yhat, sigma = backend.fit_predict_matrix(truth[:days, None], first_day, periods=7)
+    error = float(np.max(np.abs(yhat[:, 0] - truth[days:])) / amplitude)
+    return error <= tolerance, error
+
+
+def get_backend(name, cache=None):
+    """İsme göre arka uç örneği oluşturur; model önbelleği sadece Prophet'e verilir."""
+    if name not in BACKENDS:
+        raise ValueError(f"Bilinmeyen tahmin arka ucu: {name}. Seçenekler: {', '.join(BACKENDS)}")
+    if name == ProphetBackend.name:
+        return ProphetBackend(cache=cache)
+    return BACKENDS[name]()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tahmin arka uçları için doğrulama kontrolleri.")
+    parser.add_argument('--check-weekly', action='store_true', help="fourier_ridge'in saf haftalık sinüsü doğru genlikle bulduğunu kontrol eder.")
+    parser.add_argument('--days', type=int, default=90, help="Kontrol serisinin gün sayısı.")
+    args = parser.parse_args()
+
+    if args.check_weekly:
+        ok, error = check_weekly_recovery(days=args.days)
+        print(f"-> Haftalık genlik kontrolü: {'BAŞARILI' if ok else 'BAŞARISIZ'} (en büyük göreli hata: {error:.2%})")
+        raise SystemExit(0 if ok else 1)
+    parser.print_help()
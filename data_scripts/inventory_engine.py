@@ -0,0 +1,223 @@
+"""
+Satış akışından şube stoklarını (`branch_inventory`) toplu olarak düşen envanter motoru:
+- `sale_id` üzerinde bir filigran (watermark) tutar; her çalışma sadece daha yeni satışları işler
+- Her parti (batch) satışları (branch_id, product_id) bazında toplar ve tek bir `UPDATE ... FROM`
+  ile uygular; satır satır güncelleme yapılmaz
+- Her parti kendi kısa transaction'ında çalışır; filigran satırı kilitlendiği için eş zamanlı iki
+  çalışma aynı satışları iki kez düşmez
+- İlk çalışmada (veya `--reset` ile) mevcut satışlar stoğa zaten yansımış sayılır ve filigran
+  en büyük `sale_id`'ye ayarlanır
+
+Eş zamanlı yazıcılar (paralel yükleyiciler, birden fazla kasa oturumu) `sale_id`'leri commit
+sırasından farklı bir sırayla görünür kılar: büyük id'li bir satış, küçük id'li bir satıştan önce
+commit edilebilir. Filigranın böyle bir satışın üzerinden atlamaması için her çalışma bir sınır
+(fence) belirler: o ana kadar dağıtılmış en büyük `sale_id` (sıra değeri dahil). Kısa bir bekleme
+sonrasında alınan anlık görüntünün (snapshot) `xmax` değeri kaydedilir ve
+`pg_snapshot_xmin(pg_current_snapshot())` bu değere ulaşana kadar, yani o sırada açık olan tüm
+transaction'lar bitene kadar beklenir. Bundan sonra sınıra kadar olan satışların hepsi kesinleşmiştir
+(commit veya rollback edilmiştir) ve filigran sadece sınıra kadar ilerletilir. Bekleme süresi
+dolarsa hiçbir şey uygulanmaz; satışlar bir sonraki çalışmada işlenir.
+
+Kullanım:
+    python inventory_engine.py                    # birikmiş yeni satışları uygular
+    python inventory_engine.py --follow --interval 5
+    python inventory_engine.py --settle-timeout 60  # uzun süren yüklemelerin bitmesini daha uzun bekler
+    python inventory_engine.py --reset            # filigranı en son satışa ayarlar (stok değişmez)
+"""
+
+import argparse
+import time
+
+from sqlalchemy import text
+
+from db_config import get_engine
+
+INVENTORY_WATERMARK_TABLE = 'inventory_watermark'
+DEFAULT_BATCH_SIZE = 50_000
+# Sınır okunduktan sonra, id almış ama henüz yazmaya başlamamış transaction'ların xid alması için bekleme
+FENCE_SETTLE_SECONDS = 1.0
+# Sınırdan önce başlamış transaction'ların bitmesi için en fazla bekleme
+DEFAULT_SETTLE_TIMEOUT = 30.0
+
+CREATE_INVENTORY_WATERMARK_SQL = f"""
+CREATE TABLE IF NOT EXISTS {INVENTORY_WATERMARK_TABLE} (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_sale_id BIGINT NOT NULL DEFAULT 0,
+    applied_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+
+# En büyük sale_id: her bölümün (sale_id, sale_datetime) birincil anahtar indeksinden okunur
+MAX_SALE_ID_SQL = "SELECT COALESCE(MAX(sale_id), 0) FROM sales;"
+
+# Sınır: görünen en büyük sale_id ile sıranın dağıttığı son değerin büyüğü (henüz commit edilmemiş id'ler dahil)
+FENCE_SQL = """
+SELECT GREATEST(
+    (SELECT COALESCE(MAX(sale_id), 0) FROM sales),
+    COALESCE(pg_sequence_last_value(pg_get_serial_sequence('sales', 'sale_id')::regclass), 0)
+);
+"""
+
+# Anlık görüntü sınırları: xmax'tan küçük xid'ler başlamış, xmin'den küçük xid'ler bitmiştir
+SNAPSHOT_XMAX_SQL = "SELECT pg_snapshot_xmax(pg_current_snapshot())::text;"
+SNAPSHOT_SETTLED_SQL = "SELECT pg_snapshot_xmin(pg_current_snapshot()) >= CAST(:xmax AS xid8);"
+
+# Partinin üst sınırı: filigrandan sonraki `batch_size`'ıncı satış, en fazla sınır kadar
+# (id boşlukları boş parti üretmez)
+NEXT_BATCH_HIGH_SQL = """
+SELECT MAX(sale_id) FROM (
+    SELECT sale_id FROM sales WHERE sale_id > :low AND sale_id <= :fence ORDER BY sale_id LIMIT :batch_size
+) next_batch;
+"""
+
+# (low, high] aralığındaki satışları şube x ürün bazında toplayıp stoktan tek UPDATE ile düşer;
+# işlenen satış sayısını ve güncellenen stok satırı sayısını döndürür
+APPLY_SQL = """
+WITH batch AS (
+    SELECT branch_id, product_id, SUM(quantity) AS sold, COUNT(*) AS sale_count
+    FROM sales
+    WHERE sale_id > :low AND sale_id <= :high
+    GROUP BY branch_id, product_id
+), applied AS (
+    UPDATE branch_inventory bi
+    SET current_stock_level = GREATEST(bi.current_stock_level - batch.sold, 0)
+    FROM batch
+    WHERE bi.branch_id = batch.branch_id AND bi.product_id = batch.product_id
+    RETURNING 1
+)
+SELECT COALESCE((SELECT SUM(sale_count) FROM batch), 0), (SELECT COUNT(*) FROM applied);
+"""
+
+
+def create_db_engine():
+    return get_engine(application_name='inventory_engine')
+
+
+def ensure_watermark_table(conn):
+    conn.execute(text(CREATE_INVENTORY_WATERMARK_SQL))
+
+
+def reset_inventory_watermark(engine):
+    """Filigranı mevcut en büyük `sale_id`'ye ayarlar: şimdiye kadarki satışlar stoğa yansımış sayılır."""
+    with engine.begin() as conn:
+        ensure_watermark_table(conn)
+        max_id = conn.execute(text(MAX_SALE_ID_SQL)).scalar()
+        conn.execute(text(f"""
+            INSERT INTO {INVENTORY_WATERMARK_TABLE} (id, last_sale_id) VALUES (1, :max_id)
+            ON CONFLICT (id) DO UPDATE SET last_sale_id = EXCLUDED.last_sale_id, applied_at = NOW();
+        """), {'max_id': max_id})
+    print(f"-> Envanter filigranı sale_id={max_id} olarak ayarlandı.")
+    return max_id
+
+
+def settled_fence(engine, settle_timeout=DEFAULT_SETTLE_TIMEOUT, after=None):
+    """Kesinleşmiş satışların üst sınırını döndürür: bu id'ye kadar commit edilmemiş satış kalmamıştır.
+
+    Sınırdan önce başlamış transaction'lar `settle_timeout` saniye içinde bitmezse None döner.
+    `after` (çağıranın filigranı) verilirse ve o zamandan beri yeni id dağıtılmamışsa beklemeden döner.
+    Satış tablosunu `sale_id` filigranıyla takip eden diğer okuyucular (sales_snapshot, parquet_store,
+    sales_rollup) da aynı sınırı kullanır.
+    """
+    with engine.connect() as conn:
+        fence = conn.execute(text(FENCE_SQL)).scalar()
+    if after is not None and fence <= after:
+        return fence
+    time.sleep(FENCE_SETTLE_SECONDS)
+
+    deadline = time.monotonic() + settle_timeout
+    with engine.connect() as conn:
+        xmax = conn.execute(text(SNAPSHOT_XMAX_SQL)).scalar()
+        conn.commit()
+        while True:
+            if conn.execute(text(SNAPSHOT_SETTLED_SQL), {'xmax': xmax}).scalar():
+                return fence
+            conn.commit()
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.5)
+
+
+def _apply_batch(engine, batch_size, fence):
+    """Tek bir partiyi kendi transaction'ında uygular; (işlenen satış, güncellenen satır, yeni filigran) döner.
+
+    Sadece `fence`'e kadar olan (kesinleşmiş) satışlar uygulanır; uygulanacak satış yoksa None döner.
+    """
+    with engine.begin() as conn:
+        low = conn.execute(text(f"SELECT last_sale_id FROM {INVENTORY_WATERMARK_TABLE} WHERE id = 1 FOR UPDATE;")).scalar()
+        high = conn.execute(text(NEXT_BATCH_HIGH_SQL), {'low': low, 'fence': fence, 'batch_size': batch_size}).scalar()
+        if high is None:
+            return None
+
+        sales_count, updated = conn.execute(text(APPLY_SQL), {'low': low, 'high': high}).one()
+        conn.execute(
+            text(f"UPDATE {INVENTORY_WATERMARK_TABLE} SET last_sale_id = :high, applied_at = NOW() WHERE id = 1;"),
+            {'high': high},
+        )
+    return int(sales_count), int(updated), high
+
+
+def apply_new_sales(engine, batch_size=DEFAULT_BATCH_SIZE, settle_timeout=DEFAULT_SETTLE_TIMEOUT):
+    """Filigrandan sonraki kesinleşmiş satışları partiler halinde stoktan düşer; işlenen satış sayısını döndürür.
+
+    Filigran hiç yoksa önce mevcut satışlara göre başlatılır (geçmiş satışlar düşülmez).
+    """
+    with engine.begin() as conn:
+        ensure_watermark_table(conn)
+        low = conn.execute(text(f"SELECT last_sale_id FROM {INVENTORY_WATERMARK_TABLE} WHERE id = 1;")).scalar()
+    if low is None:
+        reset_inventory_watermark(engine)
+        return 0
+
+    with engine.connect() as conn:
+        if conn.execute(text(FENCE_SQL)).scalar() <= low:
+            return 0
+    fence = settled_fence(engine, settle_timeout)
+    if fence is None:
+        print(f"-> Açık transaction'lar {settle_timeout:g} sn içinde bitmedi; yeni satışlar bir sonraki çalışmada uygulanacak.")
+        return 0
+
+    started = time.perf_counter()
+    total_sales = 0
+    total_updated = 0
+    batches = 0
+    high = None
+    while True:
+        result = _apply_batch(engine, batch_size, fence)
+        if result is None:
+            break
+        sales_count, updated, high = result
+        total_sales += sales_count
+        total_updated += updated
+        batches += 1
+
+    elapsed = time.perf_counter() - started
+    if batches:
+        rate = total_sales / elapsed if elapsed > 0 else float('inf')
+        print(f"-> Envanter güncellendi: {total_sales} satış, {total_updated} stok satırı, {batches} parti "
+              f"({elapsed:.2f} sn, {rate:,.0f} satış/sn, filigran: sale_id={high}).")
+    return total_sales
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yeni satışları şube stoklarından (branch_inventory) toplu olarak düşer.")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help="Bir partide (tek UPDATE) işlenecek en fazla satış sayısı.")
+    parser.add_argument('--follow', action='store_true', help="Sürekli çalışır; her aralıkta yeni satışları uygular.")
+    parser.add_argument('--interval', type=float, default=5.0, help="--follow modunda kontroller arası bekleme (sn).")
+    parser.add_argument('--settle-timeout', type=float, default=DEFAULT_SETTLE_TIMEOUT, help="Açık transaction'ların bitmesi için en fazla bekleme (sn).")
+    parser.add_argument('--reset', action='store_true', help="Filigranı en son satışa ayarlar; stok değiştirilmez.")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    if args.reset:
+        reset_inventory_watermark(engine)
+    elif args.follow:
+        print(f"-> Envanter motoru çalışıyor (her {args.interval:g} sn). Durdurmak için Ctrl+C.")
+        try:
+            while True:
+                apply_new_sales(engine, batch_size=args.batch_size, settle_timeout=args.settle_timeout)
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print("\n-> Envanter motoru durduruldu.")
+    else:
+        if not apply_new_sales(engine, batch_size=args.batch_size, settle_timeout=args.settle_timeout):
+            print("-> Stoktan düşülecek yeni satış yok.")
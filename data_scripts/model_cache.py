@@ -0,0 +1,124 @@
+"""
+Eğitilmiş Prophet modelleri için disk önbelleği:
+- Kayıtlar şube, model ayarları ve eğitim serisinin parmak izi (fingerprint) ile eşleştirilir
+- Seri değişmediyse model yeniden eğitilmez, kayıtlı tahmin doğrudan kullanılır
+- Seri değiştiyse önceki modelin parametreleriyle sıcak başlangıç (warm start) yapılır
+- Toplam boyut sınırı aşıldığında en uzun süredir kullanılmayan (LRU) kayıtlar silinir
+"""
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_cache')
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+
+def series_fingerprint(df, periods):
+    """Eğitim serisinin (ds, y) içeriğinden ve tahmin ufkundan kararlı bir özet üretir."""
+    hashed = pd.util.hash_pandas_object(df[['ds', 'y']], index=False).to_numpy()
+    digest = hashlib.sha256(hashed.tobytes())
+    digest.update(str(periods).encode())
+    return digest.hexdigest()
+
+
+def config_key(config):
+    """Model ayarlarını dosya adında kullanılabilecek kısa bir anahtara çevirir."""
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def warm_start_params(model):
+    """Eğitilmiş Prophet modelinden `fit(init=...)` için başlangıç parametrelerini çıkarır."""
+    params = {}
+    for name in ['k', 'm', 'sigma_obs']:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0][0]
+        else:
+            params[name] = np.mean(model.params[name])
+    for name in ['delta', 'beta']:
+        if model.mcmc_samples == 0:
+            params[name] = model.params[name][0]
+        else:
+            params[name] = np.mean(model.params[name], axis=0)
+    return params
+
+
+class ModelCache:
+    """Şube başına tek kayıt tutan, boyut sınırlı (LRU) model önbelleği."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _path(self, branch_id, config):
+        return os.path.join(self.cache_dir, f"branch_{branch_id}_{config_key(config)}.json")
+
+    def get(self, branch_id, config):
+        """Kayıt varsa {'fingerprint', 'model', 'prediction'} döndürür ve kullanım zamanını günceller."""
+        from prophet.serialize import model_from_json
+
+        path = self._path(branch_id, config)
+        try:
+            with open(path, encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            return None
+
+        prediction = pd.read_json(entry['prediction'], orient='split')
+        prediction['prediction_date'] = pd.to_datetime(prediction['prediction_date'])
+        return {
+            'fingerprint': entry['fingerprint'],
+            'model': model_from_json(entry['model']),
+            'prediction': prediction,
+        }
+
+    def put(self, branch_id, config, fingerprint, model, prediction):
+        """Modeli ve tahminini atomik olarak yazar, ardından boyut sınırını uygular."""
+        from prophet.serialize import model_to_json
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        entry = {
+            'fingerprint': fingerprint,
+            'model': model_to_json(model),
+            'prediction': prediction.to_json(orient='split', date_format='iso', index=False),
+        }
+        path = self._path(branch_id, config)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        """Toplam boyut `max_bytes`'ı aşarsa en eski kullanılan kayıtları siler."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith('.json'):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.cache_dir, name))
+            except FileNotFoundError:
+                pass
+            total -= size
+
+    def clear(self):
+        """Tüm kayıtları siler."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,219 @@
+"""
+`sales` tablosunun aylara bölünmüş Parquet kopyası:
+- Dışa aktarım `sale_id` filigranından itibaren artımlıdır; her çalışma yeni satırları
+  `month=YYYY-MM/part-<ilk sale_id>.parquet` dosyalarına ekler, eski dosyalara dokunulmaz
+- Filigran sadece kesinleşmiş satış sınırına kadar ilerler (bkz. inventory_engine.settled_fence);
+  eş zamanlı yazıcıların geç commit ettiği küçük id'li satışlar kopyadan düşmez
+- Dosyalar (branch_id, sale_datetime) sırasıyla yazılır; satır grubu istatistikleri sayesinde
+  şube ve tarih filtreleri (predicate pushdown) okunmayan grupları atlar
+- Tahmin motoru günlük serileri veritabanı yerine buradan okuyabilir, yeniden tohumlama
+  satışları buradan geri yükleyebilir
+
+Kullanım:
+    python parquet_store.py                      # yeni satışları data_scripts/sales_parquet altına ekler
+    python parquet_store.py --dir /veri/sales    # farklı hedef klasör
+"""
+
+import argparse
+import glob
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import text
+
+from db_config import get_engine
+from inventory_engine import DEFAULT_SETTLE_TIMEOUT, settled_fence
+
+DEFAULT_PARQUET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sales_parquet')
+MANIFEST_FILE = '_manifest.json'
+EXPORT_CHUNK_ROWS = 500_000
+ROW_GROUP_ROWS = 128 * 1024
+
+SALES_EXPORT_SQL = """
+SELECT sale_id, sale_datetime, branch_id, product_id, quantity, unit_price_at_sale, total_sale_amount, employee_id
+FROM sales
+WHERE sale_id > :last_sale_id AND sale_id <= :fence
+ORDER BY sale_id;
+"""
+
+
+def create_db_engine():
+    return get_engine(application_name='parquet_store')
+
+
+def _arrow():
+    """pyarrow'u sadece Parquet kullanıldığında yükler."""
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet desteği için 'pyarrow' kurulmalıdır: pip install pyarrow") from e
+    return pa, ds, pq
+
+
+def sales_schema():
+    pa, _, _ = _arrow()
+    return pa.schema([
+        ('sale_id', pa.int64()),
+        ('sale_datetime', pa.timestamp('us')),
+        ('branch_id', pa.int32()),
+        ('product_id', pa.int32()),
+        ('quantity', pa.int32()),
+        ('unit_price_at_sale', pa.float64()),
+        ('total_sale_amount', pa.float64()),
+        ('employee_id', pa.int32()),
+    ])
+
+
+def read_manifest(root):
+    """Son dışa aktarım filigranını okur; dosya yoksa boş bir manifesto döner."""
+    path = os.path.join(root, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'last_sale_id': 0, 'rows': 0, 'exported_at': None}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _write_manifest(root, manifest):
+    path = os.path.join(root, MANIFEST_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _to_arrow_table(frame):
+    """Veritabanından okunan parçayı sabit şemalı bir Arrow tablosuna çevirir (NUMERIC -> float)."""
+    pa, _, _ = _arrow()
+    frame = frame.astype({'unit_price_at_sale': 'float64', 'total_sale_amount': 'float64'})
+    frame['sale_datetime'] = pd.to_datetime(frame['sale_datetime'])
+    frame = frame.sort_values(['branch_id', 'sale_datetime'], kind='stable')
+    return pa.Table.from_pandas(frame, schema=sales_schema(), preserve_index=False)
+
+
+def export_sales(engine, root=DEFAULT_PARQUET_DIR, chunk_rows=EXPORT_CHUNK_ROWS, settle_timeout=DEFAULT_SETTLE_TIMEOUT):
+    """Son filigrandan sonraki kesinleşmiş satışları aylık Parquet dosyalarına ekler; eklenen satır sayısını döndürür.
+
+    Filigran (manifesto) sadece tüm dosyalar yazıldıktan sonra güncellenir ve kesinleşme sınırına
+    ayarlanır; yarıda kalan bir çalışma bir sonraki çalışmada aynı `sale_id` ile başlayan dosyaların
+    üzerine yazar. Sınırdan önce başlamış transaction'lar `settle_timeout` içinde bitmezse hiçbir şey
+    aktarılmaz.
+    """
+    _, _, pq = _arrow()
+    os.makedirs(root, exist_ok=True)
+    manifest = read_manifest(root)
+    last_sale_id = manifest['last_sale_id']
+
+    fence = settled_fence(engine, settle_timeout, after=last_sale_id)
+    if fence is None:
+        print(f"!!! Parquet dışa aktarımı: açık transaction'lar {settle_timeout:.0f} sn içinde bitmedi, aktarım ertelendi.")
+        return 0
+
+    started = time.perf_counter()
+    exported = 0
+    files = 0
+    # stream_results: sunucu taraflı cursor; sonuç istemcide bütün olarak tamponlanmaz, parça parça gelir
+    with engine.connect().execution_options(stream_results=True) as conn:
+        chunks = pd.read_sql(text(SALES_EXPORT_SQL), conn, params={'last_sale_id': last_sale_id, 'fence': fence},
+                             chunksize=chunk_rows)
+        for frame in chunks:
+            if frame.empty:
+                continue
+            months = pd.to_datetime(frame['sale_datetime']).dt.strftime('%Y-%m')
+            for month, part in frame.groupby(months, sort=True):
+                month_dir = os.path.join(root, f"month={month}")
+                os.makedirs(month_dir, exist_ok=True)
+                file_name = f"part-{int(part['sale_id'].min()):012d}.parquet"
+                pq.write_table(_to_arrow_table(part), os.path.join(month_dir, file_name),
+                               row_group_size=ROW_GROUP_ROWS, compression='zstd')
+                files += 1
+            exported += len(frame)
+
+    # Boş kalan id aralıkları (geri alınan transaction'lar) için de filigran sınıra ilerler
+    if int(fence) > last_sale_id:
+        last_sale_id = int(fence)
+        _write_manifest(root, {
+            'last_sale_id': last_sale_id,
+            'rows': manifest['rows'] + exported,
+            'exported_at': datetime.now().isoformat(timespec='seconds'),
+        })
+
+    elapsed = time.perf_counter() - started
+    print(f"-> Parquet dışa aktarımı: {exported} yeni satış, {files} dosya ({elapsed:.2f} sn, filigran: sale_id={last_sale_id}).")
+    return exported
+
+
+def _sales_dataset(root):
+    pa, ds, _ = _arrow()
+    partitioning = ds.partitioning(pa.schema([('month', pa.string())]), flavor='hive')
+    return ds.dataset(root, format='parquet', partitioning=partitioning, schema=sales_schema().append(pa.field('month', pa.string())))
+
+
+def _sales_filter(branch_id=None, start_date=None, end_date=None):
+    """Şube ve [start_date, end_date] filtresini; ay klasörü budaması dahil, Arrow ifadesine çevirir."""
+    _, ds, _ = _arrow()
+    expression = None
+    conditions = []
+    if branch_id:
+        conditions.append(ds.field('branch_id') == int(branch_id))
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        conditions.append(ds.field('month') >= start.strftime('%Y-%m'))
+        conditions.append(ds.field('sale_datetime') >= start.to_pydatetime())
+    if end_date is not None:
+        end = pd.Timestamp(end_date) + pd.Timedelta(days=1)
+        conditions.append(ds.field('month') <= pd.Timestamp(end_date).strftime('%Y-%m'))
+        conditions.append(ds.field('sale_datetime') < end.to_pydatetime())
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def read_daily_sales(root=DEFAULT_PARQUET_DIR, branch_id=None, start_date=None, end_date=None, by_branch=False):
+    """Parquet kopyasından günlük ciro serisini okur.
+
+    `by_branch=False` ise (ds, y), aksi halde (branch_id, ds, y) döndürür; `sales_daily`
+    sorgularıyla aynı biçimdedir. Sadece filtreyle eşleşen ay klasörleri ve satır grupları okunur.
+    """
+    columns = ['branch_id', 'sale_datetime', 'total_sale_amount']
+    table = _sales_dataset(root).to_table(columns=columns, filter=_sales_filter(branch_id, start_date, end_date))
+    df = table.to_pandas()
+
+    df['ds'] = df['sale_datetime'].dt.normalize()
+    keys = ['branch_id', 'ds'] if by_branch else ['ds']
+    daily = df.groupby(keys, sort=True)['total_sale_amount'].sum().reset_index(name='y')
+    return daily
+
+
+def iter_sales_frames(root=DEFAULT_PARQUET_DIR):
+    """Parquet dosyalarını ay sırasıyla DataFrame olarak üretir (yeniden tohumlama için).
+
+    Tam sayı sütunları pandas'ın NULL destekli tiplerine (Int32/Int64) çevrilir; aksi halde NULL içeren
+    `employee_id` float64 olur ve COPY INTEGER sütuna '3.0' yazmaya çalışıp hata verir.
+    """
+    pa, _, pq = _arrow()
+    integer_types = {pa.int16(): pd.Int16Dtype(), pa.int32(): pd.Int32Dtype(), pa.int64(): pd.Int64Dtype()}
+    for path in sorted(glob.glob(os.path.join(root, 'month=*', '*.parquet'))):
+        yield pq.read_table(path).to_pandas(types_mapper=integer_types.get)
+
+
+def sales_date_range(root=DEFAULT_PARQUET_DIR):
+    """Kopyadaki ilk ve son ayı (ayın ilk günü olarak) döndürür; boşsa (None, None)."""
+    months = sorted(os.path.basename(path).split('=', 1)[1] for path in glob.glob(os.path.join(root, 'month=*')))
+    if not months:
+        return None, None
+    return pd.Timestamp(months[0]).date(), pd.Timestamp(months[-1]).date()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="'sales' tablosunu aylık Parquet dosyalarına artımlı olarak aktarır.")
+    parser.add_argument('--dir', default=DEFAULT_PARQUET_DIR, help="Parquet kopyasının klasörü.")
+    parser.add_argument('--chunk-rows', type=int, default=EXPORT_CHUNK_ROWS, help="Veritabanından parça başına okunacak satır sayısı.")
+    parser.add_argument('--settle-timeout', type=float, default=DEFAULT_SETTLE_TIMEOUT, help="Açık yazma transaction'larının bitmesi için en fazla bekleme (sn).")
+    args = parser.parse_args()
+
+    export_sales(create_db_engine(), root=args.dir, chunk_rows=args.chunk_rows, settle_timeout=args.settle_timeout)
@@ -0,0 +1,243 @@
+"""
+`sales` tablosunun aylık RANGE bölümleri (partition) için yardımcılar:
+- Verilen tarih aralığı ve önümüzdeki aylar için `sales_YYYY_MM` bölümlerini oluşturur
+- Bölümsüz eski bir `sales` tablosunu bölümlü yapıya taşır
+- Saklama politikası: `keep_months`'tan eski bölümleri ayırır (DETACH) ve `sales_archive` şemasına taşır
+  veya siler
+- Satış yükleyicisi her parçayı aylara bölüp doğrudan ilgili bölüme COPY ile yazar
+
+Kullanım:
+    python partitions.py --ahead 3                       # bu ay + önümüzdeki 3 ay
+    python partitions.py --retention-months 36 [--drop]  # eski bölümleri arşivle / sil
+    python partitions.py --migrate                       # bölümsüz sales tablosunu dönüştür
+"""
+
+import argparse
+import re
+import time
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import text
+
+from bulk_loader import DEFAULT_CHUNK_SIZE, copy_to_table, is_duplicate_key_error, print_load_report
+from db_config import get_engine
+from schema import SALES_INDEXES_SQL, SALES_TABLE_SQL
+
+ARCHIVE_SCHEMA = 'sales_archive'
+PARTITION_NAME_PATTERN = re.compile(r"^sales_(\d{4})_(\d{2})$")
+
+
+def create_db_engine():
+    return get_engine(application_name='partitions')
+
+
+def month_start(value):
+    """Tarihin ait olduğu ayın ilk gününü döndürür."""
+    return date(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    """Ayın ilk gününe `months` ay ekler (negatif olabilir)."""
+    index = value.year * 12 + value.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"sales_{month.year}_{month.month:02d}"
+
+
+def partition_ddl(month):
+    """Ayın bölümünü (yoksa) oluşturan DDL."""
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF sales "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}');"
+    )
+
+
+def is_sales_partitioned(conn):
+    """`sales` tablosu bölümlü (relkind='p') ise True döner."""
+    relkind = conn.execute(text("SELECT relkind FROM pg_class WHERE oid = to_regclass('public.sales');")).scalar()
+    return relkind == 'p'
+
+
+def list_sales_partitions(conn):
+    """`sales` tablosuna bağlı bölümlerin adlarını döndürür."""
+    rows = conn.execute(text("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE parent.oid = to_regclass('public.sales')
+        ORDER BY child.relname;
+    """))
+    return [row[0] for row in rows]
+
+
+def _create_missing_partitions(conn, start_date, end_date):
+    """Verilen bağlantının transaction'ı içinde aralıktaki eksik bölümleri oluşturur; oluşturulanları döndürür."""
+    created = []
+    existing = set(list_sales_partitions(conn))
+    month = month_start(start_date)
+    while month <= month_start(end_date):
+        name = partition_name(month)
+        if name not in existing:
+            conn.execute(text(partition_ddl(month)))
+            created.append(name)
+        month = add_months(month, 1)
+    return created
+
+
+def ensure_sales_partitions(engine, start_date, end_date):
+    """`start_date`-`end_date` aralığındaki her ay için bölüm yoksa oluşturur; oluşturulanları döndürür."""
+    with engine.begin() as conn:
+        if not is_sales_partitioned(conn):
+            print("!!! [UYARI] 'sales' bölümlü değil; önce 'python partitions.py --migrate' çalıştırın.")
+            return []
+        created = _create_missing_partitions(conn, start_date, end_date)
+
+    if created:
+        print(f"-> {len(created)} yeni sales bölümü oluşturuldu: {created[0]} .. {created[-1]}")
+    return created
+
+
+def create_upcoming_partitions(engine, months_ahead=3):
+    """Bu ay ve önümüzdeki `months_ahead` ay için bölümleri hazırlar (zamanlanmış görev olarak çalıştırılabilir)."""
+    this_month = month_start(date.today())
+    return ensure_sales_partitions(engine, this_month, add_months(this_month, months_ahead))
+
+
+def apply_retention(engine, keep_months, drop=False):
+    """Son `keep_months` aydan eski bölümleri ayırır; arşiv şemasına taşır veya `drop=True` ise siler.
+
+    Günlük özet tablosu (`sales_daily`) etkilenmez; tahmin geçmişi korunur.
+    """
+    cutoff = add_months(month_start(date.today()), -(keep_months - 1))
+    removed = []
+    with engine.begin() as conn:
+        if not drop:
+            conn.execute(text(f"CREATE SCHEMA IF NOT EXISTS {ARCHIVE_SCHEMA};"))
+        for name in list_sales_partitions(conn):
+            match = PARTITION_NAME_PATTERN.match(name)
+            if not match or date(int(match.group(1)), int(match.group(2)), 1) >= cutoff:
+                continue
+            conn.execute(text(f"ALTER TABLE sales DETACH PARTITION {name};"))
+            if drop:
+                conn.execute(text(f"DROP TABLE {name};"))
+            else:
+                conn.execute(text(f"ALTER TABLE {name} SET SCHEMA {ARCHIVE_SCHEMA};"))
+            removed.append(name)
+
+    action = "silindi" if drop else f"'{ARCHIVE_SCHEMA}' şemasına arşivlendi"
+    print(f"-> Saklama politikası ({keep_months} ay): {len(removed)} bölüm {action}.")
+    return removed
+
+
+def migrate_sales_to_partitioned(engine):
+    """Bölümsüz `sales` tablosunu aylık bölümlü yapıya taşır; veri taşındıktan sonra eski tablo silinir.
+
+    Yeniden adlandırma, bölümlerin oluşturulması, veri kopyası ve sıra (sequence) ayarı tek
+    transaction içinde yapılır; herhangi bir adımda hata olursa `sales` ilk haline döner.
+    """
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        if is_sales_partitioned(conn):
+            print("-> 'sales' zaten bölümlü; taşıma gerekmiyor.")
+            return False
+
+        # Taşıma sırasında eş zamanlı yazmaları engeller (kopyalanmayan satış kalmaz)
+        conn.execute(text("LOCK TABLE sales IN ACCESS EXCLUSIVE MODE;"))
+        bounds = conn.execute(text("SELECT MIN(sale_datetime), MAX(sale_datetime) FROM sales;")).one()
+
+        # Eski tabloyu ve isim çakışması yaratacak indekslerini kenara al
+        conn.execute(text("ALTER TABLE sales RENAME TO sales_unpartitioned;"))
+        conn.execute(text("ALTER TABLE sales_unpartitioned RENAME CONSTRAINT sales_pkey TO sales_unpartitioned_pkey;"))
+        conn.execute(text("DROP INDEX IF EXISTS sales_branch_datetime_idx;"))
+        conn.execute(text("DROP INDEX IF EXISTS sales_datetime_brin_idx;"))
+
+        conn.execute(text(SALES_TABLE_SQL))
+        for statement in SALES_INDEXES_SQL:
+            conn.execute(text(statement))
+        if bounds[0] is not None:
+            _create_missing_partitions(conn, bounds[0], bounds[1])
+
+        moved = conn.execute(text("""
+            INSERT INTO sales (sale_id, sale_datetime, branch_id, product_id, quantity, unit_price_at_sale, total_sale_amount, employee_id)
+            SELECT sale_id, sale_datetime, branch_id, product_id, quantity, unit_price_at_sale, total_sale_amount, employee_id
+            FROM sales_unpartitioned;
+        """)).rowcount
+        conn.execute(text("SELECT setval(pg_get_serial_sequence('sales', 'sale_id'), COALESCE((SELECT MAX(sale_id) FROM sales), 0) + 1, false);"))
+        conn.execute(text("DROP TABLE sales_unpartitioned;"))
+
+    print(f"-> 'sales' bölümlü yapıya taşındı: {moved} satır ({time.perf_counter() - started:.2f} sn).")
+    return True
+
+
+def _iter_partition_frames(data, chunk_size):
+    """DataFrame (veya akışı) parçalarını aylara bölerek (bölüm adı, ay, alt DataFrame) üretir."""
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    for frame in frames:
+        months = pd.to_datetime(frame['sale_datetime']).dt.to_period('M')
+        for month, part in frame.groupby(months, sort=True):
+            month = date(month.year, month.month, 1)
+            for start in range(0, len(part), chunk_size):
+                yield partition_name(month), month, part.iloc[start:start + chunk_size]
+
+
+def load_sales(engine, data, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Satışları tek transaction içinde, her ayı doğrudan kendi bölümüne COPY ile yükler.
+
+    Eksik bölümler aynı transaction içinde oluşturulur; paralel yüklemelerde bölümler önceden
+    `ensure_sales_partitions` ile hazırlanmalıdır. `sales` henüz bölümlü değilse (taşıma
+    yapılmamış eski kurulum) parçalar doğrudan `sales` tablosuna yazılır. Başarılıysa True,
+    hata durumunda (transaction geri alınarak) False döner.
+    """
+    with engine.connect() as conn:
+        partitioned = is_sales_partitioned(conn)
+        known = set(list_sales_partitions(conn)) if partitioned else set()
+    if not partitioned:
+        print("-> [BİLGİ] 'sales' bölümlü değil; satışlar doğrudan 'sales' tablosuna yükleniyor "
+              "(dönüştürmek için: python partitions.py --migrate).")
+
+    raw_conn = engine.raw_connection()
+    try:
+        total_rows = 0
+        total_elapsed = 0.0
+        with raw_conn.cursor() as cursor:
+            for name, month, part in _iter_partition_frames(data, chunk_size):
+                if not partitioned:
+                    name = 'sales'
+                elif name not in known:
+                    cursor.execute(partition_ddl(month))
+                    known.add(name)
+                rows, elapsed = copy_to_table(cursor, part, name, chunk_size=chunk_size)
+                total_rows += rows
+                total_elapsed += elapsed
+        raw_conn.commit()
+        print_load_report('sales', total_rows, total_elapsed)
+        return True
+    except Exception as e:
+        raw_conn.rollback()
+        if is_duplicate_key_error(e):
+            print("!!! [YÜKLEME HATASI] 'sales' zaten dolu. Yeni veri yüklenmedi.")
+        else:
+            print(f"!!! [YÜKLEME HATASI] 'sales' tablosuna yükleme başarısız: {e}")
+        return False
+    finally:
+        raw_conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="'sales' tablosunun aylık bölümlerini yönetir.")
+    parser.add_argument('--migrate', action='store_true', help="Bölümsüz 'sales' tablosunu aylık bölümlü yapıya taşır.")
+    parser.add_argument('--ahead', type=int, default=3, help="Bu aydan sonra kaç ay için bölüm hazırlanacağı.")
+    parser.add_argument('--retention-months', type=int, default=None, help="Verilirse bu kadar aydan eski bölümler ayrılır.")
+    parser.add_argument('--drop', action='store_true', help="Saklama politikasında eski bölümleri arşivlemek yerine siler.")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    if args.migrate:
+        migrate_sales_to_partitioned(engine)
+    create_upcoming_partitions(engine, months_ahead=args.ahead)
+    if args.retention_months:
+        apply_retention(engine, args.retention_months, drop=args.drop)
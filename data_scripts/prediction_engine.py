@@ -1,82 +1,258 @@
 # tüm şubelerin günlük toplam satış miktarını tahmin etmeye odaklanacaktır.
 
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
-from sqlalchemy import create_engine
-from prophet import Prophet
 from datetime import datetime
 
-# ----------------- 1. YAPILANDIRMA AYARLARI (seed_data.py ile aynı) -----------------
-DB_HOST = "localhost"
-DB_NAME = "postgres"
-DB_USER = "postgres"
-DB_PASS = "Sudem12345" # <-- Şifrenizi kontrol edin
+from db_config import get_engine
+from forecast_backends import BACKENDS, get_backend
+from model_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES, ModelCache
+from parquet_store import read_daily_sales
+from product_forecast import run_product_forecast
+from run_metrics import RunMetrics, stage_record
+from sales_rollup import refresh_sales_daily
+from staffing_engine import run_staffing_plan
 
+# ----------------- 1. YAPILANDIRMA AYARLARI (db_config.py, ortam değişkenleri) -----------------
 def create_db_engine():
     """SQLAlchemy motorunu oluşturur."""
-    engine_url = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:5432/{DB_NAME}"
-    return create_engine(engine_url)
+    return get_engine(application_name='prediction_engine')
 
 # prediction_engine.py dosyasındaki fonksiyonları değiştirin
 
-def get_data_for_prediction(engine, branch_id=None):
-    """Belirli bir şube veya tüm şubeler için günlük toplam satış verisini çeker."""
-    
+def daily_sales_sql(branch_id=None, start_date=None, end_date=None):
+    """Bir şubenin (0/None = tüm şubeler) günlük toplam satış sorgusu; Prophet'in (ds, y) sütunlarıyla."""
     # 0 = Tüm şubeler. branch_id verilirse o şube için filtreleme yapılır.
     if branch_id and branch_id != 0:
-        filter_clause = f"WHERE branch_id = {branch_id}"
-        print(f"-> Veri çekiliyor: Sadece Şube {branch_id}")
+        filter_clause = f"WHERE branch_id = {int(branch_id)}"
     else:
         filter_clause = ""
-        print("-> Veri çekiliyor: Tüm Şubeler Toplamı")
 
-    query = f"""
+    date_conditions = []
+    if start_date is not None:
+        date_conditions.append(f"day >= '{pd.Timestamp(start_date).date()}'")
+    if end_date is not None:
+        date_conditions.append(f"day <= '{pd.Timestamp(end_date).date()}'")
+    date_clause = ""
+    if date_conditions:
+        date_clause = ("AND " if filter_clause else "WHERE ") + " AND ".join(date_conditions)
+
+    # Ham 'sales' yerine günlük özet tablosundan okunur (bkz. sales_rollup.py)
+    return f"""
     SELECT 
-        DATE(sale_datetime) as ds,  -- Prophet için tarih
-        SUM(total_sale_amount) as y  -- Tahmin edilecek değer
-    FROM sales
+        day as ds,  -- Prophet için tarih
+        SUM(total_amount) as y  -- Tahmin edilecek değer
+    FROM sales_daily
     {filter_clause}
-    GROUP BY DATE(sale_datetime)
+    {date_clause}
+    GROUP BY day
     ORDER BY ds;
     """
-    
-    df = pd.read_sql(query, engine)
+
+# Tüm şubelerin günlük satışları tek sorguda (şube x gün)
+DAILY_SALES_BY_BRANCH_SQL = """
+SELECT 
+    branch_id,
+    day as ds,
+    total_amount as y
+FROM sales_daily
+ORDER BY branch_id, ds;
+"""
+
+# Şube başına (branch_id, sale_datetime) indeksinden tek satırlık geriye tarama; tüm tablo taranmaz
+LATEST_SALE_BY_BRANCH_SQL = """
+SELECT b.branch_id, (SELECT MAX(s.sale_datetime) FROM sales s WHERE s.branch_id = b.branch_id) AS last_sale
+FROM branches b;
+"""
+
+# Şubenin son *eğitildiği* çalışma: taşınan satırlar asıl üretildikleri çalışmayla sayılır, böylece
+# eğitimi başarısız olup son tahmini taşınan şube yeni satış geldikçe bayat kalır ve tekrar denenir
+LATEST_RUN_BY_BRANCH_SQL = """
+SELECT branch_id, MAX(COALESCE(carried_from, prediction_run_time)) AS last_run
+FROM prediction_results
+GROUP BY branch_id;
+"""
+
+
+def latest_predictions_sql(branch_ids):
+    """Verilen şubelerin her birinin kendi son tahmin çalışmasına ait satırların sorgusu.
+
+    `carried_from` satırların asıl üretildiği çalışmadır; satırlar tekrar taşındığında korunur.
+    """
+    id_list = ', '.join(str(int(b)) for b in branch_ids)
+    return f"""
+    SELECT pr.branch_id, pr.prediction_date, pr.predicted_sales, pr.lower_bound, pr.upper_bound,
+           COALESCE(pr.carried_from, pr.prediction_run_time) AS carried_from
+    FROM prediction_results pr
+    JOIN (
+        SELECT branch_id, MAX(prediction_run_time) AS last_run
+        FROM prediction_results
+        WHERE branch_id IN ({id_list})
+        GROUP BY branch_id
+    ) latest ON latest.branch_id = pr.branch_id AND latest.last_run = pr.prediction_run_time
+    ORDER BY pr.branch_id, pr.prediction_date;
+    """
+
+def get_data_for_prediction(engine, branch_id=None, parquet_dir=None, start_date=None, end_date=None):
+    """Belirli bir şube veya tüm şubeler için günlük toplam satış verisini çeker.
+
+    `parquet_dir` verilirse veritabanı yerine Parquet kopyasından, şube ve tarih filtresi
+    dosya/satır grubu düzeyinde uygulanarak okunur (bkz. parquet_store.py).
+    """
+    if parquet_dir:
+        print(f"-> Veri çekiliyor: Parquet kopyası ({parquet_dir}), Şube {branch_id or 'Tümü'}")
+        return read_daily_sales(parquet_dir, branch_id=branch_id, start_date=start_date, end_date=end_date)
+
+    if branch_id and branch_id != 0:
+        print(f"-> Veri çekiliyor: Sadece Şube {branch_id}")
+    else:
+        print("-> Veri çekiliyor: Tüm Şubeler Toplamı")
+
+    df = pd.read_sql(daily_sales_sql(branch_id, start_date, end_date), engine)
     df['ds'] = pd.to_datetime(df['ds'])
     
     return df
 
-def train_and_predict(df, branch_id, periods=7):
-    """Prophet modelini eğitir, tahmin yapar ve sonucu kaydetmeye hazırlar."""
-    
-    # Veri setinde yeterli veri yoksa tahmin yapma (Örn: yeni şubeler)
-    if len(df) < 30:
-        print(f"!!! Şube {branch_id}: Tahmin için yeterli veri yok (Minimum 30 gün gerekli).")
-        return None
-        
-    print(f"-> Şube {branch_id}: Model eğitiliyor...")
-    
-    model = Prophet(
-        yearly_seasonality=True,
-        weekly_seasonality=True,
-        daily_seasonality=False
-    )
-    
-    model.fit(df)
-    future = model.make_future_dataframe(periods=periods)
-    forecast = model.predict(future)
+def get_daily_sales_by_branch(engine, parquet_dir=None):
+    """Tüm şubelerin günlük satış toplamlarını tek bir sorguyla (branch_id, ds, y) olarak çeker."""
+    if parquet_dir:
+        print(f"-> Veri çekiliyor: Parquet kopyasından tüm şubeler ({parquet_dir})")
+        return read_daily_sales(parquet_dir, by_branch=True)
+
+    print("-> Veri çekiliyor: Tüm şubeler tek sorguda (şube x gün)")
+
+    df = pd.read_sql(DAILY_SALES_BY_BRANCH_SQL, engine)
+    df['ds'] = pd.to_datetime(df['ds'])
+
+    return df
+
+def split_branch_series(daily_df, branch_ids):
+    """Şube x gün sonucunu bellekte şube bazlı (ds, y) serilerine ayırır; 0 = tüm şubelerin toplamı."""
+    series = {0: daily_df.groupby('ds', as_index=False)['y'].sum()}
+
+    grouped = {branch_id: group[['ds', 'y']].reset_index(drop=True) for branch_id, group in daily_df.groupby('branch_id')}
+    for branch_id in branch_ids:
+        if branch_id == 0:
+            continue
+        series[branch_id] = grouped.get(branch_id, pd.DataFrame({'ds': pd.Series(dtype='datetime64[ns]'), 'y': pd.Series(dtype='float64')}))
+
+    return series
+
+def find_stale_branches(engine, branch_ids):
+    """Son tahmin çalışmasından sonra yeni satışı olan (veya hiç tahmini olmayan) şubeleri döndürür.
+
+    `branch_id=0` (genel toplam), herhangi bir şube bayatsa bayat sayılır.
+    """
+    latest_sales = pd.read_sql(LATEST_SALE_BY_BRANCH_SQL, engine).set_index('branch_id')['last_sale']
+    latest_runs = pd.read_sql(LATEST_RUN_BY_BRANCH_SQL, engine).set_index('branch_id')['last_run']
+
+    stale = []
+    for branch_id in branch_ids:
+        if branch_id == 0:
+            continue
+        last_run = latest_runs.get(branch_id)
+        last_sale = latest_sales.get(branch_id)
+        if last_run is None or pd.isna(last_run) or (last_sale is not None and last_sale > last_run):
+            stale.append(branch_id)
+
+    if 0 in branch_ids and (stale or 0 not in latest_runs.index):
+        stale.insert(0, 0)
+    return stale
+
+def load_latest_predictions(engine, branch_ids):
+    """Verilen şubelerin kendi son tahmin çalışmalarına ait satırları çeker."""
+    if not branch_ids:
+        return pd.DataFrame()
+    query = latest_predictions_sql(branch_ids)
+    df = pd.read_sql(query, engine)
+    df['prediction_date'] = pd.to_datetime(df['prediction_date'])
+    return df
+
+def train_and_predict(df, branch_id, periods=7, cache=None, backend='prophet'):
+    """Seçilen arka uçla (varsayılan Prophet) modeli eğitir, tahmin yapar ve sonucu kaydetmeye hazırlar.
+
+    `cache` (ModelCache) sadece Prophet arka ucunda kullanılır.
+    """
+    return get_backend(backend, cache=cache).forecast({branch_id: df}, periods=periods)[branch_id]
+
+def _train_and_predict_isolated(df, branch_id, periods, cache=None, backend='prophet'):
+    """Tek şubenin eğitimini çalıştırır; hata olursa diğer şubeleri etkilemeden hatayı döndürür.
+
+    (tahmin, hata, aşama ölçümleri) döndürür; ölçümler süreç havuzundan da ana sürece taşınır.
+    """
+    model_backend = get_backend(backend, cache=cache)
+    try:
+        return model_backend.forecast({branch_id: df}, periods=periods)[branch_id], None, model_backend.timings
+    except Exception as e:
+        return None, str(e), model_backend.timings
+
+def predict_all_branches(branch_series, branch_ids, periods=7, workers=1, cache=None, backend='prophet', metrics=None):
+    """Şube modellerini eğitir; `workers` > 1 ise işleri süreç havuzuna dağıtır.
+
+    Sonuçlar `branch_ids` sırasıyla döner. Hata veren veya yeterli verisi olmayan şubeler atlanır
+    (ana blok bu şubelerin son tahminlerini taşır).
+    `workers=1` hata ayıklama için her şeyi mevcut süreçte sırayla çalıştırır. Toplu (batched)
+    arka uçlar tüm şubeleri tek çağrıda işlediği için süreç havuzu kullanılmaz. `metrics` (RunMetrics)
+    verilirse şube bazlı eğitim/tahmin süreleri ona eklenir.
+    """
+    if BACKENDS[backend].batched:
+        model_backend = get_backend(backend)
+        try:
+            batch = model_backend.forecast({branch_id: branch_series[branch_id] for branch_id in branch_ids}, periods=periods)
+            results = [(batch.get(branch_id), None, []) for branch_id in branch_ids]
+        except Exception as e:
+            results = [(None, str(e), []) for _ in branch_ids]
+        if metrics is not None:
+            metrics.extend(model_backend.timings)
+    elif workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_train_and_predict_isolated, branch_series[branch_id], branch_id, periods, cache, backend)
+                for branch_id in branch_ids
+            ]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    # Örn. işçi sürecin çökmesi (BrokenProcessPool)
+                    results.append((None, str(e), []))
+    else:
+        results = [_train_and_predict_isolated(branch_series[branch_id], branch_id, periods, cache, backend) for branch_id in branch_ids]
+
+    predictions = []
+    for branch_id, (prediction_df, error, timings) in zip(branch_ids, results):
+        if metrics is not None:
+            metrics.extend(timings)
+        if error is not None:
+            print(f"!!! Şube {branch_id}: Model eğitimi başarısız: {error}")
+        elif prediction_df is not None:
+            predictions.append(prediction_df)
+        print(f"-> Şube {branch_id} için işlem tamamlandı.")
+
+    return predictions
 
-    prediction = forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].tail(periods).copy()
-    
-    # Sütun adlarını veritabanına uyarlıyoruz
-    prediction.rename(columns={'ds': 'prediction_date', 'yhat': 'predicted_sales', 'yhat_lower': 'lower_bound', 'yhat_upper': 'upper_bound'}, inplace=True)
-    
-    # Hangi şube için tahmin yapıldığını ekliyoruz
-    prediction['branch_id'] = branch_id 
-    
-    return prediction
 # ----------------- ANA ÇALIŞTIRMA BLOĞU -----------------
 # prediction_engine.py dosyasında, main bloğunun içini değiştirin
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Şube bazlı satış tahminlerini üretir ve 'prediction_results' tablosuna yazar.")
+    parser.add_argument('--backend', choices=list(BACKENDS), default='prophet', help="Tahmin modeli: 'prophet' veya toplu NumPy modeli 'fourier_ridge'.")
+    parser.add_argument('--workers', type=int, default=1, help="1'den büyükse şube modelleri bu kadar süreçte paralel eğitilir.")
+    parser.add_argument('--incremental', action='store_true', help="Sadece yeni satışı olan şubeler yeniden tahmin edilir, diğerlerinin son tahmini taşınır.")
+    parser.add_argument('--products', action='store_true', help="Şube tahminlerinden sonra ürün x şube talep tahminlerini de üretir.")
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help="Eğitilmiş modellerin saklandığı önbellek klasörü.")
+    parser.add_argument('--cache-max-mb', type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Model önbelleğinin en fazla boyutu (MB).")
+    parser.add_argument('--parquet-dir', default=None, help="Verilirse eğitim serileri veritabanı yerine bu Parquet kopyasından okunur.")
+    parser.add_argument('--no-cache', action='store_true', help="Model önbelleğini kullanmadan tüm şubeleri sıfırdan eğitir.")
+    parser.add_argument('--memory-metrics', action='store_true', help="Aşama ölçümlerinde tracemalloc ile Python yığın tepesini de ölçer (eğitimi yavaşlatır).")
+    args = parser.parse_args()
+
+    model_cache = None if args.no_cache else ModelCache(args.cache_dir, max_bytes=args.cache_max_mb * 1024 * 1024)
+
     engine = create_db_engine()
     
     if engine:
@@ -88,42 +264,95 @@ if __name__ == "__main__":
             print("!!! HATA: 'branches' tablosu bulunamadı. Lütfen seed_data.py'yi çalıştırın.")
             branch_ids_in_db = []
             
-        # Tahmin sonuçlarını kaydetmek için boş bir liste oluştur
-        all_predictions = []
-        
         # 1. Tüm Şubeler İçin Tahmin Yap (branch_id = 0, Toplam Satış)
         branch_ids_to_predict = [0] + branch_ids_in_db # [0, 1, 2, 3, 4, 5]
         
         print("\n================================================")
         print("🤖 BAŞLIYOR: Şube Bazlı Satış Tahmin Motoru")
         print("================================================")
+
+        # Tüm satırlar aynı çalışma zamanıyla yazılır; dashboard bu zamana göre son tahmin setini okur.
+        # Aşama ölçümleri de aynı zamanla 'run_metrics' tablosuna kaydedilir.
+        run_time = datetime.now()
+        metrics = RunMetrics('prediction_engine', run_time=run_time, track_memory=args.memory_metrics)
+        run_started = time.perf_counter()
         
-        for branch_id in branch_ids_to_predict:
-            
-            # Veriyi çek
-            df = get_data_for_prediction(engine, branch_id=branch_id)
-            
-            # Modeli eğit ve tahmin yap
-            prediction_df = train_and_predict(df, branch_id=branch_id, periods=7)
-            
-            if prediction_df is not None:
-                all_predictions.append(prediction_df)
-                
-            print(f"-> Şube {branch_id} için işlem tamamlandı.")
+        # Günlük özet tablosuna sadece son çalışmadan sonraki satışlar eklenir (Parquet modunda gerekmez)
+        if not args.parquet_dir:
+            with metrics.stage('refresh_rollup') as stage:
+                stage.rows = refresh_sales_daily(engine)
+        
+        # Özet tablo tek seferde okunur; şube serileri ve genel toplam bellekte ayrılır
+        with metrics.stage('query') as stage:
+            daily_df = get_daily_sales_by_branch(engine, parquet_dir=args.parquet_dir)
+            stage.rows = len(daily_df)
+        branch_series = split_branch_series(daily_df, branch_ids_to_predict)
+        
+        branches_to_fit = branch_ids_to_predict
+        carried_predictions = pd.DataFrame()
+
+        if args.incremental:
+            branches_to_fit = find_stale_branches(engine, branch_ids_to_predict)
+            fresh_branches = [b for b in branch_ids_to_predict if b not in branches_to_fit]
+            carried_predictions = load_latest_predictions(engine, fresh_branches)
+            print(f"-> Artımlı mod: {len(branches_to_fit)} şube yeniden tahmin edilecek, {len(fresh_branches)} şubenin son tahmini taşınacak.")
+
+        # Modelleri eğit ve tahmin yap (sonuçlar şube sırasıyla toplanır)
+        all_predictions = predict_all_branches(branch_series, branches_to_fit, periods=7, workers=args.workers,
+                                               cache=model_cache, backend=args.backend, metrics=metrics)
+        # Eğitimi başarısız olan veya yeterli geçmişi olmayan şubeler yeni çalışmadan düşmesin: son tahminleri taşınır.
+        # Taşınan satırlar `carried_from` ile işaretlidir; find_stale_branches onları taze saymaz.
+        fitted_branches = {int(df['branch_id'].iloc[0]) for df in all_predictions if not df.empty}
+        failed_branches = [b for b in branches_to_fit if b not in fitted_branches]
+        if all_predictions and failed_branches:
+            fallback_predictions = load_latest_predictions(engine, failed_branches)
+            if not fallback_predictions.empty:
+                print(f"-> {fallback_predictions['branch_id'].nunique()} şube için yeni tahmin üretilemedi, son tahminleri taşınıyor.")
+                carried_predictions = pd.concat([df for df in (carried_predictions, fallback_predictions) if not df.empty])
+        if all_predictions and not carried_predictions.empty:
+            all_predictions.append(carried_predictions)
 
         
         # 2. Tahmin Sonuçlarını Birleştirme ve Veritabanına Kaydetme
         if all_predictions:
             final_predictions_df = pd.concat(all_predictions)
+            final_predictions_df['prediction_run_time'] = run_time
             
             print(f"\n-> TOPLAM {len(final_predictions_df)} adet yeni tahmin kaydı yüklenecek.")
             
             # Veriyi kaydetme
-            final_predictions_df.to_sql('prediction_results', engine, schema='public', if_exists='append', index=False)
+            with metrics.stage('write', rows=len(final_predictions_df)):
+                final_predictions_df.to_sql('prediction_results', engine, schema='public', if_exists='append', index=False)
             
             print("✅ Tahmin sonuçları başarıyla 'prediction_results' tablosuna yüklendi.")
             
+        elif args.incremental and not branches_to_fit:
+            print("-> Artımlı mod: Tüm şubelerin tahminleri güncel, yeni kayıt yazılmadı.")
+            
         else:
             print("!!! HATA: Yüklenecek tahmin bulunamadı.")
+
+        # 3. Ürün x Şube Talep Tahmini (Sipariş önerisi için)
+        if args.products:
+            try:
+                with metrics.stage('product_forecast') as stage:
+                    demand_df = run_product_forecast(engine, periods=7)
+                    stage.rows = len(demand_df) if demand_df is not None else None
+            except Exception as e:
+                print(f"!!! HATA: Ürün talep tahmini başarısız: {e}")
+
+        # 4. Vardiya bazlı personel planı (dashboard hazır planı okur)
+        if all_predictions:
+            try:
+                with metrics.stage('staffing_plan') as stage:
+                    plan_df = run_staffing_plan(engine)
+                    stage.rows = len(plan_df) if plan_df is not None else None
+            except Exception as e:
+                print(f"!!! HATA: Personel planı hesaplanamadı: {e}")
+
+        # 5. Aşama ölçümlerini kaydetme (tüm çalışmanın süresi 'total' aşaması olarak)
+        metrics.add(stage_record('total', time.perf_counter() - run_started))
+        metrics.print_summary()
+        metrics.flush(engine)
             
     print("\n[TAMAMLANDI] Tahmin Motoru çalışması sona erdi.")
\ No newline at end of file
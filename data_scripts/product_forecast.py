@@ -0,0 +1,140 @@
+"""
+Ürün x şube bazlı talep tahmini:
+- Son `history_days` günün satış adetleri tek sorguda (branch_id, product_id, gün) olarak toplanır
+- Tüm (şube, ürün) serileri tek bir (gün x seri) matrisinde `FourierRidgeBackend` ile birlikte çözülür
+- Her çift için önümüzdeki `periods` günün toplam adet tahmini `product_demand_forecasts` tablosuna yazılır;
+  dashboard'daki sipariş önerisi bu tablodan okur
+
+Kullanım:
+    python product_forecast.py --history-days 365 --periods 7
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from bulk_loader import copy_to_table, print_load_report
+from db_config import get_engine
+from forecast_backends import INTERVAL_Z, FourierRidgeBackend
+from sales_rollup import LATEST_SALE_SQL
+
+DEMAND_TABLE = 'product_demand_forecasts'
+
+CREATE_DEMAND_SQL = f"""
+CREATE TABLE IF NOT EXISTS {DEMAND_TABLE} (
+    branch_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    horizon_days SMALLINT NOT NULL,
+    predicted_units NUMERIC(12, 2) NOT NULL,
+    lower_units NUMERIC(12, 2) NOT NULL,
+    upper_units NUMERIC(12, 2) NOT NULL,
+    forecast_run_time TIMESTAMP NOT NULL,
+    PRIMARY KEY (branch_id, product_id)
+);
+"""
+
+DEMAND_COLUMNS = ['branch_id', 'product_id', 'horizon_days', 'predicted_units', 'lower_units', 'upper_units', 'forecast_run_time']
+
+
+def create_db_engine():
+    return get_engine(application_name='product_forecast')
+
+
+def daily_units_sql(history_days=365):
+    """Son `history_days` günün şube x ürün x gün satış adetleri sorgusu."""
+    return f"""
+    SELECT
+        branch_id,
+        product_id,
+        DATE(sale_datetime) AS day,
+        SUM(quantity) AS units
+    FROM sales
+    WHERE sale_datetime >= DATE(({LATEST_SALE_SQL})) - INTERVAL '{int(history_days) - 1} days'
+    GROUP BY branch_id, product_id, DATE(sale_datetime);
+    """
+
+
+def get_daily_units_by_product(engine, history_days=365):
+    """Son `history_days` günün satış adetlerini (branch_id, product_id, day, units) olarak tek sorguda çeker."""
+    query = daily_units_sql(history_days)
+    df = pd.read_sql(query, engine)
+    df['day'] = pd.to_datetime(df['day'])
+    return df
+
+
+def forecast_product_demand(daily_df, periods=7, backend=None):
+    """Tüm (şube, ürün) serilerini birlikte modelleyip `periods` günlük toplam adet tahminini döndürür.
+
+    Eksik günler 0 adet kabul edilir; negatif tahminler 0'a çekilir.
+    """
+    backend = backend or FourierRidgeBackend()
+    if daily_df.empty:
+        return pd.DataFrame(columns=DEMAND_COLUMNS[:-1])
+
+    pairs, pair_idx = np.unique(daily_df[['branch_id', 'product_id']].to_numpy(dtype=np.int64), axis=0, return_inverse=True)
+    day_numbers = daily_df['day'].to_numpy().astype('datetime64[D]').astype(np.int64)
+    first_day = int(day_numbers.min())
+
+    # (gün x seri) adet matrisi
+    y = np.zeros((int(day_numbers.max()) - first_day + 1, len(pairs)))
+    y[day_numbers - first_day, pair_idx.ravel()] = daily_df['units'].to_numpy(dtype=np.float64)
+
+    yhat, sigma = backend.fit_predict_matrix(y, first_day, periods)
+
+    # Günlük tahminlerin toplamı; bağımsız günler varsayımıyla aralık sqrt(periods) ile ölçeklenir
+    total = np.clip(yhat, 0, None).sum(axis=0)
+    spread = INTERVAL_Z * sigma * np.sqrt(periods)
+
+    return pd.DataFrame({
+        'branch_id': pairs[:, 0],
+        'product_id': pairs[:, 1],
+        'horizon_days': periods,
+        'predicted_units': np.round(total, 2),
+        'lower_units': np.round(np.clip(total - spread, 0, None), 2),
+        'upper_units': np.round(total + spread, 2),
+    })
+
+
+def save_product_demand(engine, demand_df, run_time=None):
+    """Tahmin tablosunu tek transaction içinde yeni sonuçlarla değiştirir (okuyucular hep tam bir set görür)."""
+    demand_df = demand_df.assign(forecast_run_time=run_time or datetime.now())
+
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(CREATE_DEMAND_SQL)
+            cursor.execute(f"DELETE FROM {DEMAND_TABLE};")
+            rows, elapsed = copy_to_table(cursor, demand_df, DEMAND_TABLE, columns=DEMAND_COLUMNS)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    print_load_report(DEMAND_TABLE, rows, elapsed)
+
+
+def run_product_forecast(engine, history_days=365, periods=7):
+    """Ürün x şube talep tahminini uçtan uca çalıştırır ve sonucu kaydeder."""
+    print(f"\n-> Ürün x şube talep tahmini başlıyor (geçmiş: {history_days} gün, ufuk: {periods} gün)...")
+    started = time.perf_counter()
+
+    daily_df = get_daily_units_by_product(engine, history_days=history_days)
+    demand_df = forecast_product_demand(daily_df, periods=periods)
+    print(f"-> {len(demand_df)} (şube, ürün) serisi {time.perf_counter() - started:.2f} sn içinde tahmin edildi.")
+
+    save_product_demand(engine, demand_df)
+    return demand_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ürün x şube bazlı haftalık talep tahminlerini üretir.")
+    parser.add_argument('--history-days', type=int, default=365, help="Modelde kullanılacak geçmiş gün sayısı.")
+    parser.add_argument('--periods', type=int, default=7, help="Tahmin ufku (gün).")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    run_product_forecast(engine, history_days=args.history_days, periods=args.periods)
+    print("\n[TAMAMLANDI] Ürün talep tahmini sona erdi.")
@@ -2,33 +2,33 @@
 Küçük veri yükleme scripti (hafif POC):
 - 1 şube, 5 çalışan, 10 ürün
 - Son 14 güne ait günlük 20 satış (toplam ~280 kayıt)
-Uyarı: Var olan tablolara veri ekler; şema yoksa önce oluşturmanız gerekir.
+Uyarı: Var olan tablolara veri ekler; şema yoksa schema.py ile oluşturulur.
 """
 
 import random
+import sys
 from datetime import datetime, timedelta
 
 import pandas as pd
-from sqlalchemy import create_engine
-
-# ----------------- DB AYARLARI -----------------
-DB_HOST = "localhost"
-DB_NAME = "postgres"
-DB_USER = "postgres"
-DB_PASS = "Sudem12345"
-
+from bulk_loader import bulk_load
+from db_config import get_engine
+from inventory_engine import reset_inventory_watermark
+from sales_rollup import refresh_sales_daily
+from partitions import create_upcoming_partitions, load_sales
+from schema import create_schema
+
+# ----------------- DB AYARLARI (db_config.py) -----------------
 def create_db_engine():
-    engine_url = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:5432/{DB_NAME}"
-    return create_engine(engine_url)
+    return get_engine(application_name='quick_seed')
 
 
 def load_data(engine, df, table_name):
-    df.to_sql(table_name, engine, schema="public", if_exists="append", index=False)
-    print(f"[OK] {len(df)} satır {table_name} tablosuna eklendi.")
+    return bulk_load(engine, df, table_name)
 
 
 def main():
     engine = create_db_engine()
+    create_schema(engine)
     today = datetime.now().date()
 
     # Şube
@@ -86,15 +86,22 @@ def main():
             )
     sales_df = pd.DataFrame(sales)
 
-    # Yükleme sırası: branches -> employees -> products -> sales
-    load_data(engine, branches_df, "branches")
-    load_data(engine, employees_df, "employees")
-    load_data(engine, products_df, "products")
-    load_data(engine, sales_df, "sales")
+    # Yükleme sırası: branches -> employees -> products -> sales; bir adım başarısız olursa sonrakiler çalışmaz
+    for table_name, df in (("branches", branches_df), ("employees", employees_df), ("products", products_df)):
+        if not load_data(engine, df, table_name):
+            print(f"\n[DURDURULDU] '{table_name}' yüklenemediği için küçük veri seti yüklenmedi.")
+            return False
+    create_upcoming_partitions(engine)
+    if not load_sales(engine, sales_df):
+        print("\n[DURDURULDU] Satışlar yüklenemedi; envanter filigranı ve günlük özet güncellenmedi.")
+        return False
+    reset_inventory_watermark(engine)
+    refresh_sales_daily(engine)
 
     print("\nBitti. Küçük veri seti yüklendi.")
+    return True
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(0 if main() else 1)
 
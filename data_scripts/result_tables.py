@@ -0,0 +1,188 @@
+"""
+Büyük sonuç tabloları için sunucu taraflı sayfalama ve akışlı dışa aktarım:
+- Sayfalar sorguya `ORDER BY ... LIMIT/OFFSET` eklenerek veritabanında kesilir; uygulamaya sadece
+  görüntülenen sayfa gelir
+- CSV dışa aktarımı `COPY (sorgu) TO STDOUT` ile doğrudan dosyaya akar
+- Parquet dışa aktarımı sunucu taraflı (named) cursor'dan parça parça okunup satır grubu olarak yazılır
+- Bellek kullanımı sonuç büyüdükçe artmaz: en fazla bir sayfa veya bir parça bellekte tutulur
+- Dışa aktarım dosyaları `EXPORT_DIR` altında tutulur; `sweep_exports` ile yaşı dolanlar silinir
+
+Sorgular psycopg2 parametre biçimini (`%(isim)s`) kullanır ve sonda `;` veya ORDER BY içermez.
+"""
+
+import os
+import tempfile
+import time
+from decimal import Decimal
+
+import pandas as pd
+
+PAGE_SIZE_OPTIONS = (25, 50, 100, 250)
+EXPORT_CHUNK_ROWS = 50_000
+EXPORT_FORMATS = ('csv', 'parquet')
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), 'dashboard_exports')
+EXPORT_MAX_AGE = 3600
+
+# PostgreSQL tip OID'leri -> Arrow tipi adı (bkz. pg_type); listede olmayanlar metin olarak yazılır
+PG_ARROW_TYPES = {
+    16: 'bool',
+    20: 'int64',
+    21: 'int16',
+    23: 'int32',
+    700: 'float32',
+    701: 'float64',
+    1700: 'float64',
+    1082: 'date',
+    1083: 'time',
+    1114: 'timestamp',
+    1184: 'timestamptz',
+    25: 'string',
+    1042: 'string',
+    1043: 'string',
+}
+
+
+def _frame(rows, description):
+    """Cursor satırlarını DataFrame'e çevirir; NUMERIC (Decimal) sütunları float olur."""
+    df = pd.DataFrame.from_records(rows, columns=[column[0] for column in description])
+    for name in df.columns[df.dtypes == object]:
+        sample = df[name].dropna()
+        if not sample.empty and isinstance(sample.iloc[0], Decimal):
+            df[name] = df[name].astype('float64')
+    return df
+
+
+def count_rows(engine, query, params=None):
+    """Sorgunun toplam satır sayısı (sayfa sayısı için)."""
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*) FROM ({query}) result_rows", params or {})
+            return cursor.fetchone()[0]
+    finally:
+        raw_conn.close()
+
+
+def page_sql(query, order_by='1'):
+    """Sorgunun sayfalı hali; sayfa sınırları `_limit` ve `_offset` parametreleriyle verilir."""
+    return f"{query} ORDER BY {order_by} LIMIT %(_limit)s OFFSET %(_offset)s"
+
+
+def read_page(engine, query, params=None, order_by='1', page=1, page_size=PAGE_SIZE_OPTIONS[1]):
+    """Sorgunun `page`'inci sayfasını (1'den başlar) döndürür.
+
+    `order_by` sayfaların kararlı olması için tekil bir sıralama vermelidir (örn. 'branch_id, product_id').
+    """
+    paged_params = dict(params or {}, _limit=int(page_size), _offset=(max(int(page), 1) - 1) * int(page_size))
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(page_sql(query, order_by), paged_params)
+            return _frame(cursor.fetchall(), cursor.description)
+    finally:
+        raw_conn.close()
+
+
+def _export_csv(raw_conn, query, params, path):
+    with raw_conn.cursor() as cursor, open(path, 'w', encoding='utf-8', newline='') as f:
+        copy_sql = cursor.mogrify(f"COPY ({query}) TO STDOUT WITH (FORMAT CSV, HEADER)", params or {}).decode()
+        cursor.copy_expert(copy_sql, f)
+        return max(cursor.rowcount, 0)
+
+
+def _arrow_schema(pa, description):
+    """Sütun tiplerini ilk parçadan tahmin etmek yerine cursor'ın PostgreSQL tiplerinden kurar.
+
+    Böylece ilk parçada tamamen NULL olan bir sütun da sonraki parçalarla aynı tipte yazılır.
+    """
+    types = {
+        'bool': pa.bool_(), 'int16': pa.int16(), 'int32': pa.int32(), 'int64': pa.int64(),
+        'float32': pa.float32(), 'float64': pa.float64(), 'date': pa.date32(), 'time': pa.time64('us'),
+        'timestamp': pa.timestamp('us'), 'timestamptz': pa.timestamp('us', tz='UTC'), 'string': pa.string(),
+    }
+    return pa.schema([(column[0], types[PG_ARROW_TYPES.get(column[1], 'string')]) for column in description])
+
+
+def _arrow_table(pa, schema, rows, description):
+    df = _frame(rows, description)
+    for field in schema:
+        if pa.types.is_string(field.type):
+            # Eşlenmemiş tipler (uuid, interval, json...) metne çevrilir
+            df[field.name] = df[field.name].map(lambda value: None if value is None else str(value))
+    return pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+
+
+def _export_parquet(raw_conn, query, params, path, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Parquet dışa aktarımı için 'pyarrow' kurulmalıdır: pip install pyarrow") from e
+
+    rows = 0
+    writer = None
+    # Named cursor: satırlar sunucuda tutulur, her fetchmany sadece bir parça getirir
+    with raw_conn.cursor(name='result_export') as cursor:
+        cursor.itersize = chunk_rows
+        cursor.execute(query, params or {})
+        try:
+            while True:
+                chunk = cursor.fetchmany(chunk_rows)
+                if writer is None:
+                    # Named cursor'da tipler ilk fetch'ten sonra bilinir; boş sonuçta da geçerli bir dosya oluşur
+                    schema = _arrow_schema(pa, cursor.description)
+                    writer = pq.ParquetWriter(path, schema, compression='zstd')
+                if not chunk:
+                    break
+                writer.write_table(_arrow_table(pa, schema, chunk, cursor.description))
+                rows += len(chunk)
+        finally:
+            if writer is not None:
+                writer.close()
+    return rows
+
+
+def sweep_exports(directory=EXPORT_DIR, max_age=EXPORT_MAX_AGE):
+    """`max_age` saniyeden eski dışa aktarım dosyalarını siler (yarıda kalan oturumların artıkları); silinen sayısını döner."""
+    if not os.path.isdir(directory):
+        return 0
+    removed = 0
+    cutoff = time.time() - max_age
+    for entry in os.scandir(directory):
+        if entry.name.startswith('export-') and entry.is_file():
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                # Başka bir süreç aynı anda silmiş olabilir
+                pass
+    return removed
+
+
+def export_query(engine, query, params=None, fmt='csv', chunk_rows=EXPORT_CHUNK_ROWS, directory=EXPORT_DIR):
+    """Sorgu sonucunu `directory` altında geçici bir dosyaya akıtır; (dosya yolu, satır sayısı, süre) döndürür.
+
+    Dosyayı silmek çağıranın sorumluluğundadır; silinmeyen dosyaları `sweep_exports` temizler.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Desteklenmeyen dışa aktarım biçimi: {fmt} (seçenekler: {', '.join(EXPORT_FORMATS)})")
+
+    os.makedirs(directory, exist_ok=True)
+    fd, path = tempfile.mkstemp(suffix=f'.{fmt}', prefix='export-', dir=directory)
+    os.close(fd)
+    started = time.perf_counter()
+    raw_conn = engine.raw_connection()
+    try:
+        if fmt == 'csv':
+            rows = _export_csv(raw_conn, query, params, path)
+        else:
+            rows = _export_parquet(raw_conn, query, params, path, chunk_rows)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        os.remove(path)
+        raise
+    finally:
+        raw_conn.close()
+    return path, rows, time.perf_counter() - started
@@ -0,0 +1,162 @@
+"""
+Aşama (stage) bazlı ölçüm katmanı:
+- Her aşama için süre, satır sayısı, satır/saniye ve en yüksek Python yığın kullanımı (tracemalloc, RSS değil)
+- Kayıtlar bileşen (seed_data, prediction_engine, dashboard), çalışma zamanı ve (varsa) şube ile tutulur
+- `run_metrics` tablosuna toplu olarak yazılır; dashboard'un "Performans" sekmesi buradan okur
+"""
+
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+from sqlalchemy import text
+
+METRICS_TABLE = 'run_metrics'
+
+CREATE_METRICS_SQL = f"""
+CREATE TABLE IF NOT EXISTS {METRICS_TABLE} (
+    metric_id BIGSERIAL PRIMARY KEY,
+    component VARCHAR(50) NOT NULL,
+    run_time TIMESTAMP NOT NULL,
+    stage VARCHAR(100) NOT NULL,
+    branch_id INTEGER,
+    seconds DOUBLE PRECISION NOT NULL,
+    row_count BIGINT,
+    rows_per_sec DOUBLE PRECISION,
+    peak_memory_mb DOUBLE PRECISION,
+    recorded_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+
+# Performans sekmesi bileşen bazında son N günün kayıtlarını okur
+CREATE_METRICS_INDEX_SQL = f"CREATE INDEX IF NOT EXISTS {METRICS_TABLE}_component_recorded_idx ON {METRICS_TABLE} (component, recorded_at);"
+
+METRIC_COLUMNS = ['component', 'run_time', 'stage', 'branch_id', 'seconds', 'row_count', 'rows_per_sec', 'peak_memory_mb', 'recorded_at']
+
+
+def stage_record(stage, seconds, rows=None, branch_id=None, peak_bytes=None):
+    """Tek bir aşama ölçümünü sözlük olarak oluşturur (alt süreçlerden dönen ölçümler için de kullanılır)."""
+    return {
+        'stage': stage,
+        'branch_id': branch_id,
+        'seconds': seconds,
+        'row_count': rows,
+        'rows_per_sec': rows / seconds if rows and seconds > 0 else None,
+        'peak_memory_mb': peak_bytes / (1024 * 1024) if peak_bytes is not None else None,
+        'recorded_at': datetime.now(),
+    }
+
+
+class Stage:
+    """`RunMetrics.stage` bloğu içinde satır sayısının sonradan verilebilmesi için tutucu."""
+
+    def __init__(self, rows=None):
+        self.rows = rows
+
+
+class RunMetrics:
+    """Bir çalışmanın aşama ölçümlerini toplar; thread-safe'tir, `flush` ile veritabanına yazar.
+
+    `track_memory=True` ise aşamaların en yüksek Python bellek kullanımı tracemalloc ile ölçülür.
+    Bu değer süreç belleği (RSS) değildir: sadece Python yığınındaki ayırmaları kapsar, NumPy/pandas
+    tamponlarının bir kısmı ve C kütüphanelerinin (psycopg2, pyarrow) kendi ayırmaları görünmez.
+    tracemalloc'un tepe değeri süreç geneli tek bir sayaçtır; bu yüzden sadece en dıştaki aşama için
+    kaydedilir, iç içe (veya başka thread'de aynı anda açılmış) aşamaların tepe değeri boş kalır.
+    tracemalloc her ayırmayı izlediği için işleri belirgin yavaşlatır; varsayılan olarak kapalıdır
+    (scriptlerde `--memory-metrics` ile açılır).
+    """
+
+    def __init__(self, component, run_time=None, track_memory=False):
+        self.component = component
+        self.run_time = run_time or datetime.now()
+        self.track_memory = track_memory
+        self.records = []
+        self._lock = threading.Lock()
+        self._open_stages = 0
+        self._last_flush = time.monotonic()
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def stage(self, name, branch_id=None, rows=None):
+        """Bloğun süresini ölçer; satır sayısı `rows` ile veya blok içinde `stage.rows = n` ile verilir."""
+        holder = Stage(rows)
+        with self._lock:
+            outermost = self._open_stages == 0
+            self._open_stages += 1
+        measure_memory = self.track_memory and outermost
+        if measure_memory:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        try:
+            yield holder
+        finally:
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1] if measure_memory else None
+            with self._lock:
+                self._open_stages -= 1
+            self.add(stage_record(name, elapsed, rows=holder.rows, branch_id=branch_id, peak_bytes=peak))
+
+    def add(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def extend(self, records):
+        with self._lock:
+            self.records.extend(records)
+
+    def to_frame(self):
+        with self._lock:
+            df = pd.DataFrame(self.records)
+        if df.empty:
+            return pd.DataFrame(columns=METRIC_COLUMNS)
+        df['component'] = self.component
+        df['run_time'] = self.run_time
+        df['branch_id'] = df['branch_id'].astype('Int64')
+        df['row_count'] = df['row_count'].astype('Int64')
+        return df[METRIC_COLUMNS]
+
+    def print_summary(self):
+        """Aşamaları toplam süreye göre özetler (şube bazlı aşamalar birleştirilir)."""
+        df = self.to_frame()
+        if df.empty:
+            return
+        summary = df.groupby('stage', sort=False).agg(
+            seconds=('seconds', 'sum'), rows=('row_count', 'sum'), count=('stage', 'size'), peak_mb=('peak_memory_mb', 'max')
+        )
+        print(f"\n=== Aşama süreleri ({self.component}, {self.run_time:%Y-%m-%d %H:%M:%S}) ===")
+        for stage, row in summary.iterrows():
+            rate = f", {row['rows'] / row['seconds']:,.0f} satır/sn" if row['rows'] and row['seconds'] > 0 else ""
+            memory = f", tepe {row['peak_mb']:,.1f} MB" if pd.notna(row['peak_mb']) else ""
+            repeat = f" ({row['count']} kez)" if row['count'] > 1 else ""
+            print(f"   {stage:<28} {row['seconds']:>9.3f} sn{repeat}{rate}{memory}")
+
+    def flush(self, engine):
+        """Biriken ölçümleri `run_metrics` tablosuna yazar ve listeyi boşaltır; yazılan kayıt sayısını döndürür.
+
+        Ölçüm yazılamazsa asıl işi bozmamak için hata sadece yazdırılır.
+        """
+        df = self.to_frame()
+        with self._lock:
+            self.records = self.records[len(df):]
+            self._last_flush = time.monotonic()
+        if df.empty:
+            return 0
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(CREATE_METRICS_SQL))
+                df.to_sql(METRICS_TABLE, conn, schema='public', if_exists='append', index=False, method='multi')
+        except Exception as e:
+            print(f"!!! [UYARI] Ölçümler '{METRICS_TABLE}' tablosuna yazılamadı: {e}")
+            return 0
+        return len(df)
+
+    def flush_if_due(self, engine, max_age=60.0, max_records=50):
+        """Uzun süre çalışan süreçler (dashboard) için: yeterince kayıt biriktiyse veya süre dolduysa yazar."""
+        with self._lock:
+            pending = len(self.records)
+            due = pending >= max_records or (pending and time.monotonic() - self._last_flush >= max_age)
+        return self.flush(engine) if due else 0
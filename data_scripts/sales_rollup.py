@@ -0,0 +1,147 @@
+"""
+Günlük satış özet tablosu (`sales_daily`) yardımcıları:
+- `sales` tablosunu (branch_id, day) bazında ciro, adet ve işlem sayısı olarak özetler
+- `sale_id` üzerinde bir üst sınır (high-water mark) tutar; yenileme sadece daha yeni satırları ekler.
+  Sınır kesinleşmiş satışlara kadar ilerler (bkz. inventory_engine.settled_fence): geç commit edilen,
+  geriye tarihli veya aynı saniyeye düşen satışlar da özete girer
+- Tahmin motoru ve dashboard ham `sales` yerine bu tablodan okur
+
+Kullanım:
+    python sales_rollup.py            # artımlı yenileme
+    python sales_rollup.py --rebuild  # özet tablosunu sıfırdan oluşturma
+"""
+
+import argparse
+import time
+
+from sqlalchemy import text
+
+from db_config import get_engine
+from inventory_engine import DEFAULT_SETTLE_TIMEOUT, settled_fence
+
+ROLLUP_TABLE = 'sales_daily'
+WATERMARK_TABLE = 'sales_daily_watermark'
+
+CREATE_ROLLUP_SQL = f"""
+CREATE TABLE IF NOT EXISTS {ROLLUP_TABLE} (
+    branch_id INTEGER NOT NULL,
+    day DATE NOT NULL,
+    total_amount NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    total_quantity BIGINT NOT NULL DEFAULT 0,
+    transaction_count BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (branch_id, day)
+);
+"""
+
+CREATE_WATERMARK_SQL = f"""
+CREATE TABLE IF NOT EXISTS {WATERMARK_TABLE} (
+    id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+    last_sale_id BIGINT,
+    refreshed_at TIMESTAMP NOT NULL DEFAULT NOW()
+);
+"""
+
+# Eski (sale_datetime filigranlı) tablolar için; NULL filigran özetin sıfırdan kurulmasını sağlar
+ALTER_WATERMARK_SQL = f"ALTER TABLE {WATERMARK_TABLE} ADD COLUMN IF NOT EXISTS last_sale_id BIGINT;"
+
+# En son satış zamanı: şube başına (branch_id, sale_datetime) indeksinden okunur, tüm tablo taranmaz.
+# Şubeler `branches` tablosundan değil, aynı indeks üzerinde atlamalı tarama (loose index scan) ile
+# doğrudan `sales`'tan bulunur; `branches`'ta olmayan bir branch_id'nin satışları da görülür.
+LATEST_SALE_SQL = """
+WITH RECURSIVE sale_branches AS (
+    (SELECT branch_id FROM sales ORDER BY branch_id LIMIT 1)
+    UNION ALL
+    SELECT (SELECT s.branch_id FROM sales s WHERE s.branch_id > sb.branch_id ORDER BY s.branch_id LIMIT 1)
+    FROM sale_branches sb
+    WHERE sb.branch_id IS NOT NULL
+)
+SELECT MAX((SELECT MAX(s.sale_datetime) FROM sales s WHERE s.branch_id = sb.branch_id))
+FROM sale_branches sb
+WHERE sb.branch_id IS NOT NULL
+"""
+
+# sale_id'si (low, high] aralığındaki satışları tek taramada özetleyip var olan günlere ekler;
+# eklenen satış sayısını döndürür
+FOLD_SQL = f"""
+WITH agg AS (
+    SELECT
+        branch_id,
+        DATE(sale_datetime) AS day,
+        SUM(total_sale_amount) AS total_amount,
+        SUM(quantity) AS total_quantity,
+        COUNT(*) AS transaction_count
+    FROM sales
+    WHERE sale_id > :low AND sale_id <= :high
+    GROUP BY branch_id, DATE(sale_datetime)
+), upsert AS (
+    INSERT INTO {ROLLUP_TABLE} (branch_id, day, total_amount, total_quantity, transaction_count)
+    SELECT branch_id, day, total_amount, total_quantity, transaction_count FROM agg
+    ON CONFLICT (branch_id, day) DO UPDATE SET
+        total_amount = {ROLLUP_TABLE}.total_amount + EXCLUDED.total_amount,
+        total_quantity = {ROLLUP_TABLE}.total_quantity + EXCLUDED.total_quantity,
+        transaction_count = {ROLLUP_TABLE}.transaction_count + EXCLUDED.transaction_count
+)
+SELECT COALESCE(SUM(transaction_count), 0) FROM agg;
+"""
+
+
+def create_db_engine():
+    return get_engine(application_name='sales_rollup')
+
+
+def ensure_rollup_tables(conn):
+    """Özet ve high-water mark tablolarını yoksa oluşturur."""
+    conn.execute(text(CREATE_ROLLUP_SQL))
+    conn.execute(text(CREATE_WATERMARK_SQL))
+    conn.execute(text(ALTER_WATERMARK_SQL))
+    conn.execute(text(f"INSERT INTO {WATERMARK_TABLE} (id) VALUES (1) ON CONFLICT (id) DO NOTHING;"))
+
+
+def refresh_sales_daily(engine, rebuild=False, settle_timeout=DEFAULT_SETTLE_TIMEOUT):
+    """`sales_daily` tablosunu son high-water mark'tan sonraki kesinleşmiş satışlarla günceller.
+
+    Sınır transaction dışında belirlenir (bekleme kendi transaction'ımızı beklemesin diye); ekleme
+    tek transaction içinde çalışır ve watermark satırı kilitlendiği için eş zamanlı iki yenileme
+    aynı satırları iki kez eklemez. Watermark hiç ayarlanmamışsa özet sıfırdan kurulur.
+    Eklenen satış sayısını döndürür.
+    """
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        ensure_rollup_tables(conn)
+        low = conn.execute(text(f"SELECT last_sale_id FROM {WATERMARK_TABLE} WHERE id = 1;")).scalar()
+
+    # Filigrandan sonra yeni id dağıtılmamışsa filigrana kadar olanlar zaten kesinleşmiştir; yeniden kurulumda
+    # (sıra sıfırlanmış olabilir) her zaman beklenir
+    fence = settled_fence(engine, settle_timeout, after=None if rebuild else low)
+    if fence is None:
+        print(f"!!! '{ROLLUP_TABLE}': açık transaction'lar {settle_timeout:.0f} sn içinde bitmedi, yenileme ertelendi.")
+        return 0
+
+    with engine.begin() as conn:
+        low = conn.execute(text(f"SELECT last_sale_id FROM {WATERMARK_TABLE} WHERE id = 1 FOR UPDATE;")).scalar()
+        if rebuild or low is None:
+            conn.execute(text(f"TRUNCATE {ROLLUP_TABLE};"))
+            low = 0
+
+        if fence <= low:
+            print(f"-> '{ROLLUP_TABLE}' güncel; eklenecek yeni satış yok.")
+            return 0
+
+        folded = conn.execute(text(FOLD_SQL), {'low': low, 'high': fence}).scalar()
+        conn.execute(
+            text(f"UPDATE {WATERMARK_TABLE} SET last_sale_id = :high, refreshed_at = NOW() WHERE id = 1;"),
+            {'high': fence},
+        )
+
+    elapsed = time.perf_counter() - started
+    print(f"-> '{ROLLUP_TABLE}' güncellendi: {folded} yeni satış eklendi ({elapsed:.2f} sn, watermark: sale_id={fence}).")
+    return folded
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Günlük satış özet tablosunu (sales_daily) günceller.")
+    parser.add_argument('--rebuild', action='store_true', help="Özet tablosunu boşaltıp tüm satışlardan yeniden oluşturur.")
+    parser.add_argument('--settle-timeout', type=float, default=DEFAULT_SETTLE_TIMEOUT, help="Açık yazma transaction'larının bitmesi için en fazla bekleme (sn).")
+    args = parser.parse_args()
+
+    refresh_sales_daily(create_db_engine(), rebuild=args.rebuild, settle_timeout=args.settle_timeout)
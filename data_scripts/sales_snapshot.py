@@ -0,0 +1,200 @@
+"""
+Dashboard süreci içinde tutulan, okumaya göre düzenlenmiş sütunsal `sales` anlık görüntüsü:
+- Sütunlar sıkıştırılmış tiplerle tutulur: int32 şube/ürün/adet, float32 tutar,
+  int64 epoch saniye zaman damgası
+- Satırlar zamana göre sıralı tutulur; 'son N gün' pencereleri `searchsorted` ile dilimlenir
+- `sale_id` filigranından itibaren artımlı yenilenir (sadece yeni satırlar çekilir); filigran sadece
+  kesinleşmiş satış sınırına kadar ilerler (bkz. inventory_engine.settled_fence), geç commit edilen
+  küçük id'li satışlar atlanmaz
+- `top_products` ve `total_revenue` niyetleri vektörel `bincount` group-by'larıyla cevaplanır
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from inventory_engine import settled_fence
+
+SUPPORTED_INTENTS = ('top_products', 'total_revenue')
+REFRESH_CHUNK_ROWS = 500_000
+# Dashboard beklemesin diye kısa tutulur; süre dolarsa yenileme bir sonraki sefere kalır
+REFRESH_SETTLE_TIMEOUT = 5.0
+
+NEW_SALES_SQL = """
+SELECT sale_id, sale_datetime, branch_id, product_id, quantity, total_sale_amount
+FROM sales
+WHERE sale_id > :last_sale_id AND sale_id <= :fence
+ORDER BY sale_id;
+"""
+
+
+def _epoch_seconds(values):
+    """Saat dilimsiz zaman damgalarını (veritabanındaki gibi) epoch saniyeye çevirir."""
+    return np.asarray(values, dtype='datetime64[s]').astype(np.int64)
+
+
+class SalesSnapshot:
+    """Satış tablosunun bellek içi, zamana göre sıralı sütunsal kopyası."""
+
+    def __init__(self, min_refresh_interval=15.0, settle_timeout=REFRESH_SETTLE_TIMEOUT):
+        self.min_refresh_interval = min_refresh_interval
+        self.settle_timeout = settle_timeout
+        self.last_sale_id = 0
+        self.last_refresh = 0.0
+        self.columns = {
+            'ts': np.empty(0, dtype=np.int64),
+            'branch_id': np.empty(0, dtype=np.int32),
+            'product_id': np.empty(0, dtype=np.int32),
+            'quantity': np.empty(0, dtype=np.int32),
+            'amount': np.empty(0, dtype=np.float32),
+        }
+        # product_id -> ürün adı kodu (aynı adlı ürünler SQL'deki gibi birlikte gruplanır)
+        self.product_name_codes = np.empty(0, dtype=np.int32)
+        self.product_names = np.empty(0, dtype=object)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.columns['ts'])
+
+    @property
+    def nbytes(self):
+        return sum(column.nbytes for column in self.columns.values())
+
+    def _load_products(self, engine):
+        products = pd.read_sql("SELECT product_id, product_name FROM products;", engine)
+        codes, names = pd.factorize(products['product_name'])
+        lookup = np.full(int(products['product_id'].max() or 0) + 1, -1, dtype=np.int32)
+        lookup[products['product_id'].to_numpy()] = codes
+        self.product_name_codes = lookup
+        self.product_names = np.asarray(names, dtype=object)
+
+    def _merge(self, frames):
+        """Bir yenilemede çekilen parçaları tek seferde mevcut sütunlara ekler (tek concatenate, en fazla bir sıralama)."""
+        new = {
+            'ts': np.concatenate([_epoch_seconds(frame['sale_datetime'].to_numpy()) for frame in frames]),
+            'branch_id': np.concatenate([frame['branch_id'].to_numpy(dtype=np.int32) for frame in frames]),
+            'product_id': np.concatenate([frame['product_id'].to_numpy(dtype=np.int32) for frame in frames]),
+            'quantity': np.concatenate([frame['quantity'].to_numpy(dtype=np.int32) for frame in frames]),
+            'amount': np.concatenate([frame['total_sale_amount'].to_numpy(dtype=np.float32) for frame in frames]),
+        }
+        ts = new['ts']
+        in_order = len(self) == 0 or ts.min() >= self.columns['ts'][-1]
+        merged = {name: np.concatenate([self.columns[name], new[name]]) for name in self.columns}
+        if not in_order or np.any(np.diff(ts) < 0):
+            # Paralel yüklenmiş veya geç gelen satırlar: zaman sırasını korumak için yeniden sıralanır
+            order = np.argsort(merged['ts'], kind='stable')
+            merged = {name: column[order] for name, column in merged.items()}
+        self.columns = merged
+
+    def expire(self):
+        """Bir sonraki `refresh` çağrısının aralık beklemeden veritabanına gitmesini sağlar."""
+        self.last_refresh = 0.0
+
+    def refresh(self, engine, force=False):
+        """Son filigrandan sonraki satışları çeker; `min_refresh_interval` içinde tekrar sorgulamaz.
+
+        Eklenen satır sayısını döndürür.
+        """
+        with self._lock:
+            if not force and time.monotonic() - self.last_refresh < self.min_refresh_interval:
+                return 0
+            self.last_refresh = time.monotonic()
+
+            # Sınıra kadar olan satışlar kesinleşmiştir; sınır hazır değilse (uzun süren bir yükleme) yenileme ertelenir
+            fence = settled_fence(engine, self.settle_timeout, after=self.last_sale_id)
+            if fence is None:
+                return 0
+
+            # stream_results: sunucu taraflı cursor, parçalar veritabanından gerçekten parça parça gelir
+            with engine.connect().execution_options(stream_results=True) as conn:
+                chunks = pd.read_sql(text(NEW_SALES_SQL), conn, params={'last_sale_id': self.last_sale_id, 'fence': fence},
+                                     chunksize=REFRESH_CHUNK_ROWS)
+                frames = [frame for frame in chunks if not frame.empty]
+            added = sum(len(frame) for frame in frames)
+            if frames:
+                self._merge(frames)
+            self.last_sale_id = max(self.last_sale_id, int(fence))
+
+            if added or len(self.product_names) == 0:
+                self._load_products(engine)
+            return added
+
+    def _window(self, start, end=None, branch_id=0):
+        """[start, end) epoch saniye aralığının dilimini ve (varsa) şube filtresini döndürür."""
+        ts = self.columns['ts']
+        first = np.searchsorted(ts, start, side='left')
+        last = len(ts) if end is None else np.searchsorted(ts, end, side='left')
+        window = {name: column[first:last] for name, column in self.columns.items()}
+        if branch_id:
+            mask = window['branch_id'] == branch_id
+            window = {name: column[mask] for name, column in window.items()}
+        return window
+
+    @staticmethod
+    def _today_start():
+        return int(_epoch_seconds(np.datetime64(datetime.now().date())))
+
+    def _totals(self, days, branch_id, offset_days=0):
+        """Bugün dahil son `days` takvim gününün (sales_daily ile aynı anlam) ciro / adet / işlem sayısı."""
+        end = self._today_start() + (1 - offset_days) * 86400
+        window = self._window(end - days * 86400, end, branch_id)
+        return (
+            float(window['amount'].sum(dtype=np.float64)),
+            int(window['quantity'].sum(dtype=np.int64)),
+            len(window['quantity']),
+        )
+
+    def kpis(self, branch_id, days=7):
+        """Genel bakış kartları: son `days` günün ciro / adet / işlem sayısı ve bir önceki dönem cirosu."""
+        with self._lock:
+            revenue, quantity, transactions = self._totals(days, branch_id)
+            previous_revenue = self._totals(days, branch_id, offset_days=days)[0]
+        return {
+            'revenue': revenue,
+            'quantity': quantity,
+            'transactions': transactions,
+            'previous_revenue': previous_revenue,
+        }
+
+    def answer(self, intent_info, branch_id):
+        """Desteklenen niyetleri bellekten cevaplar; (DataFrame, özet) veya desteklenmiyorsa None döner."""
+        intent = intent_info["intent"]
+        if intent not in SUPPORTED_INTENTS:
+            return None
+        days = intent_info.get("days", 7)
+
+        with self._lock:
+            if intent == "top_products":
+                limit = intent_info.get("limit", 5)
+                # SQL'deki `sale_datetime >= NOW() - INTERVAL '{days} days'` ile aynı pencere
+                now = int(_epoch_seconds(np.datetime64(datetime.now(), 's')))
+                window = self._window(now - days * 86400, branch_id=branch_id)
+                # `products` tablosunda olmayan ürünler SQL'deki JOIN gibi dışarıda bırakılır
+                product_ids = window['product_id']
+                lookup = self.product_name_codes
+                codes = np.full(len(product_ids), -1, dtype=np.int32)
+                in_range = (product_ids >= 0) & (product_ids < len(lookup))
+                codes[in_range] = lookup[product_ids[in_range]]
+                known = codes >= 0
+                units = np.bincount(codes[known], weights=window['quantity'][known], minlength=len(self.product_names))
+                revenue = np.bincount(codes[known], weights=window['amount'][known], minlength=len(self.product_names))
+                sold = np.flatnonzero(units)
+                top = sold[np.argsort(-units[sold], kind='stable')[:limit]]
+                df = pd.DataFrame({
+                    'product_name': self.product_names[top],
+                    'adet': units[top].astype(np.int64),
+                    'ciro': np.round(revenue[top], 2),
+                })
+                return df, f"Son {days} günde en çok satan ilk {limit} ürün."
+
+            revenue, quantity, transactions = self._totals(days, branch_id)
+            df = pd.DataFrame({
+                'toplam_ciro': [round(revenue, 2) if transactions else None],
+                'toplam_adet': [quantity if transactions else None],
+                'islem_sayisi': [transactions if transactions else None],
+            })
+            return df, f"Son {days} günde toplam ciro ve adet özeti."
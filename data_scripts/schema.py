@@ -0,0 +1,259 @@
+"""
+Veritabanı şeması (DDL) ve indeksleri:
+- Scriptlerin kullandığı tüm tabloları `CREATE TABLE IF NOT EXISTS` ile oluşturur (tekrar çalıştırılabilir)
+- Sorgu desenlerine uygun indeksleri ekler: `sales (branch_id, sale_datetime)` btree,
+  `sales (sale_datetime)` BRIN, `branch_inventory (branch_id, product_id)` vb.
+- `sales` tablosu `sale_datetime` üzerinde aylık RANGE bölümlüdür (bölümler için bkz. partitions.py)
+- `--explain` ile yerleşik sorguların EXPLAIN planlarını yazdırır, büyük tablolarda
+  sıralı tarama (Seq Scan) yapanları işaretler ve taranan `sales` bölümü sayısını gösterir
+
+Kullanım:
+    python schema.py             # tabloları ve indeksleri oluşturur
+    python schema.py --explain   # yerleşik sorguların planlarını kontrol eder
+"""
+
+import argparse
+import re
+
+from sqlalchemy import text
+
+from db_config import get_engine
+from inventory_engine import CREATE_INVENTORY_WATERMARK_SQL
+from product_forecast import CREATE_DEMAND_SQL
+from run_metrics import CREATE_METRICS_INDEX_SQL, CREATE_METRICS_SQL
+from sales_rollup import ALTER_WATERMARK_SQL, CREATE_ROLLUP_SQL, CREATE_WATERMARK_SQL
+from staffing_engine import CREATE_PLAN_SQL
+
+# Aylık RANGE bölümlü satış tablosu; bölüm anahtarı birincil anahtarın parçası olmak zorundadır
+SALES_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS sales (
+    sale_id BIGSERIAL,
+    sale_datetime TIMESTAMP NOT NULL,
+    branch_id INTEGER NOT NULL,
+    product_id INTEGER NOT NULL,
+    quantity INTEGER NOT NULL,
+    unit_price_at_sale NUMERIC(10, 2) NOT NULL,
+    total_sale_amount NUMERIC(12, 2) NOT NULL,
+    employee_id INTEGER,
+    PRIMARY KEY (sale_id, sale_datetime)
+) PARTITION BY RANGE (sale_datetime);
+"""
+
+SALES_INDEXES_SQL = [
+    # Şube filtreli zaman penceresi sorguları ve şube başına MAX(sale_datetime)
+    "CREATE INDEX IF NOT EXISTS sales_branch_datetime_idx ON sales (branch_id, sale_datetime);",
+    # Şube filtresiz 'son N gün' sorguları; ekleme sırası zamanla uyumlu olduğu için BRIN küçük ve yeterli
+    "CREATE INDEX IF NOT EXISTS sales_datetime_brin_idx ON sales USING BRIN (sale_datetime);",
+]
+
+TABLES_SQL = [
+    """
+    CREATE TABLE IF NOT EXISTS branches (
+        branch_id SERIAL PRIMARY KEY,
+        branch_name VARCHAR(150) NOT NULL,
+        city VARCHAR(100),
+        address TEXT,
+        opening_date DATE
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS employees (
+        employee_id SERIAL PRIMARY KEY,
+        first_name VARCHAR(100) NOT NULL,
+        last_name VARCHAR(100) NOT NULL,
+        job_title VARCHAR(100),
+        hourly_wage NUMERIC(10, 2),
+        branch_id INTEGER NOT NULL REFERENCES branches (branch_id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS products (
+        product_id SERIAL PRIMARY KEY,
+        product_name VARCHAR(200) NOT NULL,
+        sku VARCHAR(50) NOT NULL UNIQUE,
+        category VARCHAR(100),
+        current_stock_level INTEGER NOT NULL DEFAULT 0,
+        unit_cost NUMERIC(10, 2) NOT NULL,
+        selling_price NUMERIC(10, 2) NOT NULL,
+        reorder_point INTEGER NOT NULL DEFAULT 0
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS branch_inventory (
+        branch_id INTEGER NOT NULL REFERENCES branches (branch_id),
+        product_id INTEGER NOT NULL REFERENCES products (product_id),
+        current_stock_level INTEGER NOT NULL DEFAULT 0,
+        reorder_point INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (branch_id, product_id)
+    );
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS staff_schedules (
+        schedule_id SERIAL PRIMARY KEY,
+        employee_id INTEGER NOT NULL,
+        branch_id INTEGER NOT NULL,
+        shift_date DATE NOT NULL,
+        start_time TIME NOT NULL,
+        end_time TIME NOT NULL,
+        duration_hours NUMERIC(4, 2) NOT NULL
+    );
+    """,
+    # Toplu yükleme hızı için sales üzerinde yabancı anahtar tanımlanmaz
+    SALES_TABLE_SQL,
+    """
+    CREATE TABLE IF NOT EXISTS prediction_results (
+        prediction_id BIGSERIAL PRIMARY KEY,
+        branch_id INTEGER NOT NULL,
+        prediction_date DATE NOT NULL,
+        predicted_sales DOUBLE PRECISION NOT NULL,
+        lower_bound DOUBLE PRECISION,
+        upper_bound DOUBLE PRECISION,
+        prediction_run_time TIMESTAMP NOT NULL DEFAULT NOW(),
+        -- Yeni çalışmaya taşınan (yeniden eğitilmeyen) satırlarda tahminin asıl üretildiği çalışma
+        carried_from TIMESTAMP
+    );
+    """,
+    # Bu sütundan önce oluşturulmuş tablolar için
+    "ALTER TABLE prediction_results ADD COLUMN IF NOT EXISTS carried_from TIMESTAMP;",
+    CREATE_ROLLUP_SQL,
+    CREATE_WATERMARK_SQL,
+    ALTER_WATERMARK_SQL,
+    CREATE_DEMAND_SQL,
+    CREATE_METRICS_SQL,
+    CREATE_INVENTORY_WATERMARK_SQL,
+    CREATE_PLAN_SQL,
+]
+
+INDEXES_SQL = SALES_INDEXES_SQL + [
+    "CREATE INDEX IF NOT EXISTS employees_branch_idx ON employees (branch_id);",
+    "CREATE INDEX IF NOT EXISTS staff_schedules_branch_date_idx ON staff_schedules (branch_id, shift_date);",
+    # Dashboard'un son çalışma sorgusu ve artımlı modun şube başına son çalışma araması
+    "CREATE INDEX IF NOT EXISTS prediction_results_run_time_idx ON prediction_results (prediction_run_time);",
+    "CREATE INDEX IF NOT EXISTS prediction_results_branch_run_time_idx ON prediction_results (branch_id, prediction_run_time);",
+    CREATE_METRICS_INDEX_SQL,
+]
+
+# EXPLAIN kontrolünde sıralı taramanın sorun sayıldığı büyük tablolar (sales bölümleri dahil)
+LARGE_TABLES = ('sales', 'prediction_results', 'sales_daily', 'staff_schedules')
+SALES_PARTITION_PATTERN = re.compile(r"^sales_\d{4}_\d{2}$")
+
+# Yerleşik sorgular, scriptlerin kendi sorgu sabitleri/üreticileriyle örnek parametrelerle kurulur;
+# değer ya SQL metni ya da (SQL, parametreler) çiftidir (psycopg2 `%(isim)s` biçimi de kabul edilir)
+EXAMPLE_BRANCH_ID = 1
+EXAMPLE_PAGE = {'_limit': 50, '_offset': 0}
+
+
+def builtin_queries():
+    """Yerleşik sorguları örnek parametrelerle kurar.
+
+    Sorgu modülleri (tahmin motoru, dashboard sorguları...) sadece burada yüklenir; `create_schema`
+    kullanan yükleme scriptleri bu modüllere bağımlı olmaz.
+    """
+    from datetime import datetime
+
+    from chat_queries import chat_sql
+    from dashboard_queries import (FORECAST_HISTORY_ORDER_BY, LATEST_RUN_SQL, PREDICTIONS_SQL, STOCK_ORDER_BY,
+                                   critical_stock_query, forecast_history_query, stock_list_query, stock_summary_query)
+    from inventory_engine import APPLY_SQL, NEXT_BATCH_HIGH_SQL
+    from prediction_engine import (DAILY_SALES_BY_BRANCH_SQL, LATEST_RUN_BY_BRANCH_SQL, LATEST_SALE_BY_BRANCH_SQL,
+                                   daily_sales_sql, latest_predictions_sql)
+    from product_forecast import daily_units_sql
+    from result_tables import page_sql
+    from sales_rollup import FOLD_SQL, LATEST_SALE_SQL
+    from staffing_engine import LATEST_FORECASTS_SQL, current_staffing_sql, hourly_profiles_sql
+
+    branch_stock, branch_params = stock_list_query(EXAMPLE_BRANCH_ID)
+    total_stock, total_params = stock_list_query(0)
+    history_query, history_params = forecast_history_query(EXAMPLE_BRANCH_ID)
+    return {
+        'dashboard.get_latest_run_time': LATEST_RUN_SQL,
+        'dashboard.load_predictions': (PREDICTIONS_SQL, {'run_time': datetime(2024, 1, 1)}),
+        'dashboard.stock_list_query (şube, sayfa)': (page_sql(branch_stock, STOCK_ORDER_BY), dict(branch_params, **EXAMPLE_PAGE)),
+        'dashboard.stock_list_query (Genel Toplam, sayfa)': (page_sql(total_stock, STOCK_ORDER_BY), dict(total_params, **EXAMPLE_PAGE)),
+        'dashboard.load_stock_summary (şube)': stock_summary_query(EXAMPLE_BRANCH_ID),
+        'dashboard.load_stock_summary (Genel Toplam)': stock_summary_query(0),
+        'dashboard.load_critical_stock (şube)': critical_stock_query(EXAMPLE_BRANCH_ID),
+        'dashboard.forecast_history (sayfa)': (page_sql(history_query, FORECAST_HISTORY_ORDER_BY), dict(history_params, **EXAMPLE_PAGE)),
+        'chat.top_products (tüm şubeler)': chat_sql({'intent': 'top_products', 'days': 7, 'limit': 5}, 0),
+        'chat.top_products (şube)': chat_sql({'intent': 'top_products', 'days': 7, 'limit': 5}, EXAMPLE_BRANCH_ID),
+        'chat.total_revenue': chat_sql({'intent': 'total_revenue', 'days': 30}, EXAMPLE_BRANCH_ID),
+        'chat.low_stock': chat_sql({'intent': 'low_stock'}, EXAMPLE_BRANCH_ID),
+        'chat.forecast_summary': chat_sql({'intent': 'forecast_summary'}, EXAMPLE_BRANCH_ID),
+        'prediction_engine.get_data_for_prediction': daily_sales_sql(EXAMPLE_BRANCH_ID),
+        'prediction_engine.get_daily_sales_by_branch': DAILY_SALES_BY_BRANCH_SQL,
+        'prediction_engine.find_stale_branches (satış)': LATEST_SALE_BY_BRANCH_SQL,
+        'prediction_engine.find_stale_branches (çalışma)': LATEST_RUN_BY_BRANCH_SQL,
+        'prediction_engine.load_latest_predictions': latest_predictions_sql([0, EXAMPLE_BRANCH_ID]),
+        'product_forecast.get_daily_units_by_product': daily_units_sql(),
+        'sales_rollup.latest_sale': LATEST_SALE_SQL,
+        'sales_rollup.fold': (FOLD_SQL, {'low': 1_000_000, 'high': 1_050_000}),
+        'staffing_engine.get_hourly_profiles': hourly_profiles_sql(),
+        'staffing_engine.get_latest_forecasts': LATEST_FORECASTS_SQL,
+        'staffing_engine.get_current_staffing': current_staffing_sql(),
+        'inventory_engine.next_batch_high': (NEXT_BATCH_HIGH_SQL, {'low': 1_000_000, 'fence': 2_000_000, 'batch_size': 50_000}),
+        # Sadece EXPLAIN edilir (ANALYZE yok), UPDATE/INSERT çalıştırılmaz
+        'inventory_engine.apply_batch': (APPLY_SQL, {'low': 1_000_000, 'high': 1_050_000}),
+    }
+
+
+def create_db_engine():
+    return get_engine(application_name='schema')
+
+
+def create_schema(engine, analyze=False):
+    """Tüm tabloları ve indeksleri (yoksa) oluşturur."""
+    with engine.begin() as conn:
+        for statement in TABLES_SQL:
+            conn.execute(text(statement))
+        for statement in INDEXES_SQL:
+            conn.execute(text(statement))
+    print(f"-> Şema hazır: {len(TABLES_SQL)} tablo, {len(INDEXES_SQL)} indeks kontrol edildi.")
+
+    if analyze:
+        # Planlayıcının yeni indeksleri doğru değerlendirmesi için istatistikleri günceller
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as conn:
+            conn.execute(text("ANALYZE;"))
+        print("-> ANALYZE tamamlandı.")
+
+
+def explain_builtin_queries(engine, queries=None):
+    """Her yerleşik sorgunun EXPLAIN planını yazdırır; büyük tablolarda Seq Scan yapanları döndürür."""
+    queries = queries or builtin_queries()
+    flagged = []
+    with engine.connect() as conn:
+        for name, query in queries.items():
+            query, params = query if isinstance(query, tuple) else (query, {})
+            query = re.sub(r"%\((\w+)\)s", r":\1", query)
+            plan_lines = [row[0] for row in conn.execute(text(f"EXPLAIN {query}"), params)]
+            scanned = re.findall(r"Scan (?:Backward )?(?:using \S+ )?on (\w+)", "\n".join(plan_lines))
+            seq_scans = [
+                table for table in re.findall(r"Seq Scan on (\w+)", "\n".join(plan_lines))
+                if table in LARGE_TABLES or SALES_PARTITION_PATTERN.match(table)
+            ]
+            partitions = sorted({table for table in scanned if SALES_PARTITION_PATTERN.match(table)})
+            status = "!!! SEQ SCAN" if seq_scans else "OK"
+            print(f"\n=== {name} [{status}] ===")
+            print("\n".join(plan_lines))
+            if partitions:
+                print(f"-> Taranan sales bölümü: {len(partitions)} ({partitions[0]} .. {partitions[-1]})")
+            if seq_scans:
+                flagged.append(name)
+
+    print("\n================================================")
+    if flagged:
+        print(f"!!! {len(flagged)} sorgu büyük tablolarda sıralı tarama yapıyor: {', '.join(flagged)}")
+    else:
+        print("✅ Hiçbir yerleşik sorgu büyük tablolarda sıralı tarama yapmıyor.")
+    return flagged
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Veritabanı şemasını ve indekslerini oluşturur / sorgu planlarını kontrol eder.")
+    parser.add_argument('--explain', action='store_true', help="Şemayı oluşturduktan sonra yerleşik sorguların EXPLAIN planlarını yazdırır.")
+    parser.add_argument('--analyze', action='store_true', help="Şemayı oluşturduktan sonra ANALYZE çalıştırır.")
+    args = parser.parse_args()
+
+    engine = create_db_engine()
+    create_schema(engine, analyze=args.analyze)
+    if args.explain:
+        explain_builtin_queries(engine)
@@ -1,25 +1,38 @@
+import argparse
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
 import psycopg2
 from psycopg2 import sql
+import numpy as np
 import pandas as pd
 from faker import Faker
+from sqlalchemy import text
 import random
 from datetime import datetime, timedelta
-from sqlalchemy import create_engine
+
+from bulk_loader import DEFAULT_CHUNK_SIZE, bulk_load, copy_to_table, print_load_report
+from db_config import get_engine
+from inventory_engine import reset_inventory_watermark
+from run_metrics import RunMetrics
+from sales_rollup import refresh_sales_daily
+from parquet_store import iter_sales_frames, sales_date_range
+from partitions import create_upcoming_partitions, ensure_sales_partitions, load_sales
+from schema import create_schema
 
 FAKE = Faker('tr_TR')
 
+SALES_COLUMNS = ['sale_datetime', 'branch_id', 'product_id', 'quantity', 'unit_price_at_sale', 'total_sale_amount', 'employee_id']
+
 # ----------------- 1. YAPILANDIRMA AYARLARI -----------------
-DB_HOST = "localhost"
-DB_NAME = "postgres" 
-DB_USER = "postgres"
-DB_PASS = "Sudem12345" 
+# Bağlantı ve havuz ayarları db_config.py üzerinden ortam değişkenlerinden/INI dosyasından okunur
 
 # ----------------- 2. VERITABANI MOTORU OLUŞTURMA -----------------
 def create_db_engine():
     """SQLAlchemy motoru (engine) oluşturur."""
     try:
-        engine_url = f"postgresql+psycopg2://{DB_USER}:{DB_PASS}@{DB_HOST}:5432/{DB_NAME}"
-        engine = create_engine(engine_url)
+        engine = get_engine(application_name='seed_data')
         print("\n[BAŞARILI] SQLAlchemy Motoru oluşturuldu.")
         with engine.connect() as conn:
             conn.close()
@@ -98,22 +111,10 @@ def generate_branch_inventory(engine):
     branches = pd.read_sql_table('branches', engine, schema='public', columns=['branch_id'])
     products = pd.read_sql_table('products', engine, schema='public', columns=['product_id', 'reorder_point'])
     
-    inventory_list = []
-    
-    for branch_id in branches['branch_id']:
-        for index, row in products.iterrows():
-            product_id = row['product_id']
-            stock = random.randint(10, 150)
-            
-            inventory_list.append({
-                'branch_id': branch_id,
-                'product_id': product_id,
-                'current_stock_level': stock,
-                'reorder_point': row['reorder_point']
-            })
-
-    inventory_df = pd.DataFrame(inventory_list)
-    return inventory_df
+    # Şube x ürün çapraz birleşimi; stoklar tek seferde vektörel olarak üretilir
+    inventory_df = branches.merge(products, how='cross')
+    inventory_df['current_stock_level'] = np.random.randint(10, 151, size=len(inventory_df))
+    return inventory_df[['branch_id', 'product_id', 'current_stock_level', 'reorder_point']]
 
 
 def generate_staff_schedules(conn, cursor):
@@ -152,117 +153,350 @@ def generate_staff_schedules(conn, cursor):
     cursor.execute("TRUNCATE staff_schedules RESTART IDENTITY;")
     conn.commit()
     
-    # Yeni verileri ekle
-    insert_query = """
-    INSERT INTO staff_schedules (employee_id, branch_id,shift_date, start_time, end_time,duration_hours) 
-    VALUES (%s, %s, %s, %s, %s, %s);
-    """
-    cursor.executemany(insert_query, schedule_data)
+    # Yeni verileri COPY ile ekle
+    rows, elapsed = copy_to_table(
+        cursor, schedule_data, 'staff_schedules',
+        columns=['employee_id', 'branch_id', 'shift_date', 'start_time', 'end_time', 'duration_hours']
+    )
     conn.commit()
+    print_load_report('staff_schedules', rows, elapsed)
     print(f"[SUCCESS] {len(schedule_data)} adet detaylı personel vardiya kaydı oluşturuldu.")
 
 
 # -------belirli tarih aralıgında rastgele satış verileri
 
-def generate_sales_data(engine, start_date, end_date, sales_per_day_per_branch=150):
-    """Belirli bir tarih aralığında rastgele satış verileri üretir ve yükler."""
-    
+def build_sales_context(engine):
+    """Satış simülasyonu için şube, ürün ve personel tablolarını NumPy dizilerine çevirir."""
     branches_in_db = pd.read_sql_table('branches', engine, schema='public', columns=['branch_id'])
     products_in_db = pd.read_sql_table('products', engine, schema='public', columns=['product_id', 'selling_price', 'unit_cost'])
     employees_in_db = pd.read_sql_table('employees', engine, schema='public', columns=['employee_id', 'branch_id'])
-    
-    sales_list = []
-    current_date = start_date
-    
-    branch_ids = branches_in_db['branch_id'].tolist()
-    product_ids = products_in_db['product_id'].tolist()
-    
-    print(f"\n-> Satış hareketleri simülasyonu başlatılıyor ({start_date} - {end_date})...")
 
+    # Personeli şubeye göre sıralayıp her şube için (başlangıç, adet) ofsetlerini tek seferde çıkarıyoruz
+    employees_sorted = employees_in_db.sort_values(['branch_id', 'employee_id'], kind='stable')
+    counts_by_branch = employees_sorted.groupby('branch_id').size()
+
+    # Personeli olmayan şubeler eskisi gibi simülasyona dahil edilmez
+    branch_ids = np.array([b for b in branches_in_db['branch_id'] if b in counts_by_branch.index], dtype=np.int64)
+    emp_counts = counts_by_branch.reindex(branch_ids).to_numpy(dtype=np.int64)
+    emp_offsets = np.searchsorted(employees_sorted['branch_id'].to_numpy(), branch_ids).astype(np.int64)
+
+    return {
+        'branch_ids': branch_ids,
+        'product_ids': products_in_db['product_id'].to_numpy(dtype=np.int64),
+        'prices': products_in_db['selling_price'].to_numpy(dtype=np.float64),
+        'employee_ids': employees_sorted['employee_id'].to_numpy(dtype=np.int64),
+        'emp_offsets': emp_offsets,
+        'emp_counts': emp_counts,
+    }
+
+
+def generate_sales_block(context, rng, block_start, num_days, sales_per_day_per_branch=150):
+    """`block_start`'tan itibaren `num_days` günlük bloğun tüm satışlarını tek seferde sütun dizileri olarak üretir."""
+    branch_ids = context['branch_ids']
+    rows_per_day = len(branch_ids) * sales_per_day_per_branch
+    n = num_days * rows_per_day
+
+    # Satır sırası eski döngüyle aynı: gün -> şube -> satış
+    day_idx = np.repeat(np.arange(num_days), rows_per_day)
+    branch_idx = np.tile(np.repeat(np.arange(len(branch_ids)), sales_per_day_per_branch), num_days)
+
+    product_idx = rng.integers(0, len(context['product_ids']), size=n)
+    # 08:00:00 - 22:59:59 arası saniye (saat 8-22, dakika/saniye 0-59 ile aynı dağılım)
+    seconds = rng.integers(8 * 3600, 23 * 3600, size=n)
+    quantity = rng.integers(1, 6, size=n)
+    emp_pick = rng.integers(0, context['emp_counts'][branch_idx])
+
+    unit_price = context['prices'][product_idx]
+    sale_datetime = (
+        np.datetime64(block_start, 's')
+        + (day_idx * 86400 + seconds).astype('timedelta64[s]')
+    )
+
+    return pd.DataFrame({
+        'sale_datetime': sale_datetime,
+        'branch_id': branch_ids[branch_idx],
+        'product_id': context['product_ids'][product_idx],
+        'quantity': quantity,
+        'unit_price_at_sale': unit_price,
+        'total_sale_amount': np.round(quantity * unit_price, 2),
+        'employee_id': context['employee_ids'][context['emp_offsets'][branch_idx] + emp_pick],
+    })
+
+
+def iter_sales_blocks(context, start_date, end_date, sales_per_day_per_branch=150, rng=None, block_days=31):
+    """Tarih aralığını `block_days` günlük bloklara bölerek satış DataFrame'leri üretir."""
+    rng = rng if rng is not None else np.random.default_rng()
+    if len(context['branch_ids']) == 0:
+        return
+
+    current_date = start_date
     while current_date <= end_date:
-        for branch_id in branch_ids:
-            employees_at_branch = employees_in_db[employees_in_db['branch_id'] == branch_id]['employee_id'].tolist()
-            
-            if not employees_at_branch:
-                continue 
-            
-            for _ in range(sales_per_day_per_branch):
-                product_row = products_in_db.sample(n=1).iloc[0]
-                
-                sale_time = datetime(current_date.year, current_date.month, current_date.day, 
-                                     random.randint(8, 22), random.randint(0, 59), random.randint(0, 59))
-                
-                quantity = random.randint(1, 5)
-                unit_price = product_row['selling_price']
-                total_amount = round(quantity * unit_price, 2)
-                
-                sales_list.append({
-                    'sale_datetime': sale_time,
-                    'branch_id': branch_id,
-                    'product_id': product_row['product_id'],
-                    'quantity': quantity,
-                    'unit_price_at_sale': unit_price,
-                    'total_sale_amount': total_amount,
-                    'employee_id': random.choice(employees_at_branch)
-                })
-        
-        current_date += timedelta(days=1)
-    
-    sales_df = pd.DataFrame(sales_list)
-    return sales_df
+        num_days = min(block_days, (end_date - current_date).days + 1)
+        yield generate_sales_block(context, rng, current_date, num_days, sales_per_day_per_branch)
+        current_date += timedelta(days=num_days)
 
 
-# ----------------- 4. ANA ÇALIŞTIRMA BLOĞU -----------------
-def load_data(engine, df, table_name):
-    """Veriyi veritabanına yükler ve sonucu yazdırır."""
+def iter_sales_chunks(context, start_date, end_date, sales_per_day_per_branch=150, rng=None, chunk_rows=100_000):
+    """Satışları tam `chunk_rows` satırlık (sonuncusu hariç) DataFrame parçaları halinde üretir."""
+    rows_per_day = max(len(context['branch_ids']) * sales_per_day_per_branch, 1)
+    block_days = max(1, chunk_rows // rows_per_day)
+
+    pending = []
+    pending_rows = 0
+    for block in iter_sales_blocks(context, start_date, end_date, sales_per_day_per_branch, rng=rng, block_days=block_days):
+        pending.append(block)
+        pending_rows += len(block)
+        while pending_rows >= chunk_rows:
+            merged = pd.concat(pending, ignore_index=True)
+            yield merged.iloc[:chunk_rows].reset_index(drop=True)
+            rest = merged.iloc[chunk_rows:]
+            pending = [rest] if len(rest) else []
+            pending_rows = len(rest)
+
+    if pending_rows:
+        yield pd.concat(pending, ignore_index=True)
+
+
+_STREAM_END = object()
+
+
+def _put_until_stopped(sales_queue, item, stop_event):
+    """Kuyruk doluysa bekler; tüketici durduysa üretimi bırakır."""
+    while not stop_event.is_set():
+        try:
+            sales_queue.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _produce_sales_chunks(chunks, sales_queue, stop_event):
+    """Üretici thread: parçaları sınırlı kuyruğa yazar, hata olursa tüketiciye iletir."""
     try:
-        df.to_sql(table_name, engine, schema='public', if_exists='append', index=False)
-        print(f"-> {len(df)} adet {table_name} verisi başarıyla yüklendi.")
-        return True
+        for chunk in chunks:
+            if not _put_until_stopped(sales_queue, chunk, stop_event):
+                return
     except Exception as e:
-        if "duplicate key value violates unique constraint" in str(e):
-             print(f"!!! [YÜKLEME HATASI] '{table_name}' zaten dolu. Yeni veri yüklenmedi.")
-        else:
-            print(f"!!! [YÜKLEME HATASI] '{table_name}' tablosuna yükleme başarısız: {e}")
+        _put_until_stopped(sales_queue, e, stop_event)
+    finally:
+        _put_until_stopped(sales_queue, _STREAM_END, stop_event)
+
+
+def _drain_sales_queue(sales_queue):
+    """Tüketici tarafı: kuyruktaki parçaları sırayla verir, üretici hatasını yeniden fırlatır."""
+    while True:
+        item = sales_queue.get()
+        if item is _STREAM_END:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def stream_sales_to_db(engine, start_date, end_date, sales_per_day_per_branch=150, seed=None,
+                       chunk_rows=100_000, queue_size=4, context=None):
+    """Satışları üretirken eş zamanlı olarak COPY ile yükler (sabit bellek kullanımı).
+
+    Bir üretici thread parçaları `queue_size` ile sınırlı kuyruğa koyar, ana thread ise
+    kuyruktan okuyarak veritabanına yazar; bellekte en fazla `queue_size + 2` parça bulunur.
+    """
+    context = context if context is not None else build_sales_context(engine)
+    rng = np.random.default_rng(seed)
+    chunks = iter_sales_chunks(context, start_date, end_date, sales_per_day_per_branch, rng=rng, chunk_rows=chunk_rows)
+
+    print(f"\n-> Satış hareketleri akış modunda üretiliyor ({start_date} - {end_date}, parça: {chunk_rows} satır)...")
+
+    sales_queue = queue.Queue(maxsize=queue_size)
+    stop_event = threading.Event()
+    producer = threading.Thread(target=_produce_sales_chunks, args=(chunks, sales_queue, stop_event), daemon=True)
+    producer.start()
+    try:
+        return load_sales(engine, _drain_sales_queue(sales_queue), chunk_size=chunk_rows)
+    finally:
+        stop_event.set()
+        producer.join()
+
+
+def split_date_range(start_date, end_date, num_shards):
+    """Tarih aralığını neredeyse eşit gün sayılı, ardışık (başlangıç, bitiş) parçalarına böler."""
+    total_days = (end_date - start_date).days + 1
+    num_shards = max(1, min(num_shards, total_days))
+    base_days, extra_days = divmod(total_days, num_shards)
+
+    shards = []
+    current_date = start_date
+    for i in range(num_shards):
+        days = base_days + (1 if i < extra_days else 0)
+        shards.append((current_date, current_date + timedelta(days=days - 1)))
+        current_date += timedelta(days=days)
+    return shards
+
+
+def subset_sales_context(context, branch_positions):
+    """Satış bağlamını verilen şube pozisyonlarıyla sınırlar (şube bazlı parçalama için)."""
+    subset = dict(context)
+    for key in ('branch_ids', 'emp_offsets', 'emp_counts'):
+        subset[key] = context[key][branch_positions]
+    return subset
+
+
+def _seed_sales_shard(shard_index, shard_start, shard_end, context, sales_per_day_per_branch, seed_seq, chunk_rows):
+    """İşçi süreç: kendi bağlantısı ve RNG'si ile tek bir parçayı üretip yükler."""
+    engine = create_db_engine()
+    if engine is None:
+        return shard_index, False
+    try:
+        ok = stream_sales_to_db(engine, shard_start, shard_end, sales_per_day_per_branch, seed=seed_seq,
+                                chunk_rows=chunk_rows, context=context)
+    finally:
+        engine.dispose()
+    return shard_index, ok
+
+
+def seed_sales_parallel(engine, start_date, end_date, sales_per_day_per_branch=150, seed=None,
+                        workers=4, split_by='date', chunk_rows=100_000):
+    """Satış üretimini tarih aralığına veya şube listesine göre parçalayıp süreç havuzunda yükler.
+
+    Her parça kendi deterministik RNG tohumunu (`SeedSequence.spawn`) ve kendi veritabanı
+    bağlantısını kullanır; parçalar birbirinden bağımsız olarak yüklenir.
+    """
+    context = build_sales_context(engine)
+
+    if split_by == 'branch':
+        positions = np.array_split(np.arange(len(context['branch_ids'])), workers)
+        shards = [(subset_sales_context(context, pos), start_date, end_date) for pos in positions if len(pos)]
+    else:
+        shards = [(context, shard_start, shard_end) for shard_start, shard_end in split_date_range(start_date, end_date, workers)]
+
+    seed_seqs = np.random.SeedSequence(seed).spawn(len(shards))
+
+    print(f"\n-> Paralel satış üretimi: {len(shards)} parça, {workers} süreç ({split_by} bazlı)...")
+    started = datetime.now()
+
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_seed_sales_shard, i, shard_start, shard_end, shard_context,
+                            sales_per_day_per_branch, seed_seqs[i], chunk_rows)
+            for i, (shard_context, shard_start, shard_end) in enumerate(shards)
+        ]
+        for future in as_completed(futures):
+            try:
+                shard_index, ok = future.result()
+            except Exception as e:
+                print(f"!!! [PARÇA HATASI] Satış parçası yüklenemedi: {e}")
+                continue
+            results[shard_index] = ok
+
+    failed = [i for i in range(len(shards)) if not results.get(i)]
+    elapsed = (datetime.now() - started).total_seconds()
+    if failed:
+        print(f"!!! [UYARI] {len(failed)} parça yüklenemedi: {failed}")
+    print(f"-> Paralel satış yüklemesi tamamlandı ({elapsed:.1f} sn).")
+    return not failed
+
+
+def generate_sales_data(engine, start_date, end_date, sales_per_day_per_branch=150, seed=None):
+    """Belirli bir tarih aralığında rastgele satış verileri üretir (aynı `seed` aynı veriyi verir)."""
+    context = build_sales_context(engine)
+    rng = np.random.default_rng(seed)
+
+    print(f"\n-> Satış hareketleri simülasyonu başlatılıyor ({start_date} - {end_date})...")
+
+    blocks = list(iter_sales_blocks(context, start_date, end_date, sales_per_day_per_branch, rng=rng))
+    if not blocks:
+        return pd.DataFrame(columns=SALES_COLUMNS)
+
+    sales_df = pd.concat(blocks, ignore_index=True)
+    return sales_df
+
+
+def load_sales_from_parquet(engine, parquet_dir, chunk_rows=DEFAULT_CHUNK_SIZE):
+    """Satışları üretmek yerine Parquet kopyasından (bkz. parquet_store.py) geri yükler.
+
+    `sale_id` değerleri korunur; yükleme sonrası sıra (sequence) en büyük `sale_id`'ye ilerletilir.
+    """
+    first_month, last_month = sales_date_range(parquet_dir)
+    if first_month is None:
+        print(f"!!! [UYARI] '{parquet_dir}' altında Parquet dosyası bulunamadı; satış yüklenmedi.")
         return False
 
+    print(f"\n-> Satışlar Parquet kopyasından yükleniyor ({parquet_dir}, {first_month} - {last_month})...")
+    ensure_sales_partitions(engine, first_month, last_month)
+    ok = load_sales(engine, iter_sales_frames(parquet_dir), chunk_size=chunk_rows)
+    if ok:
+        with engine.begin() as conn:
+            conn.execute(text("SELECT setval(pg_get_serial_sequence('sales', 'sale_id'), COALESCE((SELECT MAX(sale_id) FROM sales), 0) + 1, false);"))
+    return ok
+
+
+# ----------------- 4. ANA ÇALIŞTIRMA BLOĞU -----------------
+def load_data(engine, df, table_name, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Veriyi COPY ile parça parça veritabanına yükler ve sonucu yazdırır."""
+    return bulk_load(engine, df, table_name, chunk_size=chunk_size)
+
 if __name__ == "__main__":
-    
+
+    parser = argparse.ArgumentParser(description="Akıllı Şube simülasyon verisini üretir ve veritabanına yükler.")
+    parser.add_argument('--seed', type=int, default=None, help="Satış üretimi için rastgelelik tohumu (tekrarlanabilir veri).")
+    parser.add_argument('--stream', action='store_true', help="Satışları parça parça üretip eş zamanlı yükler (sabit bellek).")
+    parser.add_argument('--chunk-rows', type=int, default=100_000, help="Akış modunda parça başına satır sayısı.")
+    parser.add_argument('--queue-size', type=int, default=4, help="Akış modunda üretici ile yükleyici arasındaki kuyruk boyu.")
+    parser.add_argument('--workers', type=int, default=1, help="1'den büyükse satışlar bu kadar süreçte paralel üretilip yüklenir.")
+    parser.add_argument('--split', choices=['date', 'branch'], default='date', help="Paralel modda parçalama ekseni.")
+    parser.add_argument('--from-parquet', default=None, help="Verilirse satışlar üretilmez, bu Parquet kopyasından yüklenir.")
+    parser.add_argument('--memory-metrics', action='store_true', help="Aşama ölçümlerinde tracemalloc ile Python yığın tepesini de ölçer (toplu yüklemeyi yavaşlatır).")
+    args = parser.parse_args()
+
     engine = create_db_engine()
     
     if engine is None:
         print("\n[DURDURULDU] Motor hatası nedeniyle veri üretimi başlatılamadı.")
     else:
         print("\n-> BAĞLANTI BAŞARILI. Veri üretimi ve yükleme başlıyor...")
+
+        # Aşama süreleri çalışma sonunda 'run_metrics' tablosuna yazılır
+        # tracemalloc her ayırmayı izler; milyonlarca satırlık üretimde varsayılan olarak kapalıdır
+        metrics = RunMetrics('seed_data', track_memory=args.memory_metrics)
+
+        # 0. ŞEMA (tablolar ve indeksler yoksa oluşturulur)
+        with metrics.stage('schema'):
+            create_schema(engine)
         
         # 1. ŞUBE VERİSİ YÜKLEMESİ
         branches_df = generate_branch_data(num_branches=5)
-        load_data(engine, branches_df, 'branches')
+        with metrics.stage('branches', rows=len(branches_df)):
+            load_data(engine, branches_df, 'branches')
         
         # 2. PERSONEL VERİSİ YÜKLEMESİ
         try:
             branches_in_db = pd.read_sql_table('branches', engine, schema='public', columns=['branch_id'])
             employees_df = generate_employee_data(branches_df=branches_in_db, num_employees_per_branch=8)
-            load_data(engine, employees_df, 'employees')
+            with metrics.stage('employees', rows=len(employees_df)):
+                load_data(engine, employees_df, 'employees')
             
         except Exception as e:
              print(f"!!! [VERİ OKUMA HATASI] Employees yüklenemedi. Önce branches tablosu dolu olmalı: {e}")
 
         # 3. ÜRÜN VERİSİ YÜKLEMESİ
         products_df = generate_product_data(num_products=100)
-        load_data(engine, products_df, 'products')
+        with metrics.stage('products', rows=len(products_df)):
+            load_data(engine, products_df, 'products')
         
         # YENİ EKLENECEK KISIM: BRANCH INVENTORY YÜKLEMESİ
         try:
-            inventory_df = generate_branch_inventory(engine)
-            load_data(engine, inventory_df, 'branch_inventory') # branch_inventory tablosuna yükle
+            with metrics.stage('branch_inventory') as stage:
+                inventory_df = generate_branch_inventory(engine)
+                stage.rows = len(inventory_df)
+                load_data(engine, inventory_df, 'branch_inventory') # branch_inventory tablosuna yükle
         except Exception as e:
             print(f"!!! [YÜKLEME HATASI] 'branch_inventory' yüklenemedi: {e}")
 
         # 4. VARDİYA PLANLAMA VERİSİ YÜKLEMESİ (psycopg2 ile)
         try:
             # SQLAlchemy engine'den psycopg2 bağlantı nesnesi alıyoruz
-            with engine.connect() as connection:
+            with metrics.stage('staff_schedules'), engine.connect() as connection:
                 psycopg2_conn = connection.connection
                 with psycopg2_conn.cursor() as cursor:
                     generate_staff_schedules(psycopg2_conn, cursor)
@@ -275,7 +509,38 @@ if __name__ == "__main__":
         # Bu kısım sadece tek seferlik çalıştırılmalıdır (5M kayıt içerir)
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=1095)
-        sales_df = generate_sales_data(engine, start_date, end_date, sales_per_day_per_branch=150)
-        load_data(engine, sales_df, 'sales')
+        # Aylık sales bölümleri önceden hazırlanır (paralel işçiler bölüm oluşturmaz)
+        ensure_sales_partitions(engine, start_date, end_date)
+        create_upcoming_partitions(engine)
+        if args.from_parquet:
+            with metrics.stage('sales'):
+                load_sales_from_parquet(engine, args.from_parquet, chunk_rows=args.chunk_rows)
+        elif args.workers > 1:
+            with metrics.stage('sales'):
+                seed_sales_parallel(engine, start_date, end_date, sales_per_day_per_branch=150, seed=args.seed,
+                                    workers=args.workers, split_by=args.split, chunk_rows=args.chunk_rows)
+        elif args.stream:
+            with metrics.stage('sales'):
+                stream_sales_to_db(engine, start_date, end_date, sales_per_day_per_branch=150, seed=args.seed,
+                                   chunk_rows=args.chunk_rows, queue_size=args.queue_size)
+        else:
+            with metrics.stage('generate_sales') as stage:
+                sales_df = generate_sales_data(engine, start_date, end_date, sales_per_day_per_branch=150, seed=args.seed)
+                stage.rows = len(sales_df)
+            with metrics.stage('sales', rows=len(sales_df)):
+                load_sales(engine, sales_df)
+
+        # Yüklenen geçmiş satışlar stoğa yansımış sayılır; envanter motoru bundan sonraki satışları düşer
+        reset_inventory_watermark(engine)
+
+        # 6. GÜNLÜK SATIŞ ÖZETİ (sales_daily) GÜNCELLEMESİ
+        try:
+            with metrics.stage('sales_daily') as stage:
+                stage.rows = refresh_sales_daily(engine)
+        except Exception as e:
+            print(f"!!! [YÜKLEME HATASI] 'sales_daily' özet tablosu güncellenemedi: {e}")
+
+        metrics.print_summary()
+        metrics.flush(engine)
 
         print("\n[TAMAMLANDI] Tüm işlemler bitti. Artık dashboard'u çalıştırabilirsiniz!")
\ No newline at end of file
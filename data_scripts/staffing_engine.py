@@ -0,0 +1,241 @@
+"""
+Saatlik satış profillerine dayalı, tüm şubeleri birlikte hesaplayan personel planlayıcı:
+- Son `history_weeks` haftanın satışları (şube x haftanın günü x saat) ciro profiline çevrilir
+- En son 7 günlük şube tahminleri bu profille saatlere dağıtılır
+- Her saat için gereken personel `ceil(saatlik ciro / personel başına saatlik ciro hedefi)` olur;
+  `staff_schedules` ile aynı iki vardiya (09-17 sabah, 13-21 akşam) için en az personel sayısı
+  (vardiya dışındaki saatler en yakın vardiyaya, 13-17 örtüşmesi iki vardiyanın toplamına düşer)
+  tüm şube ve günler için dizi işlemleriyle bulunur
+- Sonuç `staffing_plan` tablosuna yazılır; dashboard her yenilemede hesaplamak yerine buradan okur
+
+Kullanım:
+    python staffing_engine.py --history-weeks 12 --target-sales-per-staff-hour 3000
+"""
+
+import argparse
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from bulk_loader import copy_to_table, print_load_report
+from db_config import get_engine
+from sales_rollup import LATEST_SALE_SQL
+
+PLAN_TABLE = 'staffing_plan'
+
+# staff_schedules ile aynı vardiyalar: (başlangıç, bitiş) saatleri
+SHIFTS = (('09:00:00', '17:00:00'), ('13:00:00', '21:00:00'))
+# Saat dilimleri: [0, 13) sadece sabah, [13, 17) iki vardiya birlikte, [17, 24) sadece akşam vardiyası karşılar
+OVERLAP_START, OVERLAP_END = 13, 17
+
+DEFAULT_TARGET_SALES_PER_STAFF_HOUR = 3000
+DEFAULT_MIN_STAFF_PER_SHIFT = 2
+DEFAULT_HISTORY_WEEKS = 12
+
+CREATE_PLAN_SQL = f"""
+CREATE TABLE IF NOT EXISTS {PLAN_TABLE} (
+    branch_id INTEGER NOT NULL,
+    plan_date DATE NOT NULL,
+    start_time TIME NOT NULL,
+    end_time TIME NOT NULL,
+    required_staff INTEGER NOT NULL,
+    current_staff NUMERIC(6, 2),
+    expected_sales NUMERIC(14, 2) NOT NULL,
+    peak_hour_sales NUMERIC(14, 2) NOT NULL,
+    plan_run_time TIMESTAMP NOT NULL,
+    PRIMARY KEY (branch_id, plan_date, start_time)
+);
+"""
+
+PLAN_COLUMNS = ['branch_id', 'plan_date', 'start_time', 'end_time', 'required_staff', 'current_staff',
+                'expected_sales', 'peak_hour_sales', 'plan_run_time']
+
+
+def create_db_engine():
+    return get_engine(application_name='staffing_engine')
+
+
+def hourly_profiles_sql(history_weeks=DEFAULT_HISTORY_WEEKS):
+    """Son `history_weeks` haftanın şube x haftanın günü x saat ciro sorgusu."""
+    return f"""
+    SELECT
+        branch_id,
+        EXTRACT(ISODOW FROM sale_datetime)::INT - 1 AS dow,
+        EXTRACT(HOUR FROM sale_datetime)::INT AS hour,
+        SUM(total_sale_amount) AS amount
+    FROM sales
+    WHERE sale_datetime >= DATE(({LATEST_SALE_SQL})) - INTERVAL '{int(history_weeks) * 7 - 1} days'
+    GROUP BY 1, 2, 3;
+    """
+
+
+# En son tahmin çalışmasının şube bazlı günlük tahminleri
+LATEST_FORECASTS_SQL = """
+SELECT branch_id, prediction_date, predicted_sales
+FROM prediction_results
+WHERE prediction_run_time = (SELECT MAX(prediction_run_time) FROM prediction_results)
+  AND branch_id > 0
+ORDER BY branch_id, prediction_date;
+"""
+
+
+def current_staffing_sql(history_weeks=DEFAULT_HISTORY_WEEKS):
+    """`staff_schedules`'tan şube x gün x vardiya başlangıcı ortalama kadro sorgusu."""
+    return f"""
+    SELECT branch_id, EXTRACT(ISODOW FROM shift_date)::INT - 1 AS dow, start_time::TEXT AS start_time,
+           COUNT(*)::FLOAT / COUNT(DISTINCT shift_date) AS staff
+    FROM staff_schedules
+    WHERE shift_date >= CURRENT_DATE - INTERVAL '{int(history_weeks) * 7} days'
+    GROUP BY 1, 2, 3;
+    """
+
+
+def get_hourly_profiles(engine, history_weeks=DEFAULT_HISTORY_WEEKS):
+    """Son `history_weeks` haftanın cirosunu (branch_id, dow, hour, amount) olarak tek sorguda toplar (dow: 0=Pazartesi)."""
+    return pd.read_sql(hourly_profiles_sql(history_weeks), engine)
+
+
+def get_latest_forecasts(engine):
+    """En son tahmin çalışmasının şube bazlı (branch_id > 0) günlük tahminlerini çeker."""
+    df = pd.read_sql(LATEST_FORECASTS_SQL, engine)
+    df['prediction_date'] = pd.to_datetime(df['prediction_date'])
+    return df
+
+
+def get_current_staffing(engine, history_weeks=DEFAULT_HISTORY_WEEKS):
+    """`staff_schedules`'taki ortalama vardiya kadrosunu (branch_id, dow, start_time, staff) olarak çeker."""
+    return pd.read_sql(current_staffing_sql(history_weeks), engine)
+
+
+def _profile_shares(profile_df, branch_ids):
+    """(şube x gün x saat) ciro payları; her (şube, gün) satırının toplamı 1'dir.
+
+    Geçmişi olmayan şube/günler için vardiya saatlerine eşit dağılım kullanılır.
+    """
+    index = {branch_id: i for i, branch_id in enumerate(branch_ids)}
+    amounts = np.zeros((len(branch_ids), 7, 24))
+    known = profile_df[profile_df['branch_id'].isin(index)]
+    rows = known['branch_id'].map(index).to_numpy()
+    np.add.at(amounts, (rows, known['dow'].to_numpy(), known['hour'].to_numpy()), known['amount'].to_numpy(dtype=np.float64))
+
+    uniform = np.zeros(24)
+    uniform[int(SHIFTS[0][0][:2]):int(SHIFTS[1][1][:2])] = 1.0
+    uniform /= uniform.sum()
+
+    totals = amounts.sum(axis=2, keepdims=True)
+    return np.where(totals > 0, amounts / np.where(totals > 0, totals, 1.0), uniform)
+
+
+def build_staffing_plan(forecast_df, profile_df, current_df=None,
+                        target_sales_per_staff_hour=DEFAULT_TARGET_SALES_PER_STAFF_HOUR,
+                        min_staff_per_shift=DEFAULT_MIN_STAFF_PER_SHIFT):
+    """Tüm şube ve günler için vardiya başına gereken personeli tek seferde hesaplar (DB'ye dokunmaz)."""
+    if forecast_df.empty:
+        return pd.DataFrame(columns=PLAN_COLUMNS[:-1])
+
+    branch_ids = np.sort(forecast_df['branch_id'].unique())
+    dates = np.sort(forecast_df['prediction_date'].unique())
+    branch_pos = np.searchsorted(branch_ids, forecast_df['branch_id'].to_numpy())
+    date_pos = np.searchsorted(dates, forecast_df['prediction_date'].to_numpy())
+
+    # (şube x gün) günlük tahmin ve (şube x gün x saat) beklenen ciro
+    daily = np.zeros((len(branch_ids), len(dates)))
+    daily[branch_pos, date_pos] = np.clip(forecast_df['predicted_sales'].to_numpy(dtype=np.float64), 0, None)
+    dows = pd.DatetimeIndex(dates).dayofweek.to_numpy()
+    hourly = daily[:, :, None] * _profile_shares(profile_df, branch_ids)[:, dows, :]
+
+    need = np.ceil(hourly / target_sales_per_staff_hour)
+    morning = need[:, :, :OVERLAP_START].max(axis=2)
+    evening = need[:, :, OVERLAP_END:].max(axis=2)
+    # Örtüşme saatlerinde iki vardiyanın toplamı yetmiyorsa eksik iki vardiyaya paylaştırılır
+    deficit = np.clip(need[:, :, OVERLAP_START:OVERLAP_END].max(axis=2) - morning - evening, 0, None)
+    morning = np.maximum(morning + np.ceil(deficit / 2), min_staff_per_shift)
+    evening = np.maximum(evening + np.floor(deficit / 2), min_staff_per_shift)
+
+    # Örtüşme cirosu vardiyalar arasında yarı yarıya paylaştırılır
+    overlap_sales = hourly[:, :, OVERLAP_START:OVERLAP_END].sum(axis=2) / 2
+    shift_sales = (hourly[:, :, :OVERLAP_START].sum(axis=2) + overlap_sales,
+                   hourly[:, :, OVERLAP_END:].sum(axis=2) + overlap_sales)
+    shift_peaks = (hourly[:, :, :OVERLAP_END].max(axis=2), hourly[:, :, OVERLAP_START:].max(axis=2))
+
+    frames = []
+    grid_branch, grid_date = np.meshgrid(branch_ids, dates, indexing='ij')
+    for (start, end), required, sales, peak in zip(SHIFTS, (morning, evening), shift_sales, shift_peaks):
+        frames.append(pd.DataFrame({
+            'branch_id': grid_branch.ravel(),
+            'plan_date': pd.to_datetime(grid_date.ravel()).date,
+            'dow': np.repeat(dows[None, :], len(branch_ids), axis=0).ravel(),
+            'start_time': start,
+            'end_time': end,
+            'required_staff': required.ravel().astype(np.int64),
+            'expected_sales': np.round(sales.ravel(), 2),
+            'peak_hour_sales': np.round(peak.ravel(), 2),
+        }))
+    plan = pd.concat(frames, ignore_index=True)
+
+    if current_df is not None and not current_df.empty:
+        plan = plan.merge(current_df.rename(columns={'staff': 'current_staff'}), on=['branch_id', 'dow', 'start_time'], how='left')
+        plan['current_staff'] = plan['current_staff'].round(2)
+    else:
+        plan['current_staff'] = np.nan
+
+    return plan.sort_values(['branch_id', 'plan_date', 'start_time'])[PLAN_COLUMNS[:-1]].reset_index(drop=True)
+
+
+def save_staffing_plan(engine, plan_df, run_time=None):
+    """Plan tablosunu tek transaction içinde yeni planla değiştirir (okuyucular hep tam bir plan görür)."""
+    plan_df = plan_df.assign(plan_run_time=run_time or datetime.now())
+
+    raw_conn = engine.raw_connection()
+    try:
+        with raw_conn.cursor() as cursor:
+            cursor.execute(CREATE_PLAN_SQL)
+            cursor.execute(f"DELETE FROM {PLAN_TABLE};")
+            rows, elapsed = copy_to_table(cursor, plan_df, PLAN_TABLE, columns=PLAN_COLUMNS)
+        raw_conn.commit()
+    except Exception:
+        raw_conn.rollback()
+        raise
+    finally:
+        raw_conn.close()
+    print_load_report(PLAN_TABLE, rows, elapsed)
+
+
+def run_staffing_plan(engine, history_weeks=DEFAULT_HISTORY_WEEKS,
+                      target_sales_per_staff_hour=DEFAULT_TARGET_SALES_PER_STAFF_HOUR,
+                      min_staff_per_shift=DEFAULT_MIN_STAFF_PER_SHIFT):
+    """Profil, tahmin ve mevcut kadroyu okuyup personel planını hesaplar ve kaydeder."""
+    print(f"\n-> Personel planı hesaplanıyor (profil: son {history_weeks} hafta, hedef: ₺{target_sales_per_staff_hour}/personel-saat)...")
+    started = time.perf_counter()
+
+    forecast_df = get_latest_forecasts(engine)
+    if forecast_df.empty:
+        print("!!! Personel planı için tahmin bulunamadı; önce prediction_engine.py çalıştırılmalı.")
+        return None
+
+    plan_df = build_staffing_plan(
+        forecast_df,
+        get_hourly_profiles(engine, history_weeks),
+        get_current_staffing(engine, history_weeks),
+        target_sales_per_staff_hour=target_sales_per_staff_hour,
+        min_staff_per_shift=min_staff_per_shift,
+    )
+    print(f"-> {plan_df['branch_id'].nunique()} şube x {plan_df['plan_date'].nunique()} gün için plan "
+          f"{time.perf_counter() - started:.2f} sn içinde hesaplandı.")
+
+    save_staffing_plan(engine, plan_df)
+    return plan_df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Saatlik satış profili ve 7 günlük tahminden vardiya bazlı personel planı üretir.")
+    parser.add_argument('--history-weeks', type=int, default=DEFAULT_HISTORY_WEEKS, help="Saatlik profil için kullanılacak geçmiş hafta sayısı.")
+    parser.add_argument('--target-sales-per-staff-hour', type=float, default=DEFAULT_TARGET_SALES_PER_STAFF_HOUR, help="Personel başına saatlik ciro hedefi (₺).")
+    parser.add_argument('--min-staff', type=int, default=DEFAULT_MIN_STAFF_PER_SHIFT, help="Vardiya başına en az personel.")
+    args = parser.parse_args()
+
+    run_staffing_plan(create_db_engine(), history_weeks=args.history_weeks,
+                      target_sales_per_staff_hour=args.target_sales_per_staff_hour,
+                      min_staff_per_shift=args.min_staff)